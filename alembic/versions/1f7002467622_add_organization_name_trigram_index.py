@@ -0,0 +1,60 @@
+"""Add organization name trigram index
+
+Revision ID: 1f7002467622
+Revises: 8485f169341c
+Create Date: 2026-10-18 12:26:51.804736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f7002467622'
+down_revision: Union[str, None] = '8485f169341c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# FTS5 trigram side table standing in for pg_trgm on SQLite
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE organizations_name_fts USING fts5("
+    "name, content='organizations', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER organizations_name_fts_insert AFTER INSERT ON organizations BEGIN "
+    "INSERT INTO organizations_name_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER organizations_name_fts_delete AFTER DELETE ON organizations BEGIN "
+    "INSERT INTO organizations_name_fts(organizations_name_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER organizations_name_fts_update AFTER UPDATE OF name ON organizations BEGIN "
+    "INSERT INTO organizations_name_fts(organizations_name_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO organizations_name_fts(rowid, name) VALUES (new.id, new.name); END",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_organizations_name_trgm',
+            'organizations',
+            ['name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        )
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # Index the organizations that already exist
+        op.execute("INSERT INTO organizations_name_fts(organizations_name_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_organizations_name_trgm', table_name='organizations')
+    elif dialect == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS organizations_name_fts_{trigger}')
+        op.execute('DROP TABLE IF EXISTS organizations_name_fts')
@@ -0,0 +1,64 @@
+"""Add data version
+
+Revision ID: 5c3e9a2d7b41
+Revises: 27a05b414870
+Create Date: 2026-10-18 18:02:37.512093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c3e9a2d7b41'
+down_revision: Union[str, None] = '27a05b414870'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('buildings', 'activities', 'organizations', 'organization_activity')
+
+POSTGRESQL_FUNCTION_DDL = (
+    "CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN UPDATE data_version SET value = value + 1 WHERE id = 1; RETURN NULL; END $$"
+)
+
+
+def upgrade() -> None:
+    op.create_table('data_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO data_version (id, value) VALUES (1, 0)")
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(POSTGRESQL_FUNCTION_DDL)
+        for table in VERSIONED_TABLES:
+            op.execute(
+                f"CREATE TRIGGER {table}_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()"
+            )
+    elif dialect == 'sqlite':
+        # SQLite only has row triggers
+        for table in VERSIONED_TABLES:
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                op.execute(
+                    f"CREATE TRIGGER {table}_data_version_{operation.lower()} AFTER {operation} ON {table} "
+                    "BEGIN UPDATE data_version SET value = value + 1 WHERE id = 1; END"
+                )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in VERSIONED_TABLES:
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_data_version ON {table}')
+        op.execute('DROP FUNCTION IF EXISTS bump_data_version()')
+    elif dialect == 'sqlite':
+        for table in VERSIONED_TABLES:
+            for operation in ('insert', 'update', 'delete'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_data_version_{operation}')
+    op.drop_table('data_version')
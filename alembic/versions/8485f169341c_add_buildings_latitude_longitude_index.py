@@ -0,0 +1,26 @@
+"""Add buildings latitude longitude index
+
+Revision ID: 8485f169341c
+Revises: 9ea10d49e1ae
+Create Date: 2026-10-18 11:03:47.529410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8485f169341c'
+down_revision: Union[str, None] = '9ea10d49e1ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_buildings_latitude_longitude', 'buildings', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_buildings_latitude_longitude', table_name='buildings')
@@ -0,0 +1,51 @@
+"""Add building grid cell
+
+Revision ID: 9ea10d49e1ae
+Revises: 87578e6e5ada
+Create Date: 2026-10-18 10:12:04.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.geo import grid_cell
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9ea10d49e1ae'
+down_revision: Union[str, None] = '87578e6e5ada'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('buildings', sa.Column('grid_cell', sa.Integer(), nullable=True))
+    # Computed with app.utils.geo.grid_cell for the rows that already exist,
+    # FLOOR and LEAST are not available on every database
+    buildings = sa.table(
+        'buildings',
+        sa.column('id', sa.Integer()),
+        sa.column('latitude', sa.Float()),
+        sa.column('longitude', sa.Float()),
+        sa.column('grid_cell', sa.Integer()),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(buildings.c.id, buildings.c.latitude, buildings.c.longitude)).all()
+    if rows:
+        bind.execute(
+            buildings.update().where(buildings.c.id == sa.bindparam('building_id')),
+            [
+                {'building_id': id_, 'grid_cell': grid_cell(latitude, longitude)}
+                for id_, latitude, longitude in rows
+            ],
+        )
+    with op.batch_alter_table('buildings') as batch_op:
+        batch_op.alter_column('grid_cell', existing_type=sa.Integer(), nullable=False)
+    op.create_index(op.f('ix_buildings_grid_cell'), 'buildings', ['grid_cell'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_buildings_grid_cell'), table_name='buildings')
+    op.drop_column('buildings', 'grid_cell')
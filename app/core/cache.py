@@ -0,0 +1,158 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import Settings, settings
+
+
+class CacheStats:
+    """Hit, miss and eviction counters of a cache backend."""
+
+    __slots__ = ("hits", "misses", "evictions")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class CacheBackend(ABC):
+    """Byte-string key/value store with per-entry TTL."""
+
+    name: str
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under `key`, or None if it is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every entry."""
+
+    def info(self) -> Dict[str, Any]:
+        """Return the backend name and counters."""
+        return {"backend": self.name, **self.stats.as_dict()}
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with TTL expiry and a bounded memory budget.
+
+    Entries are evicted least recently used first once the total size of the
+    stored values exceeds `max_bytes`. Values larger than `max_item_bytes`
+    are never stored.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int, max_item_bytes: Optional[int] = None):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes if max_item_bytes is not None else max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_item_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def info(self) -> Dict[str, Any]:
+        return {**super().info(), "entries": len(self._entries), "bytes": self._size}
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache backed by a server speaking the Redis protocol.
+
+    Entries are shared by every worker and expire server-side, so eviction
+    counters only reflect what this process can observe.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "rest_api_app:cache:"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:  # pragma: no cover - depends on the deployment
+            raise RuntimeError("The redis cache backend requires the `redis` package") from exc
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.client.get(self.prefix + key)
+        if value is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def create_cache(config: Settings) -> Optional[CacheBackend]:
+    """Build the response cache backend selected by `RESPONSE_CACHE_BACKEND`, None to disable caching."""
+    backend = config.RESPONSE_CACHE_BACKEND
+    if backend == "memory":
+        return MemoryCache(config.RESPONSE_CACHE_MAX_BYTES, config.RESPONSE_CACHE_MAX_ITEM_BYTES)
+    if backend == "redis":
+        return RedisCache.from_url(config.REDIS_URL)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+response_cache = create_cache(settings)
@@ -0,0 +1,183 @@
+"""
+In-process request and database metrics, rendered in the Prometheus text format.
+
+Every worker process aggregates its own metrics and labels its samples with
+its process id, so the series of different workers stay apart. Requests of a worker run
+on a single event loop thread and the updates below never await, so plain
+counters are consistent without locks and an observation costs a bisect
+and a few increments.
+"""
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the statements-per-request buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Bucketed distribution of observed values with their count and sum."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        # One slot per bound plus the +Inf one, not cumulative
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class QueryStats:
+    """Statements executed on behalf of the current request."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware for the duration of a request
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+class MetricsRegistry:
+    """Request, latency and database metrics of this worker."""
+
+    def __init__(self):
+        self.in_flight = 0
+        # Keyed by (method, route template, status code)
+        self.latency: Dict[Tuple[str, str, int], Histogram] = {}
+        # Keyed by (method, route template)
+        self.db_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries_total = 0
+        self.query_seconds_total = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, queries: QueryStats) -> None:
+        histogram = self.latency.get((method, route, status))
+        if histogram is None:
+            histogram = self.latency[(method, route, status)] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+        key = (method, route)
+        if key not in self.db_queries:
+            self.db_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+            self.db_latency[key] = Histogram(LATENCY_BUCKETS)
+        self.db_queries[key].observe(queries.count)
+        self.db_latency[key].observe(queries.seconds)
+
+    def observe_query(self, seconds: float) -> None:
+        self.queries_total += 1
+        self.query_seconds_total += seconds
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP http_requests_in_flight Requests being processed.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests processed, by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), histogram in self.latency.items():
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {histogram.count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route template and status code.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in self.latency.items():
+            lines.extend(histogram.render(
+                "http_request_duration_seconds", f'method="{method}",route="{route}",status="{status}"'
+            ))
+
+        lines += [
+            "# HELP http_request_db_queries Database statements per request, by route template.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        for (method, route), histogram in self.db_queries.items():
+            lines.extend(histogram.render("http_request_db_queries", f'method="{method}",route="{route}"'))
+
+        lines += [
+            "# HELP http_request_db_duration_seconds Time spent in database statements per request, by route template.",
+            "# TYPE http_request_db_duration_seconds histogram",
+        ]
+        for (method, route), histogram in self.db_latency.items():
+            lines.extend(histogram.render("http_request_db_duration_seconds", f'method="{method}",route="{route}"'))
+
+        lines += [
+            "# HELP db_queries_total Database statements executed, requests or not.",
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.queries_total}",
+            "# HELP db_query_duration_seconds_total Time spent in database statements.",
+            "# TYPE db_query_duration_seconds_total counter",
+            f"db_query_duration_seconds_total {self.query_seconds_total}",
+        ]
+        return lines
+
+
+metrics = MetricsRegistry()
+
+
+def instrument_engine(engine: AsyncEngine, registry: MetricsRegistry = metrics) -> None:
+    """Time every statement executed through `engine` into `registry`."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        # Missing when the engine was instrumented while the statement ran, or twice
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            registry.observe_query(time.perf_counter() - started)
+
+
+def render_samples(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, float]]) -> List[str]:
+    """Render a gauge or counter family from `(labels, value)` samples, labels already formatted."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}" for labels, value in samples)
+    return lines
+
+
+def label_worker(lines: Iterable[str], worker: Optional[str] = None) -> List[str]:
+    """Add a `worker` label, the process id by default, to every sample of rendered metric families."""
+    label = f'worker="{worker if worker is not None else os.getpid()}"'
+    labelled = []
+    for line in lines:
+        if line.startswith("#"):
+            labelled.append(line)
+            continue
+        series, value = line.rsplit(" ", 1)
+        if series.endswith("}"):
+            labelled.append(f"{series[:-1]},{label}}} {value}")
+        else:
+            labelled.append(f"{series}{{{label}}} {value}")
+    return labelled
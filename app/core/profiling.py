@@ -0,0 +1,109 @@
+"""
+Per-request query profiling: statement counts and time, repeated statement
+shapes and a slow statement log with the query plan.
+
+Only enabled with `QUERY_PROFILING`, as it normalizes every statement and
+runs EXPLAIN for the slow ones.
+"""
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:\?|\$\d+|%\(\w+\)s|:\w+)"
+# Expanded IN lists, `(?, ?, ?)`, whose length depends on the parameters
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Prefix returning the query plan of a statement, per dialect
+_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN", "postgresql": "EXPLAIN"}
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize `statement` so executions differing only in their parameters share a shape."""
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_LIST.sub("(?)", statement)).strip()
+
+
+class QueryProfile:
+    """Statements executed on behalf of the current request, by shape."""
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Return the shapes executed at least `threshold` times, most repeated first."""
+        repeated = [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+# Set by the profiling middleware for the duration of a request
+current_query_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_query_profile", default=None)
+
+
+def explain(conn: Connection, statement: str, parameters) -> Optional[str]:
+    """
+    Return the query plan of a SELECT `statement`, None for other statements or databases.
+
+    Runs on a separate DBAPI cursor of the same connection, so the plan is
+    computed in the same transaction and does not go through engine events.
+    """
+    prefix = _EXPLAIN.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"{prefix} {statement}", parameters)
+        # The plan text is the last column on both databases
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def profile_engine(engine: AsyncEngine, slow_query_ms: float) -> None:
+    """Record statements executed through `engine` into the current profile and log the slow ones."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info["profile_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        # Missing when the engine was profiled while the statement ran, or twice
+        started = conn.info.pop("profile_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        profile = current_query_profile.get()
+        if profile is not None:
+            profile.record(statement, seconds)
+
+        if seconds * 1000 < slow_query_ms:
+            return
+        plan = None
+        # Server-side cursors still hold their rows, batches have no single plan
+        if not executemany and not context.execution_options.get("stream_results", False):
+            try:
+                plan = explain(conn, statement, parameters)
+            except Exception as exc:
+                plan = f"EXPLAIN failed: {exc}"
+        logger.warning(
+            f"Slow statement ({seconds * 1000:.1f} ms): {statement}\n"
+            f"Parameters: {parameters!r}" + (f"\nPlan:\n{plan}" if plan else "")
+        )
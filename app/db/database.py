@@ -1,9 +1,64 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from contextlib import AsyncExitStack
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+from app.core.config import Settings, settings
+from app.db.pool import InstrumentedAsyncQueuePool
+from app.db.replicas import ReplicaRouter
 
-engine = create_async_engine(settings.DATABASE_URL)
+
+def engine_options(url: str, config: Settings = settings) -> Dict[str, Any]:
+    """
+    Build the `create_async_engine` arguments for the pool settings of `config`.
+
+    In-memory SQLite databases live in a single connection, so they keep the
+    dialect's default pool and ignore the pool settings.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if parsed.get_driver_name() == "asyncpg":
+        # SQLAlchemy's prepared statement cache sits on top of asyncpg's own, both have to go behind PgBouncer
+        options["connect_args"] = {
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def create_db_engine(url: str, config: Settings = settings) -> AsyncEngine:
+    """Create an async engine with the pool configured by `config`."""
+    return create_async_engine(url, **engine_options(url, config))
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> None:
+    """
+    Open `connections` connections and return them to the pool.
+
+    They are held at the same time so the pool keeps that many distinct
+    connections, which spares the first requests after startup the connect
+    latency. Connections beyond the pool size would be discarded on return,
+    so the count is capped to it.
+    """
+    size = getattr(engine.pool, "size", None)
+    if size is not None:
+        connections = min(connections, size())
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            await stack.enter_async_context(engine.connect())
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 
 # Create a configured "Session" class
 AsyncSessionLocal = sessionmaker(
@@ -12,7 +67,27 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Read replicas of the primary, used by the read-only endpoints
+replica_engines = [create_db_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+read_router = ReplicaRouter(
+    engine,
+    replica_engines,
+    AsyncSessionLocal,
+    strategy=settings.REPLICA_BALANCING,
+    retry_after=settings.REPLICA_RETRY_AFTER,
+    read_your_writes_window=settings.READ_YOUR_WRITES_WINDOW,
+)
+
 # Dependency to get the database session
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+# Dependency to get a session for reads, on a replica when one is configured and usable
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with await read_router.open_session() as session:
+        yield session
+
+# Dependency to get a factory of read sessions, for streamed responses that outlive the request's dependencies
+def get_read_session_factory() -> Callable[[], Awaitable[AsyncSession]]:
+    return read_router.open_session
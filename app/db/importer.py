@@ -0,0 +1,430 @@
+"""
+Streaming bulk import of buildings, activities and organizations.
+
+Each input is a CSV file with a header row or a JSON Lines file (.jsonl or
+.ndjson), read in chunks of `--chunk-size` records so memory stays bounded
+whatever the file size:
+
+    buildings:     id, address, latitude, longitude
+    activities:    id, name, parent_id (empty for a root activity)
+    organizations: id, name, building_id, phone_numbers, activity_ids
+                   (lists as JSON arrays, or ";"-separated in CSV)
+
+Every chunk is written in its own transaction, with COPY through a staging
+table on Postgres and batched multi-row inserts elsewhere, and existing rows
+are left untouched. The progress is saved to a checkpoint file after each
+chunk, so rerunning the same command after a failure, e.g. once the faulty
+record is fixed, resumes where it stopped. Delete the checkpoint to import
+the same files again.
+
+Usage:
+    python -m app.db.importer --buildings buildings.csv --activities activities.jsonl \\
+        --organizations organizations.csv [--chunk-size 5000] [--checkpoint import-checkpoint.json]
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import JSON, Table, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.core.config import settings
+from app.db.database import create_db_engine
+from app.db.models import Activity, Building, Organization, activity_closure, organization_activity
+from app.utils.geo import grid_cell
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class DataImportError(ValueError):
+    """Raised when an input record is malformed or references a missing row."""
+
+
+def read_records(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield `(position, record)` pairs of a CSV or JSON Lines file, positions starting at 1."""
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            lines = (line for line in file if line.strip())
+            yield from enumerate((json.loads(line) for line in lines), start=1)
+        else:
+            yield from enumerate(csv.DictReader(file), start=1)
+
+
+def _field(record: Dict[str, Any], name: str, convert: Callable[[Any], Any], optional: bool = False) -> Any:
+    value = record.get(name)
+    if value is None or value == "":
+        if optional:
+            return None
+        raise ValueError(f"missing {name}")
+    try:
+        return convert(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"invalid {name}: {value!r}") from exc
+
+
+def _list(value: Any) -> List[Any]:
+    """Read a list given as a JSON array, or as a ";"-separated CSV cell."""
+    if isinstance(value, list):
+        return value
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+
+def parse_building(record: Dict[str, Any]) -> Dict[str, Any]:
+    latitude = _field(record, "latitude", float)
+    longitude = _field(record, "longitude", float)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"coordinates out of range: {latitude}, {longitude}")
+    return {
+        "id": _field(record, "id", int),
+        "address": _field(record, "address", str),
+        "latitude": latitude,
+        "longitude": longitude,
+        # Core inserts bypass the ORM listener that maintains the grid bucket
+        "grid_cell": grid_cell(latitude, longitude),
+    }
+
+
+def parse_activity(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": _field(record, "id", int),
+        "name": _field(record, "name", str),
+        "parent_id": _field(record, "parent_id", int, optional=True),
+    }
+
+
+def parse_organization(record: Dict[str, Any]) -> Tuple[Dict[str, Any], List[int]]:
+    organization = {
+        "id": _field(record, "id", int),
+        "name": _field(record, "name", str),
+        "building_id": _field(record, "building_id", int),
+        "phone_numbers": [str(phone) for phone in _field(record, "phone_numbers", _list, optional=True) or []],
+    }
+    activity_ids = [int(activity_id) for activity_id in _field(record, "activity_ids", _list, optional=True) or []]
+    return organization, activity_ids
+
+
+class Checkpoint:
+    """
+    Progress of an import, persisted as JSON after every committed chunk.
+
+    Each stage records its source file and how many of its records are
+    committed. Progress recorded for another file is ignored.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        if path is not None and path.exists():
+            self.stages = json.loads(path.read_text())
+
+    def rows_done(self, stage: str, source: Path) -> int:
+        entry = self.stages.get(stage)
+        if entry is None or entry["source"] != str(source.resolve()):
+            return 0
+        return entry["rows"]
+
+    def is_complete(self, stage: str, source: Path) -> bool:
+        entry = self.stages.get(stage)
+        return entry is not None and entry["source"] == str(source.resolve()) and entry["complete"]
+
+    def update(self, stage: str, source: Path, rows: int, complete: bool = False) -> None:
+        self.stages[stage] = {"source": str(source.resolve()), "rows": rows, "complete": complete}
+        if self.path is None:
+            return
+        # Write aside and rename, a crash never leaves a truncated checkpoint
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps(self.stages, indent=2))
+        os.replace(temporary, self.path)
+
+
+async def write_rows(conn: AsyncConnection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    """Insert rows into `table`, skipping the ones whose key already exists."""
+    if not rows:
+        return
+    dialect = conn.dialect
+    if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+        await _copy_rows(conn, table, rows)
+    elif dialect.name == "postgresql":
+        await conn.execute(postgresql.insert(table).on_conflict_do_nothing(), rows)
+    elif dialect.name == "sqlite":
+        await conn.execute(sqlite.insert(table).on_conflict_do_nothing(), rows)
+    else:
+        await conn.execute(insert(table), rows)
+
+
+async def _copy_rows(conn: AsyncConnection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    """COPY rows into a staging table, then move the new ones to `table` in one statement."""
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
+    staging = f"import_{table.name}"
+    await conn.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+    # COPY sends JSON columns as text
+    encoders = [json.dumps if isinstance(table.c[column].type, JSON) else None for column in columns]
+    records = [
+        tuple(encode(row[column]) if encode else row[column] for column, encode in zip(columns, encoders))
+        for row in rows
+    ]
+    raw_connection = await conn.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(staging, records=records, columns=columns)
+    await conn.exec_driver_sql(
+        f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+    )
+
+
+def _chunks(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(records)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class StageStats:
+    """Records written by an import stage and how fast."""
+
+    __slots__ = ("stage", "rows", "seconds")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.stage}: {self.rows} rows in {self.seconds:.1f}s ({self.rows_per_second:.0f} rows/s)"
+
+
+class Importer:
+    """
+    Import the directory data in chunks, see the module documentation.
+
+    Args:
+        engine (AsyncEngine): The engine of the target database.
+        chunk_size (int): The number of records written per transaction.
+        checkpoint (Checkpoint): Where progress is recorded and resumed from.
+        report (Callable[[str], None]): Receives a progress line after every chunk.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint: Optional[Checkpoint] = None,
+        report: Callable[[str], None] = print,
+    ):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.report = report
+
+    async def _run_stage(
+        self,
+        stage: str,
+        source: Path,
+        write_chunk: Callable[[AsyncConnection, List[Tuple[int, Dict[str, Any]]]], Any],
+        resumable: bool = True,
+        finish: Optional[Callable[[], None]] = None,
+    ) -> StageStats:
+        """
+        Stream `source` through `write_chunk`, one transaction per chunk.
+
+        A resumable stage skips the records a previous run committed. The
+        others restart from the first record, the existing rows being skipped
+        by the inserts. `finish` may reject the stage once every chunk is
+        written, before it is marked complete.
+        """
+        stats = StageStats(stage)
+        if self.checkpoint.is_complete(stage, source):
+            self.report(f"{stage}: already imported from {source}")
+            return stats
+
+        done = self.checkpoint.rows_done(stage, source) if resumable else 0
+        records = itertools.islice(read_records(source), done, None)
+        started = time.perf_counter()
+        for chunk in _chunks(records, self.chunk_size):
+            async with self.engine.begin() as conn:
+                await write_chunk(conn, chunk)
+            done += len(chunk)
+            stats.rows += len(chunk)
+            stats.seconds = time.perf_counter() - started
+            if resumable:
+                self.checkpoint.update(stage, source, done)
+            self.report(f"{stats} [{done} records of {source.name}]")
+
+        if finish is not None:
+            finish()
+        self.checkpoint.update(stage, source, done, complete=True)
+        return stats
+
+    async def import_buildings(self, source: Path) -> StageStats:
+        async def write_chunk(conn, chunk):
+            buildings = [_parse(parse_building, source, position, record) for position, record in chunk]
+            await write_rows(conn, Building.__table__, buildings)
+
+        return await self._run_stage("buildings", source, write_chunk)
+
+    async def import_activities(self, source: Path) -> StageStats:
+        """
+        Import activities and their closure table paths.
+
+        An activity whose parent wasn't seen yet is held back until the parent
+        is written, so parents may come after their children in the file.
+        Held back activities are only in memory, hence the stage restarts
+        from the beginning of the file after a failure.
+        """
+        async with self.engine.connect() as conn:
+            # Ancestors of every known activity, nearest first
+            ancestors: Dict[int, Tuple[int, ...]] = {
+                activity_id: () for activity_id in (await conn.execute(select(Activity.id))).scalars()
+            }
+            paths = await conn.execute(
+                select(activity_closure.c.descendant_id, activity_closure.c.ancestor_id)
+                .where(activity_closure.c.depth > 0)
+                .order_by(activity_closure.c.descendant_id, activity_closure.c.depth)
+            )
+            for descendant_id, ancestor_id in paths:
+                ancestors[descendant_id] += (ancestor_id,)
+
+        # Activities waiting for their parent, by parent ID, with their position
+        waiting: Dict[int, List[Tuple[int, Dict[str, Any]]]] = defaultdict(list)
+
+        async def write_chunk(conn, chunk):
+            activities, closure = [], []
+
+            def add(activity):
+                activity_id = activity["id"]
+                parent_id = activity["parent_id"]
+                path = () if parent_id is None else (parent_id,) + ancestors[parent_id]
+                ancestors[activity_id] = path
+                activities.append(activity)
+                closure.append({"ancestor_id": activity_id, "descendant_id": activity_id, "depth": 0})
+                closure.extend(
+                    {"ancestor_id": ancestor_id, "descendant_id": activity_id, "depth": depth}
+                    for depth, ancestor_id in enumerate(path, start=1)
+                )
+                # Release the activities that were waiting for this one
+                for _, child in waiting.pop(activity_id, ()):
+                    add(child)
+
+            for position, record in chunk:
+                activity = _parse(parse_activity, source, position, record)
+                if activity["id"] in ancestors:
+                    continue
+                if activity["parent_id"] is None or activity["parent_id"] in ancestors:
+                    add(activity)
+                else:
+                    waiting[activity["parent_id"]].append((position, activity))
+
+            # Parents first, the closure rows reference them
+            await write_rows(conn, Activity.__table__, activities)
+            await write_rows(conn, activity_closure, closure)
+
+        def finish():
+            if waiting:
+                positions = sorted(position for children in waiting.values() for position, _ in children)
+                raise DataImportError(
+                    f"{source}: activities at records {_preview(positions)} "
+                    f"reference unknown parents {_preview(sorted(waiting))}"
+                )
+
+        return await self._run_stage("activities", source, write_chunk, resumable=False, finish=finish)
+
+    async def import_organizations(self, source: Path) -> StageStats:
+        async with self.engine.connect() as conn:
+            activity_ids: Set[int] = set((await conn.execute(select(Activity.id))).scalars())
+
+        async def write_chunk(conn, chunk):
+            parsed = [(position, *_parse(parse_organization, source, position, record)) for position, record in chunk]
+
+            # Resolve the buildings of the chunk in one query
+            building_ids = {organization["building_id"] for _, organization, _ in parsed}
+            existing = set((await conn.execute(select(Building.id).where(Building.id.in_(building_ids)))).scalars())
+            for position, organization, linked_ids in parsed:
+                if organization["building_id"] not in existing:
+                    raise DataImportError(f"{source}:{position}: unknown building {organization['building_id']}")
+                unknown = [activity_id for activity_id in linked_ids if activity_id not in activity_ids]
+                if unknown:
+                    raise DataImportError(f"{source}:{position}: unknown activities {unknown}")
+
+            await write_rows(conn, Organization.__table__, [organization for _, organization, _ in parsed])
+            await write_rows(conn, organization_activity, [
+                {"organization_id": organization["id"], "activity_id": activity_id}
+                for _, organization, linked_ids in parsed
+                for activity_id in dict.fromkeys(linked_ids)
+            ])
+
+        return await self._run_stage("organizations", source, write_chunk)
+
+    async def run(
+        self,
+        buildings: Optional[Path] = None,
+        activities: Optional[Path] = None,
+        organizations: Optional[Path] = None,
+    ) -> List[StageStats]:
+        """Import the given files, buildings and activities first as organizations reference them."""
+        results = []
+        if buildings is not None:
+            results.append(await self.import_buildings(buildings))
+        if activities is not None:
+            results.append(await self.import_activities(activities))
+        if organizations is not None:
+            results.append(await self.import_organizations(organizations))
+
+        if self.engine.dialect.name == "postgresql":
+            # Explicit IDs don't advance the sequences, align them for later inserts
+            async with self.engine.begin() as conn:
+                for table in (Building.__table__, Activity.__table__, Organization.__table__):
+                    await conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"COALESCE(MAX(id), 0) + 1, false) FROM {table.name}"
+                    ))
+        return results
+
+
+def _parse(parse: Callable[[Dict[str, Any]], Any], source: Path, position: int, record: Dict[str, Any]) -> Any:
+    try:
+        return parse(record)
+    except ValueError as exc:
+        raise DataImportError(f"{source}:{position}: {exc}") from exc
+
+
+def _preview(values: List[int], size: int = 10) -> str:
+    shown = ", ".join(str(value) for value in values[:size])
+    return shown + (f" and {len(values) - size} more" if len(values) > size else "")
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_db_engine(args.database_url)
+    importer = Importer(engine, args.chunk_size, Checkpoint(args.checkpoint))
+    try:
+        results = await importer.run(args.buildings, args.activities, args.organizations)
+    finally:
+        await engine.dispose()
+    for stats in results:
+        print(stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=Path)
+    parser.add_argument("--activities", type=Path)
+    parser.add_argument("--organizations", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", type=Path, default=Path("import-checkpoint.json"))
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+    if not (args.buildings or args.activities or args.organizations):
+        parser.error("nothing to import")
+    asyncio.run(main(args))
@@ -1,5 +1,7 @@
-from sqlalchemy import JSON, Column, String, Integer, ForeignKey, Float, Table
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import DDL, JSON, BigInteger, Column, String, Integer, ForeignKey, Float, Index, Table, column, event, inspect, table
+from sqlalchemy.orm import Session, relationship, declarative_base
+from sqlalchemy.sql.expression import delete, insert, literal, or_, select, true
+from app.utils.geo import grid_cell
 
 Base = declarative_base()
 
@@ -11,6 +13,17 @@ organization_activity = Table(
     Column("activity_id", Integer, ForeignKey("activities.id"), primary_key=True)
 )
 
+# Closure table of the activity hierarchy: one row per (ancestor, descendant)
+# pair, including each activity paired with itself at depth 0
+activity_closure = Table(
+    "activity_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True, index=True),
+    Column("depth", Integer, nullable=False),
+    Index("ix_activity_closure_ancestor_id_depth", "ancestor_id", "depth"),
+)
+
 class Building(Base):
     __tablename__ = "buildings"
 
@@ -18,9 +31,22 @@ class Building(Base):
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    # Spatial grid bucket derived from the coordinates, see app.utils.geo
+    grid_cell = Column(Integer, nullable=False, index=True)
 
     organizations = relationship("Organization", back_populates="building")
 
+    # Turns the bounding-box filters of the nearby searches into index range scans
+    __table_args__ = (
+        Index("ix_buildings_latitude_longitude", "latitude", "longitude"),
+    )
+
+@event.listens_for(Building, "before_insert")
+@event.listens_for(Building, "before_update")
+def _assign_grid_cell(mapper, connection, target: Building):
+    """Keep the grid bucket in sync with the building coordinates."""
+    target.grid_cell = grid_cell(target.latitude, target.longitude)
+
 class Activity(Base):
     __tablename__ = "activities"
 
@@ -36,6 +62,94 @@ class Activity(Base):
         "Organization", secondary=organization_activity, back_populates="activities"
     )
 
+def _insert_closure_paths(connection, activity_id: int, parent_id):
+    """Link a new activity to itself and to every ancestor of its parent."""
+    connection.execute(insert(activity_closure).values(ancestor_id=activity_id, descendant_id=activity_id, depth=0))
+    if parent_id is not None:
+        connection.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(activity_closure.c.ancestor_id, literal(activity_id), activity_closure.c.depth + 1)
+                .where(activity_closure.c.descendant_id == parent_id),
+            )
+        )
+
+def _move_closure_subtree(connection, activity_id: int, parent_id):
+    """Re-link the subtree of an activity to the ancestors of its new parent."""
+    subtree = select(activity_closure.c.descendant_id).where(activity_closure.c.ancestor_id == activity_id)
+    if parent_id is not None and connection.execute(
+        subtree.where(activity_closure.c.descendant_id == parent_id)
+    ).first():
+        raise ValueError(f"Activity {activity_id} can't be moved under its own descendant {parent_id}")
+
+    # Detach the subtree from its old ancestors
+    connection.execute(
+        delete(activity_closure).where(
+            activity_closure.c.descendant_id.in_(subtree),
+            activity_closure.c.ancestor_id.not_in(subtree),
+        )
+    )
+    if parent_id is not None:
+        ancestors = activity_closure.alias("ancestors")
+        descendants = activity_closure.alias("descendants")
+        connection.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    ancestors.c.ancestor_id,
+                    descendants.c.descendant_id,
+                    ancestors.c.depth + descendants.c.depth + 1,
+                )
+                # Every ancestor of the new parent times every node of the subtree
+                .select_from(ancestors.join(descendants, true()))
+                .where(ancestors.c.descendant_id == parent_id)
+                .where(descendants.c.ancestor_id == activity_id),
+            )
+        )
+
+@event.listens_for(Session, "after_flush")
+def _maintain_activity_closure(session: Session, flush_context):
+    """Keep `activity_closure` consistent with the activities inserted, moved or deleted in a flush."""
+    new = [obj for obj in session.new if isinstance(obj, Activity)]
+    moved = [
+        obj for obj in session.dirty
+        if isinstance(obj, Activity)
+        and (inspect(obj).attrs.parent_id.history.has_changes() or inspect(obj).attrs.parent.history.has_changes())
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Activity)]
+    if not (new or moved or deleted):
+        return
+
+    connection = session.connection()
+    # Parents first, so a child always finds the paths of its parent
+    pending = {activity.id: activity for activity in new}
+    inserted = set()
+
+    def insert_with_ancestors(activity):
+        parent = pending.get(activity.parent_id)
+        if parent is not None and parent.id not in inserted:
+            insert_with_ancestors(parent)
+        if activity.id not in inserted:
+            inserted.add(activity.id)
+            _insert_closure_paths(connection, activity.id, activity.parent_id)
+
+    for activity in new:
+        insert_with_ancestors(activity)
+
+    for activity in moved:
+        _move_closure_subtree(connection, activity.id, activity.parent_id)
+
+    if deleted:
+        deleted_ids = [activity.id for activity in deleted]
+        connection.execute(
+            delete(activity_closure).where(
+                or_(
+                    activity_closure.c.ancestor_id.in_(deleted_ids),
+                    activity_closure.c.descendant_id.in_(deleted_ids),
+                )
+            )
+        )
+
 class Organization(Base):
     __tablename__ = "organizations"
 
@@ -45,6 +159,94 @@ class Organization(Base):
     building_id = Column(Integer, ForeignKey("buildings.id"), nullable=False)
 
     building = relationship("Building", back_populates="organizations")
+    # Loaded per endpoint, see app.services.loaders
     activities = relationship(
-        "Activity", secondary=organization_activity, back_populates="organizations", lazy="subquery"
+        "Activity", secondary=organization_activity, back_populates="organizations"
+    )
+
+    # Trigram index serving `name ILIKE '%...%'` on Postgres
+    __table_args__ = (
+        Index(
+            "ix_organizations_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# SQLite has no trigram index, so substring searches go through an FTS5
+# trigram side table kept in sync with `organizations` by triggers
+organizations_name_fts = table("organizations_name_fts", column("rowid"), column("name"))
+
+ORGANIZATIONS_NAME_FTS_DDL = (
+    "CREATE VIRTUAL TABLE organizations_name_fts USING fts5("
+    "name, content='organizations', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER organizations_name_fts_insert AFTER INSERT ON organizations BEGIN "
+    "INSERT INTO organizations_name_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER organizations_name_fts_delete AFTER DELETE ON organizations BEGIN "
+    "INSERT INTO organizations_name_fts(organizations_name_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER organizations_name_fts_update AFTER UPDATE OF name ON organizations BEGIN "
+    "INSERT INTO organizations_name_fts(organizations_name_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO organizations_name_fts(rowid, name) VALUES (new.id, new.name); END",
+)
+
+for statement in ORGANIZATIONS_NAME_FTS_DDL:
+    event.listen(Organization.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Organization.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS organizations_name_fts").execute_if(dialect="sqlite"),
+)
+
+# Shared version of the directory data, a single row bumped by triggers on
+# every write to the versioned tables, whichever process or tool makes it.
+# Every API process follows it, see app.db.versioning
+data_version_table = Table(
+    "data_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("value", BigInteger, nullable=False),
+)
+
+VERSIONED_TABLES = (Building.__table__, Activity.__table__, Organization.__table__, organization_activity)
+
+DATA_VERSION_FUNCTION_DDL = (
+    "CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN UPDATE data_version SET value = value + 1 WHERE id = 1; RETURN NULL; END $$"
+)
+DATA_VERSION_POSTGRESQL_TRIGGER_DDL = (
+    "CREATE TRIGGER {name}_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {name} "
+    "FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()"
+)
+# SQLite only has row triggers
+DATA_VERSION_SQLITE_TRIGGER_DDL = tuple(
+    f"CREATE TRIGGER {{name}}_data_version_{operation.lower()} AFTER {operation} ON {{name}} "
+    "BEGIN UPDATE data_version SET value = value + 1 WHERE id = 1; END"
+    for operation in ("INSERT", "UPDATE", "DELETE")
+)
+
+event.listen(data_version_table, "after_create", DDL("INSERT INTO data_version (id, value) VALUES (1, 0)"))
+event.listen(Base.metadata, "before_create", DDL(DATA_VERSION_FUNCTION_DDL).execute_if(dialect="postgresql"))
+for versioned_table in VERSIONED_TABLES:
+    event.listen(
+        versioned_table,
+        "after_create",
+        DDL(DATA_VERSION_POSTGRESQL_TRIGGER_DDL.format(name=versioned_table.name)).execute_if(dialect="postgresql"),
     )
+    for statement in DATA_VERSION_SQLITE_TRIGGER_DDL:
+        event.listen(
+            versioned_table,
+            "after_create",
+            DDL(statement.format(name=versioned_table.name)).execute_if(dialect="sqlite"),
+        )
+event.listen(
+    Base.metadata,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS bump_data_version()").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,75 @@
+import time
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+
+class PoolMetrics:
+    """Checkout counters of a connection pool."""
+
+    __slots__ = ("checkouts", "timeouts", "wait_seconds", "max_wait_seconds")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_seconds,
+            "avg_wait_seconds": self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool measuring how long checkouts wait for a connection.
+
+    The wait covers queueing for a free connection as well as opening an
+    overflow one, i.e. everything a request spends before it can run a query.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def pool_stats(pool: Pool) -> Dict[str, Any]:
+    """
+    Report the occupancy of a pool and, if it is instrumented, its checkout counters.
+
+    Saturation is the share of the pool's capacity, overflow included, that is
+    checked out; at 1.0 new checkouts wait for a connection to be returned.
+    """
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            saturation=pool.checkedout() / capacity if capacity else 0.0,
+        )
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        stats.update(pool.metrics.as_dict())
+    return stats
@@ -0,0 +1,95 @@
+import itertools
+import time
+from typing import Callable, Dict, List, Sequence
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.db.versioning import data_version
+
+BALANCING_STRATEGIES = ("round_robin", "least_connections")
+
+
+class ReplicaRouter:
+    """
+    Route read-only sessions to read replicas of the primary database.
+
+    Replicas are picked round robin or by the fewest checked out connections.
+    A replica that fails to connect is skipped for `retry_after` seconds, and
+    reads fall back to the primary when no replica is usable.
+
+    For `read_your_writes_window` seconds after this process saw the data
+    version change, every read goes to the primary, so a client never reads
+    data older than its own write from a lagging replica.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: Sequence[AsyncEngine],
+        session_factory: Callable[..., AsyncSession],
+        strategy: str = "round_robin",
+        retry_after: float = 30,
+        read_your_writes_window: float = 5,
+    ):
+        if strategy not in BALANCING_STRATEGIES:
+            raise ValueError(f"Unknown replica balancing strategy: {strategy}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.session_factory = session_factory
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self.read_your_writes_window = read_your_writes_window
+        self._turns = itertools.count()
+        # Monotonic time until which each unhealthy replica is skipped
+        self._unhealthy_until: Dict[AsyncEngine, float] = {}
+        self._seen_version = data_version.value
+        self._last_write = float("-inf")
+
+    def is_healthy(self, replica: AsyncEngine) -> bool:
+        return self._unhealthy_until.get(replica, 0.0) <= time.monotonic()
+
+    def mark_unhealthy(self, replica: AsyncEngine) -> None:
+        """Skip `replica` for the next `retry_after` seconds."""
+        self._unhealthy_until[replica] = time.monotonic() + self.retry_after
+
+    def has_recent_write(self) -> bool:
+        """Check whether a change was committed within the read-your-writes window."""
+        # The data version is bumped on commit, the first read after it starts the window
+        version = data_version.value
+        if version != self._seen_version:
+            self._seen_version = version
+            self._last_write = time.monotonic()
+        return time.monotonic() - self._last_write < self.read_your_writes_window
+
+    def candidates(self) -> List[AsyncEngine]:
+        """Return the engines to try for the next read, in order, the primary last."""
+        if not self.replicas or self.has_recent_write():
+            return [self.primary]
+
+        healthy = [replica for replica in self.replicas if self.is_healthy(replica)]
+        if healthy:
+            turn = next(self._turns) % len(healthy)
+            healthy = healthy[turn:] + healthy[:turn]
+            if self.strategy == "least_connections":
+                # Stable sort, ties keep the round robin order
+                healthy.sort(key=lambda replica: replica.pool.checkedout())
+        return healthy + [self.primary]
+
+    async def open_session(self) -> AsyncSession:
+        """
+        Open a session on the first candidate that accepts a connection.
+
+        Raises:
+            DBAPIError: If the primary can't be reached either.
+        """
+        for engine in self.candidates():
+            session = self.session_factory(bind=engine)
+            try:
+                await session.connection()
+            except (DBAPIError, OSError):
+                await session.close()
+                if engine is self.primary:
+                    raise
+                self.mark_unhealthy(engine)
+                continue
+            return session
+        raise AssertionError("The primary is always a candidate")
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session
+from app.db.models import Activity, Building, Organization, data_version_table
+
+logger = logging.getLogger(__name__)
+
+# Entities whose changes make cached directory data stale
+VERSIONED_MODELS = (Building, Organization, Activity)
+
+SELECT_DATA_VERSION = select(data_version_table.c.value).where(data_version_table.c.id == 1)
+
+
+class DataVersion:
+    """
+    This process's view of the shared version of the directory data.
+
+    The version itself lives in the database, bumped by triggers on every
+    write to the versioned tables, so every worker sees the same value for
+    the same data, including after imports or direct SQL. It is read again
+    by `keep_in_sync` and right after the commits of this process.
+
+    Caches include the current value in their keys, so a change makes every
+    entry written before it unreachable. They only trust the value while it
+    was read recently, see `is_fresh`.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._synced_at = float("-inf")
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def is_fresh(self, max_age: float) -> bool:
+        """Check whether the value was read from the database within the last `max_age` seconds."""
+        return time.monotonic() - self._synced_at <= max_age
+
+    def observe(self, value: int) -> None:
+        """Record the version a commit of this process bumped the shared version to."""
+        # A poll that started before the commit may have finished after it
+        self._value = max(self._value, value)
+        self._synced_at = time.monotonic()
+
+    async def sync(self, engine: AsyncEngine) -> int:
+        """Read the shared version from the database."""
+        async with engine.connect() as conn:
+            self._value = await conn.scalar(SELECT_DATA_VERSION) or 0
+        self._synced_at = time.monotonic()
+        return self._value
+
+
+data_version = DataVersion()
+
+
+async def keep_in_sync(engine: AsyncEngine, interval: float) -> None:
+    """Read the shared version again every `interval` seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await data_version.sync(engine)
+        except Exception:
+            logger.exception("Failed to read the data version")
+
+
+@event.listens_for(Session, "after_flush")
+def _track_data_changes(session: Session, flush_context) -> None:
+    """Remember that the transaction touched versioned entities."""
+    if any(isinstance(obj, VERSIONED_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["data_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_data_changes(orm_execute_state: ORMExecuteState) -> None:
+    """Remember bulk INSERT/UPDATE/DELETE statements run through the session."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["data_changed"] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _read_bumped_data_version(session: Session) -> None:
+    """Read the version the triggers bumped within the transaction, before it is committed."""
+    # The commit flushes after this hook, flush first so every change is counted
+    session.flush()
+    if session.info.get("data_changed"):
+        session.info["data_version"] = session.connection().scalar(SELECT_DATA_VERSION)
+
+
+@event.listens_for(Session, "after_commit")
+def _observe_data_version(session: Session) -> None:
+    """Adopt the new version once the changes are visible to other sessions."""
+    version = session.info.pop("data_version", None)
+    if session.info.pop("data_changed", False) and version is not None:
+        data_version.observe(version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_data_changes(session: Session) -> None:
+    session.info.pop("data_changed", None)
+    session.info.pop("data_version", None)
@@ -1,5 +1,8 @@
-from fastapi import HTTPException, Security
+from typing import Optional
+from fastapi import HTTPException, Query, Security
 from fastapi.security import APIKeyHeader
+from starlette.datastructures import Headers
+from starlette.types import Scope
 from app.core.config import settings
 
 api_key_header = APIKeyHeader(name="X-API-Key")
@@ -9,3 +12,20 @@ API_KEY = settings.API_KEY
 async def get_api_key(api_key: str = Security(api_key_header)):
     if api_key != API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API Key")
+
+def has_valid_api_key(scope: Scope) -> bool:
+    """Check the API key of a raw ASGI request, for middleware running ahead of `get_api_key`."""
+    return Headers(scope=scope).get(api_key_header.model.name) == API_KEY
+
+class PageParams:
+    """Keyset pagination query parameters shared by the list endpoints."""
+
+    def __init__(
+        self,
+        limit: int = Query(
+            settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum number of items per page"
+        ),
+        cursor: Optional[str] = Query(None, description="Cursor of the page to fetch, taken from `next_cursor`"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
@@ -1,9 +1,66 @@
-from fastapi import APIRouter, FastAPI, Depends
-from fastapi.responses import RedirectResponse
-from app.routers import organizations, buildings, activities
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from fastapi import APIRouter, FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, RedirectResponse
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.profiling import profile_engine
+from app.db.database import AsyncSessionLocal, engine, read_router, replica_engines, warm_up_pool
+from app.db.versioning import data_version, keep_in_sync
+from app.middleware.cache import ResponseCacheMiddleware
+from app.middleware.etag import ConditionalGetMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import QueryProfilingMiddleware
+from app.routers import organizations, buildings, activities, cache, database, metrics, tiles
+from app.services.directory_snapshot import directory_snapshot
+from app.services.tile_service import keep_tiles_warm, parse_tile
 from app.dependencies import get_api_key
+from app.utils.pagination import InvalidCursorError
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for db_engine in (engine, *replica_engines):
+        await warm_up_pool(db_engine, settings.DB_POOL_WARMUP)
+    sync_version = None
+    if settings.DATA_VERSION_POLL_INTERVAL > 0:
+        # Read before the snapshot is built, it is labeled with the version
+        try:
+            await data_version.sync(engine)
+        except Exception:
+            logger.exception("Failed to read the data version")
+        sync_version = asyncio.create_task(keep_in_sync(engine, settings.DATA_VERSION_POLL_INTERVAL))
+    refresh_snapshot = None
+    if settings.SNAPSHOT_ENABLED:
+        # Built from the primary, a lagging replica would label old rows with the new data version
+        try:
+            await directory_snapshot.refresh(AsyncSessionLocal)
+        except Exception:
+            logger.exception("Failed to build the directory snapshot, reading from the database meanwhile")
+        refresh_snapshot = asyncio.create_task(directory_snapshot.keep_fresh(
+            AsyncSessionLocal, settings.SNAPSHOT_MAX_AGE, settings.SNAPSHOT_REFRESH_INTERVAL
+        ))
+    hot_tiles = None
+    if settings.HOT_TILES:
+        hot_tiles = asyncio.create_task(keep_tiles_warm(
+            read_router.open_session,
+            [parse_tile(tile) for tile in settings.HOT_TILES],
+            settings.HOT_TILES_REFRESH_INTERVAL,
+        ))
+    yield
+    for task in (hot_tiles, refresh_snapshot, sync_version):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    for db_engine in (engine, *replica_engines):
+        await db_engine.dispose()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Organizations Directory API",
     version="1.0.0",
     description="REST API для работы со справочником организаций, зданий и деятельностей",
@@ -13,6 +70,10 @@ app = FastAPI(
 async def redirect_to_docs():
     return RedirectResponse(url="/docs")
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # Define the API prefix
 api_prefix = "/api"
 router = APIRouter(prefix=api_prefix, 
@@ -23,5 +84,48 @@ router = APIRouter(prefix=api_prefix,
 router.include_router(buildings.router)
 router.include_router(organizations.router)
 router.include_router(activities.router)
+router.include_router(cache.router)
+router.include_router(database.router)
+router.include_router(tiles.router)
+
+app.include_router(router)
+
+# Scraped without the API key, like a health check
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+    for db_engine in (engine, *replica_engines):
+        instrument_engine(db_engine)
+
+if settings.QUERY_PROFILING:
+    for db_engine in (engine, *replica_engines):
+        profile_engine(db_engine, settings.SLOW_QUERY_MS)
+
+# Endpoints reporting live counters, never cached nor answered with 304
+live_stats_paths = [f"{api_prefix}/cache", f"{api_prefix}/database"]
+
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_version_age=settings.DATA_VERSION_MAX_AGE,
+    prefix=api_prefix,
+    # Tiles have their own cache, see app.services.tile_service
+    exclude=[*live_stats_paths, f"{api_prefix}/tiles"],
+)
+
+# Added after the response cache so it runs before it and answers 304 ahead of it
+if settings.ETAG_ENABLED:
+    app.add_middleware(
+        ConditionalGetMiddleware,
+        cache_control=settings.HTTP_CACHE_CONTROL,
+        max_version_age=settings.DATA_VERSION_MAX_AGE,
+        prefix=api_prefix,
+        exclude=live_stats_paths,
+    )
+
+if settings.QUERY_PROFILING:
+    app.add_middleware(QueryProfilingMiddleware, n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD)
 
-app.include_router(router)
\ No newline at end of file
+# Added after every other middleware so it also times 304s and cache hits
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
\ No newline at end of file
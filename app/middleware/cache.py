@@ -0,0 +1,101 @@
+from typing import Optional, Sequence
+from urllib.parse import parse_qsl, urlencode
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.cache import CacheBackend
+from app.db.versioning import data_version
+from app.dependencies import has_valid_api_key
+from app.schemas.serializers import NDJSON_MEDIA_TYPE
+
+
+def build_cache_key(scope: Scope, version: int) -> str:
+    """
+    Build a cache key from the data version, the path and the normalized query string.
+
+    Query parameters are sorted, so `?a=1&b=2` and `?b=2&a=1` share an entry.
+    The NDJSON representation negotiated with the Accept header gets its own key.
+    """
+    query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    key = f"v{version}:{scope['path']}?{urlencode(sorted(query))}"
+    if NDJSON_MEDIA_TYPE in Headers(scope=scope).get("accept", ""):
+        key += "#ndjson"
+    return key
+
+
+class ResponseCacheMiddleware:
+    """
+    Cache successful JSON responses of GET requests under `prefix`.
+
+    Only requests carrying a valid API key are served from or stored in the
+    cache, the others go through the app untouched and get rejected there.
+    Keys embed the data version shared through the database, see
+    `app.db.versioning`, so a change to buildings, organizations or
+    activities made by any process invalidates every entry at once, in every
+    worker sharing a Redis backend too. While the version wasn't read within
+    `max_version_age` seconds the cache is bypassed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: Optional[CacheBackend],
+        ttl: float,
+        max_version_age: float,
+        prefix: str = "/api",
+        exclude: Sequence[str] = (),
+    ):
+        self.app = app
+        self.cache = cache
+        self.ttl = ttl
+        self.max_version_age = max_version_age
+        self.prefix = prefix
+        self.exclude = tuple(exclude)
+
+    def _is_cacheable(self, scope: Scope) -> bool:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return False
+        path = scope["path"]
+        return path.startswith(self.prefix) and not path.startswith(self.exclude) and has_valid_api_key(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            self.cache is None
+            or not self._is_cacheable(scope)
+            or not data_version.is_fresh(self.max_version_age)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = build_cache_key(scope, data_version.value)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            content_type, body = cached.split(b"\n", 1)
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", content_type),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-cache", b"HIT"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        content_type = None
+        chunks = []
+
+        async def send_and_store(message: Message) -> None:
+            nonlocal content_type
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["x-cache"] = "MISS"
+                if message["status"] == 200 and headers.get("content-type", "").startswith("application/json"):
+                    content_type = headers["content-type"].encode("latin-1")
+            elif message["type"] == "http.response.body" and content_type is not None:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self.cache.set(key, content_type + b"\n" + b"".join(chunks), self.ttl)
+            await send(message)
+
+        await self.app(scope, receive, send_and_store)
@@ -0,0 +1,95 @@
+import hashlib
+from typing import Sequence
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.db.versioning import data_version
+from app.dependencies import has_valid_api_key
+from app.middleware.cache import build_cache_key
+
+def build_etag(scope: Scope, version: int) -> str:
+    """
+    Build a strong ETag from the data version, the path and the normalized query string.
+
+    The version is shared through the database, so every worker tags the
+    same data with the same ETag, across restarts too.
+    """
+    digest = hashlib.blake2b(build_cache_key(scope, version).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an `If-None-Match` header against `etag` using the weak comparison of RFC 9110.
+
+    `*` is not honored: whether a representation exists is only known once
+    the handler ran, so it never short-circuits the request.
+    """
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ConditionalGetMiddleware:
+    """
+    Tag successful GET responses under `prefix` and answer conditional requests.
+
+    The ETag only depends on the data version and the request URL, so a
+    request whose `If-None-Match` matches is answered with 304 before the
+    app runs, without opening a database session. That only happens while
+    the version was read within `max_version_age` seconds, past that the
+    request goes through the app. Like the response cache, only requests
+    carrying a valid API key are handled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache_control: str,
+        max_version_age: float,
+        prefix: str = "/api",
+        exclude: Sequence[str] = (),
+    ):
+        self.app = app
+        self.cache_control = cache_control
+        self.max_version_age = max_version_age
+        self.prefix = prefix
+        self.exclude = tuple(exclude)
+
+    def _is_conditional(self, scope: Scope) -> bool:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return False
+        path = scope["path"]
+        return path.startswith(self.prefix) and not path.startswith(self.exclude) and has_valid_api_key(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._is_conditional(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Tag with the version seen before the handler runs, a change committed
+        # meanwhile then only costs the client one extra full response
+        etag = build_etag(scope, data_version.value)
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if (
+            if_none_match is not None
+            and etag_matches(if_none_match, etag)
+            and data_version.is_fresh(self.max_version_age)
+        ):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [
+                    (b"etag", etag.encode()),
+                    (b"cache-control", self.cache_control.encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["etag"] = etag
+                headers["cache-control"] = self.cache_control
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,65 @@
+import time
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import MetricsRegistry, QueryStats, current_query_stats, metrics
+
+# Label of requests no route matches, so unknown URLs cannot grow the series
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Return the path template of the route handling `scope`, e.g. `/api/organizations/{organization_id}`.
+
+    The router records the matched route in the scope. Requests answered by an
+    inner middleware before reaching it, like 304s and cache hits, are matched
+    against the app routes here.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and database statements of every HTTP request.
+
+    Added last, so it runs first and also measures requests answered by the
+    other middlewares. The statements of a request are counted by the engine
+    events of app.core.metrics through the `current_query_stats` context.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        queries = QueryStats()
+        token = current_query_stats.set(queries)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.registry.in_flight -= 1
+            current_query_stats.reset(token)
+            self.registry.observe_request(scope["method"], route_template(scope), status, elapsed, queries)
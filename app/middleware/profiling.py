@@ -0,0 +1,43 @@
+import logging
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.profiling import QueryProfile, current_query_profile
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilingMiddleware:
+    """
+    Report the database statements of each HTTP request.
+
+    Responses get `X-DB-Query-Count` and `X-DB-Time-Ms` headers, counting the
+    statements run until the response started. Statement shapes executed at
+    least `n_plus_one_threshold` times within a request, like lazy loads of a
+    relationship per row, are logged as a likely N+1 once the request ends.
+    """
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = current_query_profile.set(profile)
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["x-db-query-count"] = str(profile.count)
+                headers["x-db-time-ms"] = f"{profile.seconds * 1000:.3f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            current_query_profile.reset(token)
+            for shape, count in profile.repeated(self.n_plus_one_threshold):
+                logger.warning(f"Likely N+1 in {scope['method']} {scope['path']}: {count} executions of {shape}")
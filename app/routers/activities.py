@@ -1,42 +1,60 @@
 import logging
-from typing import List
+from typing import Optional
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import get_db
+from app.db.database import get_read_db
+from app.dependencies import PageParams
 from app.services.activity_service import search_organizations_by_activity
-from app.schemas.schemas import OrganizationBase
+from app.services.directory_snapshot import directory_snapshot
+from app.schemas.schemas import OrganizationBase, Page
+from app.schemas.serializers import organization_to_dict, serialize_page
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/activities', tags=['Activities'])
 
-@router.get("/{activity_id}/organizations/search", response_model=List[OrganizationBase])
+@router.get("/{activity_id}/organizations/search", response_model=Page[OrganizationBase])
 async def search_organizations_by_activity_endpoint(
     activity_id: int,
-    depth: int = Query(3, ge=1, le=3, description="Maximum depth of activity tree"),
-    db: AsyncSession = Depends(get_db),
+    depth: Optional[int] = Query(
+        None, ge=1, description="Number of activity tree levels below the activity to include, all of them if omitted"
+    ),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Endpoint to search for organizations associated with a given activity.
 
     Args:
         activity_id (int): The ID of the activity to search organizations for.
-        depth (int): The depth of activity tree traversal (default is 3).
+        depth (Optional[int]): The number of activity tree levels below the activity to include (default is all of them).
+        page (PageParams): The page size and cursor.
         db (AsyncSession): The database session.
 
     Returns:
-        List[OrganizationBase]: A list of organizations related to the activity.
+        Page[OrganizationBase]: A page of organizations related to the activity.
 
     Raises:
         HTTPException: If no organizations are found for the given activity.
     """
     # Fetch organizations related to the specified activity and depth
-    organizations = await search_organizations_by_activity(db, activity_id, depth)
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        organizations, next_cursor = snapshot.search_organizations_by_activity(
+            activity_id, depth, page.limit, page.cursor
+        )
+    else:
+        organizations, next_cursor = await search_organizations_by_activity(
+            db, activity_id, depth, page.limit, page.cursor
+        )
     
     # If no organizations are found, log a warning and raise an HTTP 404 error
-    if not organizations:
+    if not organizations and page.cursor is None:
         logger.warning(f"No organizations found for activity ID {activity_id}")
         raise HTTPException(status_code=404, detail="No organizations found for the given activity")
     
-    # Return the list of organizations
-    return organizations
+    # Return the page of organizations
+    if snapshot is not None:
+        return ORJSONResponse({"items": organizations, "next_cursor": next_cursor})
+    return serialize_page(organizations, next_cursor, organization_to_dict)
 
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, Path
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.schemas.schemas import BuildingWithOrganizationsResponse
+from app.schemas.serializers import building_with_organizations_to_dict, serialize
 from app.services.building_service import get_building_with_organizations
+from app.services.directory_snapshot import directory_snapshot
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,7 @@ router = APIRouter(prefix='/buildings', tags=['Buildings'])
 @router.get("/{building_id}/organizations", response_model=BuildingWithOrganizationsResponse)
 async def list_organizations_in_building(
     building_id: int = Path(..., gt=0),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> BuildingWithOrganizationsResponse:
     """
     Retrieve a building and its associated organizations.
@@ -22,10 +25,16 @@ async def list_organizations_in_building(
     Returns:
         BuildingWithOrganizationsResponse: The building with its associated organizations.
     """
-    building = await get_building_with_organizations(db, building_id)
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        building = snapshot.building(building_id)
+    else:
+        building = await get_building_with_organizations(db, building_id)
     if not building:
         logger.warning(f"Building with ID {building_id} not found")
         raise HTTPException(status_code=404, detail="Building not found")
 
-    return building
+    if snapshot is not None:
+        return ORJSONResponse(building)
+    return serialize(building, building_with_organizations_to_dict)
 
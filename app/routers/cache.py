@@ -0,0 +1,17 @@
+from typing import Any, Dict
+from fastapi import APIRouter, HTTPException
+from app.core.cache import response_cache
+
+router = APIRouter(prefix='/cache', tags=['Cache'])
+
+@router.get("/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    Report the response cache counters.
+
+    Returns:
+        Dict[str, Any]: The backend name, hit, miss and eviction counters, and backend specific sizes.
+    """
+    if response_cache is None:
+        raise HTTPException(status_code=404, detail="Response cache is disabled")
+    return response_cache.info()
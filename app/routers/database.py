@@ -0,0 +1,20 @@
+from typing import Any, Dict
+from fastapi import APIRouter
+from app.db.database import engine, read_router
+from app.db.pool import pool_stats
+
+router = APIRouter(prefix='/database', tags=['Database'])
+
+@router.get("/pool/stats")
+async def get_pool_stats() -> Dict[str, Any]:
+    """
+    Report the occupancy and checkout counters of the connection pool.
+
+    Returns:
+        Dict[str, Any]: The pool class, its size, checked in and out connections, saturation and checkout wait times
+        of the primary, and the same for each read replica along with whether it is currently used.
+    """
+    replicas = [
+        {**pool_stats(replica.pool), "healthy": read_router.is_healthy(replica)} for replica in read_router.replicas
+    ]
+    return {**pool_stats(engine.pool), "replicas": replicas}
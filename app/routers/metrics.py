@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.cache import CacheBackend, response_cache
+from app.core.metrics import label_worker, metrics, render_samples
+from app.db.database import engine, read_router
+from app.db.pool import pool_stats
+from app.services.tile_service import tile_cache
+
+router = APIRouter(tags=['Metrics'])
+
+# Pool statistics exported as (metric name, type, help text)
+POOL_METRICS = {
+    "size": ("db_pool_size", "gauge", "Connections kept open by the pool."),
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections currently in use."),
+    "overflow": ("db_pool_overflow", "gauge", "Connections opened beyond the pool size."),
+    "saturation": ("db_pool_saturation", "gauge", "Share of the pool capacity, overflow included, in use."),
+    "max_wait_seconds": ("db_pool_max_wait_seconds", "gauge", "Longest wait for a connection since startup."),
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connections handed out since startup."),
+    "timeouts": ("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection."),
+    "wait_seconds": ("db_pool_wait_seconds_total", "counter", "Time spent waiting for connections since startup."),
+}
+
+class PrometheusResponse(PlainTextResponse):
+    media_type = "text/plain; version=0.0.4"
+
+def render_pools() -> List[str]:
+    pools: Dict[str, Dict[str, Any]] = {"primary": pool_stats(engine.pool)}
+    for index, replica in enumerate(read_router.replicas):
+        pools[f"replica-{index}"] = pool_stats(replica.pool)
+
+    lines = []
+    for field, (name, kind, help_text) in POOL_METRICS.items():
+        samples = [(f'database="{database}"', stats[field]) for database, stats in pools.items() if field in stats]
+        if samples:
+            lines.extend(render_samples(name, kind, help_text, samples))
+    return lines
+
+def render_cache(name: str, cache: Optional[CacheBackend]) -> List[str]:
+    if cache is None:
+        return []
+    info = cache.info()
+    backend = f'backend="{info["backend"]}"'
+    label = name.replace("_", " ").capitalize()
+    lines = []
+    for field in ("hits", "misses", "evictions"):
+        lines.extend(render_samples(
+            f"{name}_{field}_total", "counter", f"{label} {field} since startup.", [(backend, info[field])]
+        ))
+    for field in ("entries", "bytes"):
+        if field in info:
+            lines.extend(render_samples(f"{name}_{field}", "gauge", f"{label} {field} stored.", [(backend, info[field])]))
+    return lines
+
+@router.get("/metrics", include_in_schema=False, response_class=PrometheusResponse)
+async def get_metrics() -> PrometheusResponse:
+    """
+    Report the metrics of this worker in the Prometheus text format.
+
+    Every worker process aggregates its own metrics, so with several workers
+    each scrape sees the worker that happened to answer it. Samples carry a
+    `worker` label with its process id, sum them without it to aggregate.
+    """
+    lines = label_worker(
+        metrics.render() + render_pools() + render_cache("response_cache", response_cache)
+        + render_cache("tile_cache", tile_cache)
+    )
+    return PrometheusResponse("\n".join(lines) + "\n")
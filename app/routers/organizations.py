@@ -1,34 +1,118 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Awaitable, Callable, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import get_db
-from app.schemas.schemas import BuildingWithOrganizationsResponse, OrganizationWithBuilding
+from app.core.config import settings
+from app.db.database import get_read_db, get_read_session_factory
+from app.dependencies import PageParams
+from app.schemas.schemas import (
+    BuildingWithOrganizationsResponse,
+    ClusterList,
+    OrganizationBatch,
+    OrganizationWithBuilding,
+    OrganizationWithDistance,
+    Page,
+)
+from app.schemas.serializers import (
+    NDJSON_MEDIA_TYPE,
+    building_with_organizations_to_dict,
+    ndjson_response,
+    organization_with_building_to_dict,
+    organization_with_distance_to_dict,
+    serialize,
+    serialize_page,
+)
 from app.services.organization_service import *
+from app.services.cluster_service import get_clusters
+from app.utils.geo import GRID_CELL_SIZE, cluster_cell_span
+from app.services import projections
 
 router = APIRouter(prefix='/organizations', tags=['Organizations'])
 
-@router.get("/search", response_model=List[OrganizationWithBuilding])
+# Largest value of the INTEGER primary keys
+MAX_ID = 2 ** 31 - 1
+
+@router.get("", response_model=OrganizationBatch)
+async def get_organizations_batch(
+    ids: str = Query(
+        ...,
+        # Bounded before it is split, so oversized values are rejected without parsing them
+        max_length=settings.MAX_BATCH_SIZE * 11 - 1,
+        pattern=r"^\d{1,10}(,\d{1,10})*$",
+        description="Comma-separated IDs of the organizations to fetch",
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Fetch several organizations by their IDs in one request.
+
+    Args:
+        ids (str): The comma-separated IDs of the organizations to fetch, at most `MAX_BATCH_SIZE` of them.
+        db (AsyncSession): The database session.
+
+    Returns:
+        OrganizationBatch: The organizations found, with their associated building, in the requested order, and the requested IDs without an organization.
+
+    Raises:
+        HTTPException: If more IDs than allowed, or IDs out of the key range, are requested.
+    """
+    # Duplicates are answered once, at their first position
+    organization_ids = list(dict.fromkeys(int(organization_id) for organization_id in ids.split(",")))
+    if any(organization_id > MAX_ID for organization_id in organization_ids):
+        raise HTTPException(status_code=422, detail=f"Organization IDs can be at most {MAX_ID}")
+    if len(organization_ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=422, detail=f"At most {settings.MAX_BATCH_SIZE} organizations can be fetched at once"
+        )
+
+    if settings.CORE_READ_PATH:
+        found = {
+            organization["id"]: organization
+            for organization in await projections.fetch_organizations_by_ids(db, organization_ids)
+        }
+    else:
+        found = {
+            organization.id: organization
+            for organization in await get_organizations_by_ids(db, organization_ids)
+        }
+    batch = {
+        "items": [found[organization_id] for organization_id in organization_ids if organization_id in found],
+        "missing": [organization_id for organization_id in organization_ids if organization_id not in found],
+    }
+    if settings.CORE_READ_PATH:
+        return ORJSONResponse(batch)
+    return serialize(batch, lambda content: {
+        "items": [organization_with_building_to_dict(organization) for organization in content["items"]],
+        "missing": content["missing"],
+    })
+
+@router.get("/search", response_model=Page[OrganizationWithBuilding])
 async def search_organizations(
     name: str = Query(..., min_length=2, description="Name of the organization to search for"),
-    db: AsyncSession = Depends(get_db)
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Endpoint to search for organizations by name.
 
     Args:
         name (str): The name of the organization to search for. Must be at least 2 characters long.
+        page (PageParams): The page size and cursor.
         db (AsyncSession): The database session.
 
     Returns:
-        List[OrganizationWithBuilding]: A list of organizations matching the search name, including their associated building.
+        Page[OrganizationWithBuilding]: A page of organizations matching the search name, including their associated building.
     """
     # Perform the search query to find organizations matching the name
-    organizations = await search_organizations_by_name(db, name)
+    if settings.CORE_READ_PATH:
+        organizations, next_cursor = await projections.fetch_organizations_by_name(db, name, page.limit, page.cursor)
+        return ORJSONResponse({"items": organizations, "next_cursor": next_cursor})
+    organizations, next_cursor = await search_organizations_by_name(db, name, page.limit, page.cursor)
     
-    # Return the list of found organizations
-    return organizations
+    # Return the page of found organizations
+    return serialize_page(organizations, next_cursor, organization_with_building_to_dict)
 
-@router.get("/nearby/circular", response_model=List[BuildingWithOrganizationsResponse])
+@router.get("/nearby/circular", response_model=Page[BuildingWithOrganizationsResponse])
 async def fetch_buildings_in_circular_area(
     latitude: float = Query(
         ..., ge=-90, le=90, description="Latitude of the center point in degrees"
@@ -37,7 +121,8 @@ async def fetch_buildings_in_circular_area(
         ..., ge=-180, le=180, description="Longitude of the center point in degrees"
     ),
     radius: float = Query(..., gt=0, description="Radius in kilometers"),
-    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Fetch all buildings within a given circular area.
@@ -46,17 +131,25 @@ async def fetch_buildings_in_circular_area(
         latitude (float): The latitude of the center point.
         longitude (float): The longitude of the center point.
         radius (float): The radius in kilometers.
+        page (PageParams): The page size and cursor.
         db (AsyncSession): The database session.
 
     Returns:
-        List[BuildingWithOrganizationsResponse]: A list of buildings within the circular area, including their associated organizations.
+        Page[BuildingWithOrganizationsResponse]: A page of buildings within the circular area, including their associated organizations.
     """
-    buildings = await get_buildings_in_circular_area(db, latitude, longitude, radius)
-    if not buildings:
+    read = projections.fetch_buildings_in_circular_area if settings.CORE_READ_PATH else get_buildings_in_circular_area
+    buildings, next_cursor = await read(db, latitude, longitude, radius, page.limit, page.cursor)
+    if not buildings and page.cursor is None:
         raise HTTPException(status_code=404, detail="No buildings found in the specified area")
-    return buildings
+    if settings.CORE_READ_PATH:
+        return ORJSONResponse({"items": buildings, "next_cursor": next_cursor})
+    return serialize_page(buildings, next_cursor, building_with_organizations_to_dict)
 
-@router.get("/nearby/rectangular", response_model=List[BuildingWithOrganizationsResponse])
+@router.get(
+    "/nearby/rectangular",
+    response_model=Page[BuildingWithOrganizationsResponse],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
 async def fetch_buildings_in_rectangular_area(
     # The minimum latitude of the rectangular area
     min_lat: float = Query(..., ge=-90, le=90, description="Minimum latitude"),
@@ -66,31 +159,133 @@ async def fetch_buildings_in_rectangular_area(
     min_lon: float = Query(..., ge=-180, le=180, description="Minimum longitude"),
     # The maximum longitude of the rectangular area
     max_lon: float = Query(..., ge=-180, le=180, description="Maximum longitude"),
-    # The database session
-    db: AsyncSession = Depends(get_db),
+    # The page size and cursor
+    page: PageParams = Depends(),
+    # Stream every building as NDJSON instead of a page
+    stream: bool = Query(False, description=f"Stream every building in the area as {NDJSON_MEDIA_TYPE}, ignoring the pagination"),
+    accept: Optional[str] = Header(None),
+    # Sessions opened by the branch that reads, the streamed response outlives the request's dependencies
+    open_session: Callable[[], Awaitable[AsyncSession]] = Depends(get_read_session_factory),
 ):
     """
     Fetch all buildings within a given rectangular area.
 
+    With `?stream=true` or `Accept: application/x-ndjson`, every building in the
+    area is streamed as newline-delimited JSON, one building per line, as the
+    rows are read, instead of a page. Each branch opens its own session, so
+    a stream doesn't hold a second connection for the request.
+
     Args:
         min_lat (float): The minimum latitude of the rectangular area.
         max_lat (float): The maximum latitude of the rectangular area.
         min_lon (float): The minimum longitude of the rectangular area.
         max_lon (float): The maximum longitude of the rectangular area.
+        page (PageParams): The page size and cursor.
+        stream (bool): Whether to stream every building as NDJSON.
+        accept (Optional[str]): The Accept header, streaming when it asks for NDJSON.
+        open_session (Callable[[], Awaitable[AsyncSession]]): Opens the session the page or the stream is read from.
+
+    Returns:
+        Page[BuildingWithOrganizationsResponse]: A page of buildings within the rectangular area, including their associated organizations.
+    """
+    if stream or NDJSON_MEDIA_TYPE in (accept or ""):
+        async def batches():
+            # The body is sent after the endpoint returns, the stream owns its session
+            async with await open_session() as session:
+                async for batch in projections.stream_buildings_in_rectangular_area(
+                    session, min_lat, max_lat, min_lon, max_lon, settings.STREAM_BATCH_SIZE
+                ):
+                    yield batch
+
+        response = await ndjson_response(batches())
+        if response is None:
+            raise HTTPException(status_code=404, detail="No buildings found in the specified area")
+        return response
+
+    read = projections.fetch_buildings_in_rectangular_area if settings.CORE_READ_PATH else get_buildings_in_rectangular_area
+    async with await open_session() as db:
+        buildings, next_cursor = await read(db, min_lat, max_lat, min_lon, max_lon, page.limit, page.cursor)
+        if not buildings and page.cursor is None:
+            raise HTTPException(status_code=404, detail="No buildings found in the specified area")
+        if settings.CORE_READ_PATH:
+            return ORJSONResponse({"items": buildings, "next_cursor": next_cursor})
+        return serialize_page(buildings, next_cursor, building_with_organizations_to_dict)
+
+@router.get("/nearby/clusters", response_model=ClusterList)
+async def fetch_clusters_in_rectangular_area(
+    min_lat: float = Query(..., ge=-90, le=90, description="Minimum latitude"),
+    max_lat: float = Query(..., ge=-90, le=90, description="Maximum latitude"),
+    min_lon: float = Query(..., ge=-180, le=180, description="Minimum longitude"),
+    max_lon: float = Query(..., ge=-180, le=180, description="Maximum longitude"),
+    zoom: int = Query(..., ge=0, le=22, description="Zoom level of the map"),
+    activities: bool = Query(False, description="Break every cluster down by root activity"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Aggregate the organizations within a rectangular area into clusters sized for a map zoom level.
+
+    Args:
+        min_lat (float): The minimum latitude of the rectangular area.
+        max_lat (float): The maximum latitude of the rectangular area.
+        min_lon (float): The minimum longitude of the rectangular area.
+        max_lon (float): The maximum longitude of the rectangular area.
+        zoom (int): The zoom level of the map, a tile being split into `CLUSTER_CELLS_PER_TILE` clusters per side.
+        activities (bool): Whether to break every cluster down by root activity.
         db (AsyncSession): The database session.
 
     Returns:
-        List[BuildingWithOrganizationsResponse]: A list of buildings within the rectangular area, including their associated organizations.
+        ClusterList: The cell size in degrees and the clusters with their organization and building counts and centroid.
+
+    Raises:
+        HTTPException: If the area would be split into more than `MAX_CLUSTER_CELLS` clusters at this zoom level.
     """
-    buildings = await get_buildings_in_rectangular_area(db, min_lat, max_lat, min_lon, max_lon)
-    if not buildings:
-        raise HTTPException(status_code=404, detail="No buildings found in the specified area")
-    return buildings
+    span = cluster_cell_span(zoom, settings.CLUSTER_CELLS_PER_TILE)
+    cell_size = round(span * GRID_CELL_SIZE, 6)
+    cells = (int((max_lat - min_lat) / cell_size) + 2) * (int((max_lon - min_lon) / cell_size) + 2)
+    if cells > settings.MAX_CLUSTER_CELLS:
+        raise HTTPException(
+            status_code=422, detail="The area is too large for this zoom level, zoom out or request a smaller area"
+        )
+
+    clusters = await get_clusters(db, min_lat, max_lat, min_lon, max_lon, span, activities)
+    return ORJSONResponse({"cell_size": cell_size, "clusters": clusters})
 
+@router.get("/nearby/nearest", response_model=List[OrganizationWithDistance])
+async def fetch_nearest_organizations(
+    latitude: float = Query(
+        ..., ge=-90, le=90, description="Latitude of the point in degrees"
+    ),
+    longitude: float = Query(
+        ..., ge=-180, le=180, description="Longitude of the point in degrees"
+    ),
+    k: int = Query(20, ge=1, le=100, description="Number of organizations to return"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Fetch the organizations closest to a given point.
+
+    Args:
+        latitude (float): The latitude of the point.
+        longitude (float): The longitude of the point.
+        k (int): The number of organizations to return.
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[OrganizationWithDistance]: Up to k organizations with their associated building, closest first, including their distance in kilometers.
+    """
+    nearest = await get_nearest_organizations(db, latitude, longitude, k)
+    if settings.FAST_SERIALIZATION:
+        return ORJSONResponse([
+            organization_with_distance_to_dict(organization, distance) for organization, distance in nearest
+        ])
+    return [
+        {**OrganizationWithBuilding.model_validate(organization).model_dump(), "distance": distance}
+        for organization, distance in nearest
+    ]
 
 @router.get("/{organization_id}", response_model=OrganizationWithBuilding)
 async def get_organization(
-    organization_id: int, db: AsyncSession = Depends(get_db)
+    organization_id: int, db: AsyncSession = Depends(get_read_db)
 ):
     """
     Fetch an organization by its ID.
@@ -105,7 +300,10 @@ async def get_organization(
     Raises:
         HTTPException: If no organization is found for the given ID.
     """
-    organization = await get_organization_by_id(db, organization_id)
+    read = projections.fetch_organization_by_id if settings.CORE_READ_PATH else get_organization_by_id
+    organization = await read(db, organization_id)
     if not organization:
         raise HTTPException(status_code=404, detail="Organization not found")
-    return organization
+    if settings.CORE_READ_PATH:
+        return ORJSONResponse(organization)
+    return serialize(organization, organization_with_building_to_dict)
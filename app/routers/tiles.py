@@ -0,0 +1,50 @@
+from typing import Awaitable, Callable
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.database import get_read_session_factory
+from app.services.tile_service import TILE_MEDIA_TYPES, render_tiles
+
+router = APIRouter(prefix='/tiles', tags=['Tiles'])
+
+@router.get(
+    "/{z}/{x}/{y}",
+    response_class=Response,
+    responses={200: {"content": {media_type: {} for media_type in TILE_MEDIA_TYPES.values()}}},
+)
+async def get_tile(
+    z: int = Path(..., description="Zoom level of the tile"),
+    x: int = Path(..., ge=0, description="Column of the tile, from the west"),
+    y: int = Path(..., ge=0, description="Row of the tile, from the north"),
+    format: str = Query("json", pattern="^(json|bin)$", description="Encoding of the tile, see app.services.tile_service"),
+    open_session: Callable[[], Awaitable[AsyncSession]] = Depends(get_read_session_factory),
+):
+    """
+    Fetch the buildings inside a Web Mercator map tile with their number of organizations.
+
+    Tiles are cached until the data changes, a session is only opened to render a tile missing from the cache.
+
+    Args:
+        z (int): The zoom level of the tile, from `TILE_MIN_ZOOM` to `TILE_MAX_ZOOM`.
+        x (int): The column of the tile.
+        y (int): The row of the tile.
+        format (str): The encoding of the tile, `json` or `bin`.
+        open_session (Callable[[], Awaitable[AsyncSession]]): Opens the session a missing tile is rendered with.
+
+    Returns:
+        Response: The encoded tile.
+
+    Raises:
+        HTTPException: If the zoom level is not served or the tile is outside of the map.
+    """
+    if not settings.TILE_MIN_ZOOM <= z <= settings.TILE_MAX_ZOOM:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Tiles are served from zoom {settings.TILE_MIN_ZOOM} to {settings.TILE_MAX_ZOOM}, "
+                   "use /organizations/nearby/clusters for lower zoom levels",
+        )
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile outside of the map")
+
+    rendered = await render_tiles(open_session, [(z, x, y)], [format])
+    return Response(rendered[(z, x, y)][format], media_type=TILE_MEDIA_TYPES[format])
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, ConfigDict
 from pydantic_extra_types.coordinate import Latitude, Longitude
-from typing import List
+from typing import Generic, List, Optional, TypeVar
 
+T = TypeVar("T")
 
 class ActivityBase(BaseModel):
     id: int
@@ -44,3 +45,41 @@ class OrganizationWithBuilding(OrganizationBase):
     model_config = ConfigDict(
         from_attributes=True
     )
+
+class OrganizationWithDistance(OrganizationWithBuilding):
+    distance: float
+
+    model_config = ConfigDict(
+        from_attributes=True
+    )
+
+class OrganizationBatch(BaseModel):
+    # Found organizations in the requested order
+    items: List[OrganizationWithBuilding]
+    # Requested IDs without an organization
+    missing: List[int]
+
+class ActivityCount(BaseModel):
+    # ID of a root activity
+    id: int
+    # Organizations with this activity or one of its descendants
+    count: int
+
+class Cluster(BaseModel):
+    # Mean position of the organizations of the cluster
+    latitude: Latitude
+    longitude: Longitude
+    organizations: int
+    buildings: int
+    # Breakdown by root activity, only when requested
+    activities: Optional[List[ActivityCount]] = None
+
+class ClusterList(BaseModel):
+    # Side of the cluster cells in degrees
+    cell_size: float
+    clusters: List[Cluster]
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    # Cursor of the next page, None on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,110 @@
+"""
+Direct ORM-to-dict projections of the response schemas.
+
+With `FAST_SERIALIZATION` enabled, endpoints build their payload with these
+functions and return it as an `ORJSONResponse`, which FastAPI sends as is.
+That skips validating every loaded object back through the Pydantic models
+and encoding the result with the stdlib `json` module. The functions must
+produce exactly what the matching model in `schemas.py` dumps.
+"""
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, TypeVar, Union
+import orjson
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from app.core.config import settings
+from app.db.models import Activity, Building, Organization
+
+T = TypeVar("T")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def activity_to_dict(activity: Activity) -> Dict[str, Any]:
+    """Project an activity like `ActivityBase`."""
+    return {"id": activity.id, "name": activity.name}
+
+
+def building_to_dict(building: Building) -> Dict[str, Any]:
+    """Project a building like `BuildingBase`."""
+    return {
+        "id": building.id,
+        "address": building.address,
+        "latitude": building.latitude,
+        "longitude": building.longitude,
+    }
+
+
+def organization_to_dict(organization: Organization) -> Dict[str, Any]:
+    """Project an organization like `OrganizationBase`."""
+    return {
+        "id": organization.id,
+        "name": organization.name,
+        "phone_numbers": organization.phone_numbers,
+        "activities": [activity_to_dict(activity) for activity in organization.activities],
+    }
+
+
+def organization_with_building_to_dict(organization: Organization) -> Dict[str, Any]:
+    """Project an organization like `OrganizationWithBuilding`."""
+    payload = organization_to_dict(organization)
+    payload["building"] = building_to_dict(organization.building)
+    return payload
+
+
+def organization_with_distance_to_dict(organization: Organization, distance: float) -> Dict[str, Any]:
+    """Project an organization and its distance like `OrganizationWithDistance`."""
+    payload = organization_with_building_to_dict(organization)
+    payload["distance"] = distance
+    return payload
+
+
+def building_with_organizations_to_dict(building: Building) -> Dict[str, Any]:
+    """Project a building like `BuildingWithOrganizationsResponse`."""
+    payload = building_to_dict(building)
+    payload["organizations"] = [organization_to_dict(organization) for organization in building.organizations]
+    return payload
+
+
+def serialize(content: T, serializer: Callable[[T], Any]) -> Union[T, ORJSONResponse]:
+    """
+    Serialize a response payload through `serializer` when fast serialization is enabled.
+
+    Otherwise `content` is returned untouched, for FastAPI to validate
+    against the endpoint's `response_model`.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return content
+    return ORJSONResponse(serializer(content))
+
+
+def serialize_page(
+    items: Iterable[T], next_cursor: Optional[str], serializer: Callable[[T], Dict[str, Any]]
+) -> Union[Dict[str, Any], ORJSONResponse]:
+    """Serialize a `Page` of items, see `serialize`."""
+    if not settings.FAST_SERIALIZATION:
+        return {"items": items, "next_cursor": next_cursor}
+    return ORJSONResponse({"items": [serializer(item) for item in items], "next_cursor": next_cursor})
+
+
+async def ndjson_response(batches: AsyncIterator[List[Dict[str, Any]]]) -> Optional[StreamingResponse]:
+    """
+    Stream batches of JSON-ready items as newline-delimited JSON, one item per line.
+
+    The first batch is awaited before the response starts, so an empty result
+    is known in time to answer differently: None is returned in that case.
+    Each following batch is only fetched once the previous one was sent.
+    """
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        await batches.aclose()
+        return None
+
+    async def lines() -> AsyncIterator[bytes]:
+        try:
+            yield b"".join(orjson.dumps(item) + b"\n" for item in first)
+            async for batch in batches:
+                yield b"".join(orjson.dumps(item) + b"\n" for item in batch)
+        finally:
+            await batches.aclose()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
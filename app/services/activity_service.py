@@ -1,33 +1,41 @@
-from typing import List
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from app.db.models import Activity, Organization, organization_activity
+from app.db.models import Organization, activity_closure, organization_activity
+from app.services.loaders import ORGANIZATION_WITH_ACTIVITIES_JOINED
+from app.utils.pagination import decode_cursor, paginate
 
-async def get_nested_activity_ids(db: AsyncSession, activity_id: int, depth: int) -> List[int]:
-    """Fetch IDs of nested activities using a recursive CTE."""
-    cte = (
-        select(Activity.id)
-        .where(Activity.id == activity_id)
-        .cte(recursive=True)
-    )
-
-    child_activities = select(Activity.id).where(Activity.parent_id == cte.c.id)
-    cte = cte.union_all(child_activities)
-
-    query = select(cte.c.id).limit(depth)
-    result = await db.execute(query)
-    return result.scalars().all()
+async def search_organizations_by_activity(
+    db: AsyncSession,
+    activity_id: int,
+    depth: Optional[int],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Organization], Optional[str]]:
+    """
+    Fetch a page of organizations related to an activity, including nested activities up to `depth` levels below it, ordered by ID.
 
+    Everything happens in a single statement: the subtree lookup in the
+    closure table is embedded as a semi-join, so each organization is
+    returned once however many of its activities match, and the activities
+    of the page are joined in the same round trip.
+    """
+    matching_organization_ids = (
+        select(organization_activity.c.organization_id)
+        .join(activity_closure, activity_closure.c.descendant_id == organization_activity.c.activity_id)
+        .where(activity_closure.c.ancestor_id == activity_id)
+    )
+    if depth is not None:
+        matching_organization_ids = matching_organization_ids.where(activity_closure.c.depth <= depth)
 
-async def search_organizations_by_activity(db: AsyncSession, activity_id: int, depth: int) -> List[Organization]:
-    """Fetch organizations related to an activity, including nested activities."""
-    activity_ids = await get_nested_activity_ids(db, activity_id, depth)
     query = (
         select(Organization)
-        .join(organization_activity)
-        .where(organization_activity.c.activity_id.in_(activity_ids))
-        .options(joinedload(Organization.building))
+        .where(Organization.id.in_(matching_organization_ids))
+        .options(*ORGANIZATION_WITH_ACTIVITIES_JOINED)
+        .order_by(Organization.id)
+        .limit(limit + 1)
     )
+    if cursor is not None:
+        query = query.where(Organization.id > decode_cursor(cursor, (int,))[0])
     result = await db.execute(query)
-    return result.scalars().all()
+    return paginate(result.unique().scalars().all(), limit, lambda organization: (organization.id,))
@@ -0,0 +1,69 @@
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ActivityTreeSnapshot:
+    """
+    Immutable view of the activity taxonomy.
+
+    For every activity it holds the IDs of its subtree level by level, so
+    resolving "this activity and everything up to N levels below it" is a
+    dict lookup.
+
+    It is built as part of the directory snapshot, which stamps it with the
+    shared data version: any write, including to activities, makes it stale,
+    and it is also rebuilt every `SNAPSHOT_MAX_AGE` seconds or after
+    `directory_snapshot.clear()`. Without the snapshot the activity search
+    reads the subtree from the closure table in the same statement as the
+    organizations.
+    """
+
+    __slots__ = ("version", "built_at", "_subtrees")
+
+    def __init__(self, version: int, edges: Iterable[Tuple[int, Optional[int]]]):
+        self.version = version
+        self.built_at = time.monotonic()
+
+        children: Dict[int, List[int]] = defaultdict(list)
+        activity_ids = []
+        for activity_id, parent_id in edges:
+            activity_ids.append(activity_id)
+            if parent_id is not None:
+                children[parent_id].append(activity_id)
+
+        # _subtrees[id][n] holds the IDs up to n levels below `id`, itself included
+        self._subtrees: Dict[int, List[Tuple[int, ...]]] = {}
+        for activity_id in activity_ids:
+            collected = [activity_id]
+            levels = [tuple(collected)]
+            frontier = [activity_id]
+            seen = {activity_id}
+            while frontier:
+                # `seen` guards against cycles in corrupted data
+                frontier = [child for node in frontier for child in children[node] if child not in seen]
+                if not frontier:
+                    break
+                seen.update(frontier)
+                collected.extend(frontier)
+                levels.append(tuple(collected))
+            self._subtrees[activity_id] = levels
+
+    def descendant_ids(self, activity_id: int, depth: Optional[int] = None) -> Tuple[int, ...]:
+        """
+        Return the activity and its descendants up to `depth` levels below it.
+
+        Args:
+            activity_id (int): The ID of the root activity.
+            depth (Optional[int]): The number of levels below the activity to include, None for all of them.
+
+        Returns:
+            Tuple[int, ...]: The activity IDs, empty if the activity doesn't exist.
+        """
+        levels = self._subtrees.get(activity_id)
+        if levels is None:
+            return ()
+        if depth is None or depth >= len(levels):
+            return levels[-1]
+        return levels[depth]
+
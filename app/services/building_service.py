@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
 from app.db.models import Building
+from app.services.loaders import BUILDING_WITH_ORGANIZATIONS
 
 async def get_building_with_organizations(db: AsyncSession, building_id: int) -> Building:
     """
@@ -9,7 +9,7 @@ async def get_building_with_organizations(db: AsyncSession, building_id: int) ->
     """
     result = await db.execute(
         select(Building)
-        .options(joinedload(Building.organizations))
+        .options(*BUILDING_WITH_ORGANIZATIONS)
         .where(Building.id == building_id) 
     )
     building = result.scalars().first() 
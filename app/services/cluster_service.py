@@ -0,0 +1,90 @@
+from collections import defaultdict
+from typing import Any, Dict, List
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.db.models import Activity, Building, Organization, activity_closure, organization_activity
+from app.services.filters import rectangle_filter
+from app.utils.geo import GRID_COLUMNS
+
+async def get_clusters(
+    db: AsyncSession,
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+    span: int,
+    with_activities: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate the organizations within a rectangular area into clusters of `span` x `span` grid cells.
+
+    The clusters are computed by the database with a GROUP BY on the
+    precomputed `grid_cell` of the buildings, so only one row per cluster is
+    transferred whatever the number of organizations.
+
+    Args:
+        db (AsyncSession): The database session.
+        min_lat (float): The minimum latitude of the rectangular area.
+        max_lat (float): The maximum latitude of the rectangular area.
+        min_lon (float): The minimum longitude of the rectangular area.
+        max_lon (float): The maximum longitude of the rectangular area.
+        span (int): The side of the clusters in grid cells, see `cluster_cell_span`.
+        with_activities (bool): Whether to break every cluster down by root activity.
+
+    Returns:
+        List[Dict[str, Any]]: The clusters shaped like `Cluster`, south to north then west to east.
+    """
+    # Integer division of non-negative cell coordinates, the same on every database
+    cluster_row = (Building.grid_cell // GRID_COLUMNS // span).label("cluster_row")
+    cluster_column = (Building.grid_cell % GRID_COLUMNS // span).label("cluster_column")
+    area = rectangle_filter(min_lat, max_lat, min_lon, max_lon)
+
+    result = await db.execute(
+        select(
+            cluster_row,
+            cluster_column,
+            func.count(Organization.id).label("organizations"),
+            func.count(func.distinct(Building.id)).label("buildings"),
+            func.avg(Building.latitude).label("latitude"),
+            func.avg(Building.longitude).label("longitude"),
+        )
+        .join(Organization, Organization.building_id == Building.id)
+        .where(area)
+        .group_by(cluster_row, cluster_column)
+        .order_by(cluster_row, cluster_column)
+    )
+    rows = result.all()
+
+    activities = defaultdict(list)
+    if with_activities and rows:
+        # Every activity rolls up to its root, an organization counts once per root
+        root = Activity.__table__.alias("root")
+        result = await db.execute(
+            select(
+                cluster_row,
+                cluster_column,
+                activity_closure.c.ancestor_id,
+                func.count(func.distinct(Organization.id)),
+            )
+            .join(Organization, Organization.building_id == Building.id)
+            .join(organization_activity, organization_activity.c.organization_id == Organization.id)
+            .join(activity_closure, activity_closure.c.descendant_id == organization_activity.c.activity_id)
+            .join(root, (root.c.id == activity_closure.c.ancestor_id) & root.c.parent_id.is_(None))
+            .where(area)
+            .group_by(cluster_row, cluster_column, activity_closure.c.ancestor_id)
+            .order_by(cluster_row, cluster_column, activity_closure.c.ancestor_id)
+        )
+        for row, column, activity_id, count in result:
+            activities[(row, column)].append({"id": activity_id, "count": count})
+
+    return [
+        {
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "organizations": row.organizations,
+            "buildings": row.buildings,
+            "activities": activities.get((row.cluster_row, row.cluster_column), []) if with_activities else None,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,368 @@
+"""
+In-memory snapshot of the directory, answering the read endpoints without the database.
+
+With `SNAPSHOT_ENABLED`, the buildings, organizations and activities are
+loaded into an immutable `DirectorySnapshot`: `__slots__` records indexed by
+ID, the building coordinates in arrays sorted by latitude and a trigram index
+of the organization names. A background task rebuilds it after every data
+change and every `SNAPSHOT_MAX_AGE` seconds, then swaps the reference, so a
+read sees either the old snapshot or the new one, never a mix of both.
+
+A snapshot only answers while it holds the current data version, shared
+through the database by every process, see `app.db.versioning`: after any
+change, reads go back to the database until the rebuild completes. The
+dicts returned and the cursors have the shapes and order
+`app.services.projections` produces.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.db.models import Activity, Building, Organization, organization_activity
+from app.db.versioning import SELECT_DATA_VERSION, data_version
+from app.services.activity_tree import ActivityTreeSnapshot
+from app.utils.geo import bounding_box
+from app.utils.math import within_radius
+from app.utils.pagination import decode_cursor, paginate
+
+logger = logging.getLogger(__name__)
+
+Page = Tuple[List[Dict[str, Any]], Optional[str]]
+
+
+class BuildingRecord:
+    __slots__ = ("id", "address", "latitude", "longitude", "organizations")
+
+    def __init__(self, id: int, address: str, latitude: float, longitude: float):
+        self.id = id
+        self.address = address
+        self.latitude = latitude
+        self.longitude = longitude
+        # The organizations of the building, by ID
+        self.organizations: Tuple["OrganizationRecord", ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "address": self.address, "latitude": self.latitude, "longitude": self.longitude}
+
+
+class OrganizationRecord:
+    __slots__ = ("id", "name", "phone_numbers", "building", "activities")
+
+    def __init__(self, id: int, name: str, phone_numbers: Sequence[str], building: BuildingRecord):
+        self.id = id
+        self.name = name
+        self.phone_numbers = tuple(phone_numbers)
+        self.building = building
+        # The (ID, name) pairs of the organization's activities, by ID
+        self.activities: Tuple[Tuple[int, str], ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "phone_numbers": list(self.phone_numbers),
+            "activities": [{"id": activity_id, "name": name} for activity_id, name in self.activities],
+        }
+
+    def to_dict_with_building(self) -> Dict[str, Any]:
+        payload = self.to_dict()
+        payload["building"] = self.building.to_dict()
+        return payload
+
+
+def _building_to_dict_with_organizations(building: BuildingRecord) -> Dict[str, Any]:
+    payload = building.to_dict()
+    payload["organizations"] = [organization.to_dict() for organization in building.organizations]
+    return payload
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+class DirectorySnapshot:
+    """
+    Immutable view of the whole directory.
+
+    Every lookup is answered from memory: organizations and buildings by ID
+    from dicts, areas from the coordinate arrays, names from the trigram
+    index and activities from the activity tree, so a read costs no I/O.
+    """
+
+    __slots__ = (
+        "version",
+        "built_at",
+        "activity_tree",
+        "_buildings",
+        "_organizations",
+        "_organizations_by_activity",
+        "_building_ids",
+        "_latitudes",
+        "_longitudes",
+        "_by_name",
+        "_name_keys",
+        "_folded_names",
+        "_name_trigrams",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        activities: Iterable[Tuple[int, str, Optional[int]]],
+        buildings: Iterable[Tuple[int, str, float, float]],
+        organizations: Iterable[Tuple[int, str, Sequence[str], int]],
+        links: Iterable[Tuple[int, int]],
+    ):
+        """
+        Index the rows of the directory.
+
+        Args:
+            version (int): The data version the rows were read at.
+            activities (Iterable[Tuple[int, str, Optional[int]]]): The ID, name and parent ID of every activity.
+            buildings (Iterable[Tuple[int, str, float, float]]): The ID, address, latitude and longitude of every building.
+            organizations (Iterable[Tuple[int, str, Sequence[str], int]]): The ID, name, phone numbers and building ID of every organization.
+            links (Iterable[Tuple[int, int]]): The organization and activity IDs of every organization activity.
+        """
+        self.version = version
+        self.built_at = time.monotonic()
+
+        activities = list(activities)
+        activity_names = {activity_id: name for activity_id, name, _ in activities}
+        self.activity_tree = ActivityTreeSnapshot(
+            version, ((activity_id, parent_id) for activity_id, _, parent_id in activities)
+        )
+
+        self._buildings: Dict[int, BuildingRecord] = {row[0]: BuildingRecord(*row) for row in buildings}
+        self._organizations: Dict[int, OrganizationRecord] = {}
+        organizations_by_building: Dict[int, List[OrganizationRecord]] = defaultdict(list)
+        for organization_id, name, phone_numbers, building_id in sorted(organizations, key=lambda row: row[0]):
+            building = self._buildings.get(building_id)
+            if building is None:
+                continue
+            organization = OrganizationRecord(organization_id, name, phone_numbers, building)
+            self._organizations[organization_id] = organization
+            organizations_by_building[building_id].append(organization)
+        for building_id, building_organizations in organizations_by_building.items():
+            self._buildings[building_id].organizations = tuple(building_organizations)
+
+        activities_by_organization: Dict[int, List[int]] = defaultdict(list)
+        organizations_by_activity: Dict[int, List[int]] = defaultdict(list)
+        for organization_id, activity_id in links:
+            if organization_id in self._organizations and activity_id in activity_names:
+                activities_by_organization[organization_id].append(activity_id)
+                organizations_by_activity[activity_id].append(organization_id)
+        for organization_id, activity_ids in activities_by_organization.items():
+            self._organizations[organization_id].activities = tuple(
+                (activity_id, activity_names[activity_id]) for activity_id in sorted(activity_ids)
+            )
+        self._organizations_by_activity: Dict[int, Tuple[int, ...]] = {
+            activity_id: tuple(organization_ids) for activity_id, organization_ids in organizations_by_activity.items()
+        }
+
+        # Parallel arrays of the buildings sorted by latitude, an area is a slice of them
+        by_latitude = sorted(self._buildings.values(), key=lambda building: building.latitude)
+        self._building_ids = array("q", (building.id for building in by_latitude))
+        self._latitudes = array("d", (building.latitude for building in by_latitude))
+        self._longitudes = array("d", (building.longitude for building in by_latitude))
+
+        # The organizations by (name, ID), the order of the name search pages: names
+        # compare by code point, like the database does, see `name_order`
+        self._by_name = sorted(self._organizations.values(), key=lambda organization: (organization.name, organization.id))
+        self._name_keys = [(organization.name, organization.id) for organization in self._by_name]
+        self._folded_names = [organization.name.lower() for organization in self._by_name]
+        # Positions in `_by_name` of the names containing each trigram, ascending
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for position, folded in enumerate(self._folded_names):
+            for trigram in _trigrams(folded):
+                postings[trigram].append(position)
+        self._name_trigrams = {trigram: array("I", positions) for trigram, positions in postings.items()}
+
+    def organization(self, organization_id: int) -> Optional[Dict[str, Any]]:
+        """Return an organization with its building, shaped like `OrganizationWithBuilding`, None if it doesn't exist."""
+        organization = self._organizations.get(organization_id)
+        return organization.to_dict_with_building() if organization is not None else None
+
+    def organizations(self, organization_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Return the organizations found among `organization_ids` with their buildings, in the same order."""
+        return [
+            self._organizations[organization_id].to_dict_with_building()
+            for organization_id in organization_ids
+            if organization_id in self._organizations
+        ]
+
+    def building(self, building_id: int) -> Optional[Dict[str, Any]]:
+        """Return a building with its organizations, shaped like `BuildingWithOrganizationsResponse`, None if it doesn't exist."""
+        building = self._buildings.get(building_id)
+        return _building_to_dict_with_organizations(building) if building is not None else None
+
+    def search_organizations_by_name(self, name: str, limit: int, cursor: Optional[str] = None) -> Page:
+        """Return a page of the organizations whose name contains `name`, case-insensitive, by name and ID."""
+        start = bisect_right(self._name_keys, decode_cursor(cursor, (str, int))) if cursor is not None else 0
+        folded = name.lower()
+        if len(folded) >= 3:
+            # Only the names containing the rarest trigram of `name` can contain all of it
+            postings = [self._name_trigrams.get(trigram) for trigram in _trigrams(folded)]
+            if any(positions is None for positions in postings):
+                return [], None
+            candidates = min(postings, key=len)
+            candidates = candidates[bisect_left(candidates, start):]
+        else:
+            candidates = range(start, len(self._by_name))
+
+        matches = []
+        for position in candidates:
+            if folded in self._folded_names[position]:
+                matches.append(self._by_name[position])
+                if len(matches) > limit:
+                    break
+        organizations, next_cursor = paginate(matches, limit, lambda organization: (organization.name, organization.id))
+        return [organization.to_dict_with_building() for organization in organizations], next_cursor
+
+    def search_organizations_by_activity(
+        self, activity_id: int, depth: Optional[int], limit: int, cursor: Optional[str] = None
+    ) -> Page:
+        """Return a page of the organizations of an activity and its descendants up to `depth` levels below it, by ID."""
+        organization_ids = set()
+        for descendant_id in self.activity_tree.descendant_ids(activity_id, depth):
+            organization_ids.update(self._organizations_by_activity.get(descendant_id, ()))
+        if cursor is not None:
+            after_id = decode_cursor(cursor, (int,))[0]
+            organization_ids = [organization_id for organization_id in organization_ids if organization_id > after_id]
+        page, next_cursor = paginate(heapq.nsmallest(limit + 1, organization_ids), limit, lambda organization_id: (organization_id,))
+        return [self._organizations[organization_id].to_dict() for organization_id in page], next_cursor
+
+    def _positions_between(self, min_lat: float, max_lat: float) -> range:
+        return range(bisect_left(self._latitudes, min_lat), bisect_right(self._latitudes, max_lat))
+
+    def _ids_in_rectangle(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> List[int]:
+        longitudes, building_ids = self._longitudes, self._building_ids
+        return [
+            building_ids[position]
+            for position in self._positions_between(min_lat, max_lat)
+            if min_lon <= longitudes[position] <= max_lon
+        ]
+
+    def _page_of_buildings(self, building_ids: Iterable[int], limit: int, cursor: Optional[str]) -> Page:
+        if cursor is not None:
+            after_id = decode_cursor(cursor, (int,))[0]
+            building_ids = [building_id for building_id in building_ids if building_id > after_id]
+        page, next_cursor = paginate(heapq.nsmallest(limit + 1, building_ids), limit, lambda building_id: (building_id,))
+        return [_building_to_dict_with_organizations(self._buildings[building_id]) for building_id in page], next_cursor
+
+    def buildings_in_circular_area(
+        self, latitude: float, longitude: float, radius: float, limit: int, cursor: Optional[str] = None
+    ) -> Page:
+        """Return a page of the buildings within a circular area with their organizations, by ID."""
+        min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius)
+        longitudes = self._longitudes
+        positions = [
+            position
+            for position in self._positions_between(min_lat, max_lat)
+            if any(west <= longitudes[position] <= east for west, east in lon_ranges)
+        ]
+        # The same exact filter as the database path, so both agree on the edge of the circle
+        mask = within_radius(
+            latitude, longitude, [self._latitudes[position] for position in positions],
+            [longitudes[position] for position in positions], radius,
+        )
+        building_ids = [self._building_ids[position] for position, inside in zip(positions, mask) if inside]
+        return self._page_of_buildings(building_ids, limit, cursor)
+
+    def buildings_in_rectangular_area(
+        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float, limit: int, cursor: Optional[str] = None
+    ) -> Page:
+        """Return a page of the buildings within a rectangular area with their organizations, by ID."""
+        return self._page_of_buildings(self._ids_in_rectangle(min_lat, max_lat, min_lon, max_lon), limit, cursor)
+
+    def iter_buildings_in_rectangular_area(
+        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float, batch_size: int
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield every building within a rectangular area with its organizations, by ID, `batch_size` at a time."""
+        building_ids = sorted(self._ids_in_rectangle(min_lat, max_lat, min_lon, max_lon))
+        for start in range(0, len(building_ids), batch_size):
+            yield [
+                _building_to_dict_with_organizations(self._buildings[building_id])
+                for building_id in building_ids[start:start + batch_size]
+            ]
+
+
+async def load_directory_snapshot(db: AsyncSession) -> DirectorySnapshot:
+    """Read the whole directory and index it, the indexing runs in a worker thread to keep the event loop responsive."""
+    # On Postgres every read of the transaction sees the data as of its first one
+    if db.bind.dialect.name == "postgresql":
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    # Read the version first, in the same transaction: elsewhere a change committed
+    # during the load is stamped with an older version, which makes the snapshot stale
+    version = await db.scalar(SELECT_DATA_VERSION) or 0
+    activities = (await db.execute(select(Activity.id, Activity.name, Activity.parent_id))).all()
+    buildings = (
+        await db.execute(select(Building.id, Building.address, Building.latitude, Building.longitude))
+    ).all()
+    organizations = (
+        await db.execute(select(Organization.id, Organization.name, Organization.phone_numbers, Organization.building_id))
+    ).all()
+    links = (
+        await db.execute(select(organization_activity.c.organization_id, organization_activity.c.activity_id))
+    ).all()
+    return await asyncio.to_thread(DirectorySnapshot, version, activities, buildings, organizations, links)
+
+
+class DirectorySnapshotCache:
+    """
+    Holder of the current directory snapshot.
+
+    The snapshot is replaced as a whole by `refresh`, readers take the
+    reference once per lookup and keep using it even if it is swapped
+    meanwhile.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[DirectorySnapshot] = None
+
+    @property
+    def snapshot(self) -> Optional[DirectorySnapshot]:
+        """The last snapshot built, fresh or not."""
+        return self._snapshot
+
+    def current(self) -> Optional[DirectorySnapshot]:
+        """Return the snapshot if it holds the current data version, None to read from the database."""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != data_version.value:
+            return None
+        return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    async def refresh(self, session_factory: Callable[[], AsyncSession]) -> DirectorySnapshot:
+        """Build a new snapshot from a session of `session_factory` and swap it in."""
+        started = time.perf_counter()
+        async with session_factory() as db:
+            snapshot = await load_directory_snapshot(db)
+        self._snapshot = snapshot
+        logger.info(f"Built the directory snapshot v{snapshot.version} in {time.perf_counter() - started:.3f}s")
+        return snapshot
+
+    async def keep_fresh(self, session_factory: Callable[[], AsyncSession], max_age: float, interval: float) -> None:
+        """Rebuild the snapshot after each data change and when it is older than `max_age`, until cancelled."""
+        while True:
+            snapshot = self._snapshot
+            if (
+                snapshot is None
+                or snapshot.version != data_version.value
+                or time.monotonic() - snapshot.built_at >= max_age
+            ):
+                try:
+                    await self.refresh(session_factory)
+                except Exception:
+                    logger.exception("Failed to build the directory snapshot")
+            await asyncio.sleep(interval)
+
+
+directory_snapshot = DirectorySnapshotCache()
@@ -0,0 +1,126 @@
+"""
+Query criteria shared by the ORM and Core read paths of the organization service.
+"""
+from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql.expression import and_, literal_column, or_
+from app.db.models import Building, Organization, organizations_name_fts
+from app.utils.geo import bounding_box, candidate_grid_ranges, tile_bounds
+from app.utils.math import within_radius
+from app.utils.pagination import decode_cursor
+
+def box_filter(min_lat: float, max_lat: float, lon_ranges: List[Tuple[float, float]]):
+    """Build a WHERE clause matching buildings inside a lat/lon box."""
+    latitude_filter = Building.latitude.between(min_lat, max_lat)
+    if lon_ranges == [(-180.0, 180.0)]:
+        return latitude_filter
+    # Two ranges when the box crosses the antimeridian
+    return and_(
+        latitude_filter,
+        or_(*(Building.longitude.between(west, east) for west, east in lon_ranges)),
+    )
+
+def rectangle_filter(min_lat: float, max_lat: float, min_lon: float, max_lon: float):
+    """Build a WHERE clause matching buildings inside a rectangle."""
+    return (
+        (Building.latitude >= min_lat) &
+        (Building.latitude <= max_lat) &
+        (Building.longitude >= min_lon) &
+        (Building.longitude <= max_lon)
+    )
+
+def tile_filter(zoom: int, x: int, y: int):
+    """
+    Build a WHERE clause matching buildings inside a Web Mercator map tile.
+
+    Tiles are half-open, south and west edges included, so a building on the
+    edge between two tiles belongs to exactly one of them. The north and east
+    edges of the map stay closed.
+    """
+    min_lat, max_lat, min_lon, max_lon = tile_bounds(zoom, x, y)
+    north = Building.latitude <= max_lat if y == 0 else Building.latitude < max_lat
+    east = Building.longitude <= max_lon if x == 2 ** zoom - 1 else Building.longitude < max_lon
+    return (Building.latitude >= min_lat) & north & (Building.longitude >= min_lon) & east
+
+def name_filter(db: AsyncSession, name: str):
+    """
+    Build a WHERE clause matching organizations whose name contains `name`, case-insensitive.
+
+    Postgres answers `ILIKE '%...%'` from its trigram index. SQLite goes through
+    the FTS5 trigram side table instead, which needs at least three characters.
+    """
+    if db.bind.dialect.name == "sqlite" and len(name) >= 3:
+        # A quoted FTS5 phrase, matched as a substring by the trigram tokenizer
+        phrase = '"' + name.replace('"', '""') + '"'
+        return Organization.id.in_(
+            select(organizations_name_fts.c.rowid)
+            .where(literal_column("organizations_name_fts").op("MATCH")(phrase))
+        )
+    return Organization.name.ilike(f"%{name}%")
+
+def name_order(db: AsyncSession):
+    """
+    Build the organization name expression the name search is ordered and paged by.
+
+    Names are compared by code point, the order of the in-memory directory
+    snapshot, so a cursor issued by either read path pages the other one
+    correctly. SQLite compares strings that way already, Postgres would use
+    the locale-aware collation of the column.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return Organization.name.collate("C")
+    return Organization.name
+
+async def find_building_ids_in_circle(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius: float,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> List[int]:
+    """
+    Find the IDs of the buildings within a circle, ordered, up to `limit + 1` of them after the cursor.
+
+    Candidates are selected by the circle's bounding box and grid cells, then
+    filtered by their exact distance. Only their coordinates are fetched, the
+    callers load the page's buildings afterwards.
+    """
+    query = (
+        select(Building.id, Building.latitude, Building.longitude)
+        .where(box_filter(*bounding_box(latitude, longitude, radius)))
+        .order_by(Building.id)
+    )
+
+    # Only touch the grid cells the circle can reach
+    cell_ranges = candidate_grid_ranges(latitude, longitude, radius)
+    if cell_ranges is not None:
+        query = query.where(
+            or_(*(Building.grid_cell.between(first, last) for first, last in cell_ranges))
+        )
+
+    # The exact filter runs on the candidates, so keep fetching batches of
+    # them until the page is full or they run out
+    after_id = decode_cursor(cursor, (int,))[0] if cursor is not None else None
+    batch_size = max(2 * (limit + 1), 100)
+    building_ids: List[int] = []
+    while len(building_ids) <= limit:
+        batch_query = query.limit(batch_size)
+        if after_id is not None:
+            batch_query = batch_query.where(Building.id > after_id)
+        rows = (await db.execute(batch_query)).all()
+        if not rows:
+            break
+
+        # Filter the candidate buildings based on the exact circular area in one batch
+        mask = within_radius(
+            latitude, longitude, [row.latitude for row in rows], [row.longitude for row in rows], radius
+        )
+        building_ids.extend(row.id for row, inside in zip(rows, mask) if inside)
+
+        if len(rows) < batch_size:
+            break
+        after_id = rows[-1].id
+
+    return building_ids[:limit + 1]
@@ -0,0 +1,37 @@
+"""
+Relationship loading profiles of the read endpoints.
+
+Each profile eagerly loads exactly what the endpoint's response schema
+serializes, with one SELECT ... IN query per relationship instead of
+joins that multiply rows, and raises on any other relationship access so
+an accidental lazy load fails loudly instead of turning into an N+1.
+"""
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from app.db.models import Building, Organization
+
+# OrganizationBase: the organization with its activities
+ORGANIZATION_WITH_ACTIVITIES = (
+    selectinload(Organization.activities).raiseload("*"),
+    raiseload("*"),
+)
+
+# OrganizationBase, fetched in a single statement for paginated searches
+# where the page is small and rows per organization are few
+ORGANIZATION_WITH_ACTIVITIES_JOINED = (
+    joinedload(Organization.activities).raiseload("*"),
+    raiseload("*"),
+)
+
+# OrganizationWithBuilding: many-to-one building joined, activities batched
+ORGANIZATION_WITH_BUILDING = (
+    joinedload(Organization.building).raiseload("*"),
+    selectinload(Organization.activities).raiseload("*"),
+    raiseload("*"),
+)
+
+# BuildingWithOrganizationsResponse: organizations and their activities batched
+BUILDING_WITH_ORGANIZATIONS = (
+    selectinload(Building.organizations).selectinload(Organization.activities).raiseload("*"),
+    selectinload(Building.organizations).raiseload("*"),
+    raiseload("*"),
+)
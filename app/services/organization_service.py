@@ -1,10 +1,15 @@
+import heapq
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from sqlalchemy.sql.expression import and_
-from typing import List, Optional
+from sqlalchemy.orm import contains_eager, raiseload
+from sqlalchemy.sql.expression import tuple_
+from typing import List, Optional, Tuple
 from app.db.models import Organization, Building
-from app.utils.math import haversine
+from app.services.filters import box_filter, find_building_ids_in_circle, name_filter, name_order, rectangle_filter
+from app.services.loaders import BUILDING_WITH_ORGANIZATIONS, ORGANIZATION_WITH_BUILDING
+from app.utils.geo import GRID_CELL_SIZE, min_distance_outside_square_box, square_box
+from app.utils.math import haversine_many
+from app.utils.pagination import decode_cursor, paginate
 
 async def get_organization_by_id(db: AsyncSession, organization_id: int) -> Optional[Organization]:
     """Fetch an organization and its associated building by its ID.
@@ -18,64 +23,104 @@ async def get_organization_by_id(db: AsyncSession, organization_id: int) -> Opti
     """
     result = await db.execute(
         select(Organization)
-        .options(
-            joinedload(Organization.building), 
-        )
+        .options(*ORGANIZATION_WITH_BUILDING)
         .where(Organization.id == organization_id) 
     )
     return result.unique().scalar_one_or_none()
 
-async def search_organizations_by_name(db: AsyncSession, name: str) -> List[Organization]: 
+async def get_organizations_by_ids(db: AsyncSession, organization_ids: List[int]) -> List[Organization]:
+    """Fetch organizations and their associated buildings by their IDs.
+
+    Args:
+        db (AsyncSession): The database session.
+        organization_ids (List[int]): The IDs of the organizations to fetch.
+
+    Returns:
+        List[Organization]: The organizations found, in no particular order.
+    """
+    result = await db.execute(
+        select(Organization)
+        .options(*ORGANIZATION_WITH_BUILDING)
+        .where(Organization.id.in_(organization_ids))
+    )
+    return result.unique().scalars().all()
+
+async def search_organizations_by_name(
+    db: AsyncSession,
+    name: str,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Organization], Optional[str]]:
     """
     Search for organizations by their name, including their associated building.
 
+    Results are ordered by `(name, id)` and paginated with a keyset cursor.
+
     Args:
         db (AsyncSession): The database session.
         name (str): The name to search for, case-insensitive.
+        limit (int): The maximum number of organizations to return.
+        cursor (Optional[str]): The cursor of the page to fetch, None for the first page.
 
     Returns:
-        List[Organization]: A list of organizations matching the search criteria.
+        Tuple[List[Organization], Optional[str]]: A page of organizations matching the search criteria and the cursor of the next page.
     """
-    result = await db.execute(
+    query = (
         select(Organization)
-        .options(
-            joinedload(Organization.building),
+        .options(*ORGANIZATION_WITH_BUILDING)
+        .where(name_filter(db, name))  # Case-insensitive search
+        .order_by(name_order(db), Organization.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(
+            tuple_(name_order(db), Organization.id) > tuple_(*decode_cursor(cursor, (str, int)))
         )
-        .where(Organization.name.ilike(f"%{name}%"))  # Case-insensitive search
+    result = await db.execute(query)
+    return paginate(
+        result.unique().scalars().all(), limit, lambda organization: (organization.name, organization.id)
     )
-    return result.unique().scalars().all()
 
 async def get_buildings_in_circular_area(
     db: AsyncSession,
     latitude: float,
     longitude: float,
     radius: float,
-) -> List[Building]:
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Building], Optional[str]]:
     """
     Fetch all buildings within a given circular area.
 
+    Results are ordered by ID and paginated with a keyset cursor.
+
     Args:
         db (AsyncSession): The database session.
         latitude (float): The latitude of the center point.
         longitude (float): The longitude of the center point.
         radius (float): The radius in kilometers.
+        limit (int): The maximum number of buildings to return.
+        cursor (Optional[str]): The cursor of the page to fetch, None for the first page.
 
     Returns:
-        List[Building]: A list of buildings within the circular area, including their associated organizations.
+        Tuple[List[Building], Optional[str]]: A page of buildings within the circular area, including their associated organizations, and the cursor of the next page.
     """
-    # Fetch all buildings with their associated organizations
-    query = select(Building).options(joinedload(Building.organizations))
-    result = await db.execute(query)
-    buildings = result.unique().scalars().all()
-
-    # Filter the buildings based on the circular area
-    filtered_buildings = [
-        building
-        for building in buildings
-        if haversine(latitude, longitude, building.latitude, building.longitude) <= radius
-    ]
+    building_ids, next_cursor = paginate(
+        await find_building_ids_in_circle(db, latitude, longitude, radius, limit, cursor),
+        limit,
+        lambda building_id: (building_id,),
+    )
+    if not building_ids:
+        return [], None
 
-    return filtered_buildings
+    # Load the page's buildings with their associated organizations
+    result = await db.execute(
+        select(Building)
+        .options(*BUILDING_WITH_ORGANIZATIONS)
+        .where(Building.id.in_(building_ids))
+        .order_by(Building.id)
+    )
+    return result.unique().scalars().all(), next_cursor
 
 async def get_buildings_in_rectangular_area(
     db: AsyncSession,
@@ -83,31 +128,112 @@ async def get_buildings_in_rectangular_area(
     max_lat: float,
     min_lon: float,
     max_lon: float,
-) -> List[Building]:
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Building], Optional[str]]:
     """
     Fetch all buildings within a given rectangular area.
 
+    Results are ordered by ID and paginated with a keyset cursor.
+
     Args:
         db (AsyncSession): The database session.
         min_lat (float): The minimum latitude of the rectangular area.
         max_lat (float): The maximum latitude of the rectangular area.
         min_lon (float): The minimum longitude of the rectangular area.
         max_lon (float): The maximum longitude of the rectangular area.
+        limit (int): The maximum number of buildings to return.
+        cursor (Optional[str]): The cursor of the page to fetch, None for the first page.
 
     Returns:
-        List[Building]: A list of buildings within the rectangular area, including their associated organizations.
+        Tuple[List[Building], Optional[str]]: A page of buildings within the rectangular area, including their associated organizations, and the cursor of the next page.
     """
     # Fetch all buildings with their associated organizations
     query = (
         select(Building)
-        .options(joinedload(Building.organizations))
+        .options(*BUILDING_WITH_ORGANIZATIONS)
         # Filter the buildings based on the rectangular area
-        .where(
-            (Building.latitude >= min_lat) &
-            (Building.latitude <= max_lat) &
-            (Building.longitude >= min_lon) &
-            (Building.longitude <= max_lon)
-        )
+        .where(rectangle_filter(min_lat, max_lat, min_lon, max_lon))
+        .order_by(Building.id)
+        .limit(limit + 1)
     )
+    if cursor is not None:
+        query = query.where(Building.id > decode_cursor(cursor, (int,))[0])
     result = await db.execute(query)
-    return result.unique().scalars().all()
+    return paginate(result.unique().scalars().all(), limit, lambda building: (building.id,))
+
+async def get_nearest_organizations(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    k: int,
+) -> List[Tuple[Organization, float]]:
+    """
+    Fetch the k organizations closest to a point.
+
+    The search scans square rings of doubling size around the point and stops
+    as soon as the k-th best distance is no larger than the distance to
+    anything outside the scanned area, keeping only the k best candidates in a
+    bounded heap.
+
+    Args:
+        db (AsyncSession): The database session.
+        latitude (float): The latitude of the point.
+        longitude (float): The longitude of the point.
+        k (int): The number of organizations to return.
+
+    Returns:
+        List[Tuple[Organization, float]]: The organizations with their associated
+        building and their distance in kilometers, closest first.
+    """
+    # Max-heap of the k best candidates as (-distance, -id, organization)
+    nearest: List[Tuple[float, int, Organization]] = []
+    scanned = None
+    half_size = GRID_CELL_SIZE
+
+    while True:
+        box = box_filter(*square_box(latitude, longitude, half_size))
+        query = (
+            select(Organization)
+            .join(Organization.building)
+            # Activities are only loaded for the winners, once the search is over
+            .options(contains_eager(Organization.building).raiseload("*"), raiseload("*"))
+            .where(box)
+        )
+        if scanned is not None:
+            # Only the ring between the previous box and this one
+            query = query.where(~scanned)
+        result = await db.execute(query)
+        organizations = result.unique().scalars().all()
+
+        distances = haversine_many(
+            latitude,
+            longitude,
+            [organization.building.latitude for organization in organizations],
+            [organization.building.longitude for organization in organizations],
+        )
+        for organization, distance in zip(organizations, distances):
+            candidate = (-float(distance), -organization.id, organization)
+            if len(nearest) < k:
+                heapq.heappush(nearest, candidate)
+            elif candidate[:2] > nearest[0][:2]:
+                heapq.heapreplace(nearest, candidate)
+
+        # Stop once nothing outside the scanned area can beat the k-th result
+        if len(nearest) == k and -nearest[0][0] <= min_distance_outside_square_box(latitude, longitude, half_size):
+            break
+        if half_size >= 180:
+            break
+
+        scanned = box
+        half_size *= 2
+
+    nearest.sort(reverse=True)
+    if nearest:
+        await db.execute(
+            select(Organization)
+            .where(Organization.id.in_([organization.id for _, _, organization in nearest]))
+            .options(*ORGANIZATION_WITH_BUILDING)
+            .execution_options(populate_existing=True)
+        )
+    return [(organization, -negative_distance) for negative_distance, _, organization in nearest]
@@ -0,0 +1,253 @@
+"""
+Core read path of the hot organization endpoints.
+
+Instead of loading ORM entities into the identity map, these functions select
+exactly the columns the response schemas need as Core rows and assemble the
+nested JSON-ready dicts themselves, one statement per level of nesting. The
+dicts have the shape the serializers of `app.schemas.serializers` produce.
+
+While a fresh directory snapshot is available, see
+`app.services.directory_snapshot`, they answer from it without the database.
+"""
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql.expression import tuple_
+from app.db.models import Activity, Building, Organization, organization_activity
+from app.services.directory_snapshot import directory_snapshot
+from app.services.filters import find_building_ids_in_circle, name_filter, name_order, rectangle_filter
+from app.utils.pagination import decode_cursor, paginate
+
+ORGANIZATION_COLUMNS = (Organization.id, Organization.name, Organization.phone_numbers)
+BUILDING_COLUMNS = (Building.id, Building.address, Building.latitude, Building.longitude)
+# The building columns of an organization row, labeled apart from its own
+ORGANIZATION_BUILDING_COLUMNS = (
+    Building.id.label("building_id"),
+    Building.address.label("building_address"),
+    Building.latitude.label("building_latitude"),
+    Building.longitude.label("building_longitude"),
+)
+
+async def _activities_by_organization(db: AsyncSession, organization_ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Fetch the activities of the organizations, grouped by organization ID."""
+    activities = defaultdict(list)
+    if not organization_ids:
+        return activities
+    result = await db.execute(
+        select(organization_activity.c.organization_id, Activity.id, Activity.name)
+        .join(Activity, Activity.id == organization_activity.c.activity_id)
+        .where(organization_activity.c.organization_id.in_(organization_ids))
+        .order_by(organization_activity.c.organization_id, Activity.id)
+    )
+    for organization_id, activity_id, name in result:
+        activities[organization_id].append({"id": activity_id, "name": name})
+    return activities
+
+async def _organizations_with_buildings(db: AsyncSession, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Assemble organization rows selected with their building columns."""
+    activities = await _activities_by_organization(db, [row.id for row in rows])
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "phone_numbers": row.phone_numbers,
+            "activities": activities.get(row.id, []),
+            "building": {
+                "id": row.building_id,
+                "address": row.building_address,
+                "latitude": row.building_latitude,
+                "longitude": row.building_longitude,
+            },
+        }
+        for row in rows
+    ]
+
+async def _buildings_with_organizations(db: AsyncSession, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Assemble building rows with their organizations and their activities."""
+    if not rows:
+        return []
+    result = await db.execute(
+        select(Organization.building_id, *ORGANIZATION_COLUMNS)
+        .where(Organization.building_id.in_([row.id for row in rows]))
+        .order_by(Organization.id)
+    )
+    organization_rows = result.all()
+    activities = await _activities_by_organization(db, [row.id for row in organization_rows])
+
+    organizations = defaultdict(list)
+    for row in organization_rows:
+        organizations[row.building_id].append({
+            "id": row.id,
+            "name": row.name,
+            "phone_numbers": row.phone_numbers,
+            "activities": activities.get(row.id, []),
+        })
+    return [
+        {
+            "id": row.id,
+            "address": row.address,
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "organizations": organizations.get(row.id, []),
+        }
+        for row in rows
+    ]
+
+async def fetch_organization_by_id(db: AsyncSession, organization_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Fetch an organization with its associated building by its ID, as a dict.
+
+    Args:
+        db (AsyncSession): The database session.
+        organization_id (int): The ID of the organization to fetch.
+
+    Returns:
+        Optional[Dict[str, Any]]: The organization shaped like `OrganizationWithBuilding`, None if it doesn't exist.
+    """
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        return snapshot.organization(organization_id)
+    result = await db.execute(
+        select(*ORGANIZATION_COLUMNS, *ORGANIZATION_BUILDING_COLUMNS)
+        .join(Building, Building.id == Organization.building_id)
+        .where(Organization.id == organization_id)
+    )
+    organizations = await _organizations_with_buildings(db, result.all())
+    return organizations[0] if organizations else None
+
+async def fetch_organizations_by_ids(db: AsyncSession, organization_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    """
+    Fetch organizations with their associated buildings by their IDs, as dicts, see `get_organizations_by_ids`.
+
+    Returns:
+        List[Dict[str, Any]]: The organizations found shaped like `OrganizationWithBuilding`, in no particular order.
+    """
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        return snapshot.organizations(organization_ids)
+    result = await db.execute(
+        select(*ORGANIZATION_COLUMNS, *ORGANIZATION_BUILDING_COLUMNS)
+        .join(Building, Building.id == Organization.building_id)
+        .where(Organization.id.in_(organization_ids))
+    )
+    return await _organizations_with_buildings(db, result.all())
+
+async def fetch_organizations_by_name(
+    db: AsyncSession,
+    name: str,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Search for organizations by their name, as dicts, see `search_organizations_by_name`.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: A page of organizations shaped like `OrganizationWithBuilding` and the cursor of the next page.
+    """
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        return snapshot.search_organizations_by_name(name, limit, cursor)
+    query = (
+        select(*ORGANIZATION_COLUMNS, *ORGANIZATION_BUILDING_COLUMNS)
+        .join(Building, Building.id == Organization.building_id)
+        .where(name_filter(db, name))
+        .order_by(name_order(db), Organization.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(
+            tuple_(name_order(db), Organization.id) > tuple_(*decode_cursor(cursor, (str, int)))
+        )
+    rows, next_cursor = paginate((await db.execute(query)).all(), limit, lambda row: (row.name, row.id))
+    return await _organizations_with_buildings(db, rows), next_cursor
+
+async def fetch_buildings_in_circular_area(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius: float,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch the buildings within a circular area, as dicts, see `get_buildings_in_circular_area`.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: A page of buildings shaped like `BuildingWithOrganizationsResponse` and the cursor of the next page.
+    """
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        return snapshot.buildings_in_circular_area(latitude, longitude, radius, limit, cursor)
+    building_ids, next_cursor = paginate(
+        await find_building_ids_in_circle(db, latitude, longitude, radius, limit, cursor),
+        limit,
+        lambda building_id: (building_id,),
+    )
+    if not building_ids:
+        return [], None
+    result = await db.execute(
+        select(*BUILDING_COLUMNS).where(Building.id.in_(building_ids)).order_by(Building.id)
+    )
+    return await _buildings_with_organizations(db, result.all()), next_cursor
+
+async def fetch_buildings_in_rectangular_area(
+    db: AsyncSession,
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch the buildings within a rectangular area, as dicts, see `get_buildings_in_rectangular_area`.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: A page of buildings shaped like `BuildingWithOrganizationsResponse` and the cursor of the next page.
+    """
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        return snapshot.buildings_in_rectangular_area(min_lat, max_lat, min_lon, max_lon, limit, cursor)
+    query = (
+        select(*BUILDING_COLUMNS)
+        .where(rectangle_filter(min_lat, max_lat, min_lon, max_lon))
+        .order_by(Building.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(Building.id > decode_cursor(cursor, (int,))[0])
+    rows, next_cursor = paginate((await db.execute(query)).all(), limit, lambda row: (row.id,))
+    return await _buildings_with_organizations(db, rows), next_cursor
+
+async def stream_buildings_in_rectangular_area(
+    db: AsyncSession,
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+    batch_size: int,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Stream every building within a rectangular area, as dicts, in batches.
+
+    The buildings are read through a server-side cursor `batch_size` rows at
+    a time and each batch is completed with its organizations before the next
+    one is fetched, so memory stays bounded by the batch size whatever the area.
+
+    Yields:
+        List[Dict[str, Any]]: The next buildings by ID, shaped like `BuildingWithOrganizationsResponse`.
+    """
+    snapshot = directory_snapshot.current()
+    if snapshot is not None:
+        for batch in snapshot.iter_buildings_in_rectangular_area(min_lat, max_lat, min_lon, max_lon, batch_size):
+            yield batch
+        return
+    result = await db.stream(
+        select(*BUILDING_COLUMNS)
+        .where(rectangle_filter(min_lat, max_lat, min_lon, max_lon))
+        .order_by(Building.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield await _buildings_with_organizations(db, rows)
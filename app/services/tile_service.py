@@ -0,0 +1,136 @@
+"""
+Map tiles of buildings, addressed like slippy map tiles.
+
+A tile lists the buildings inside a Web Mercator tile with their number of
+organizations, in one of two compact encodings:
+
+- `json`: `{"z": z, "x": x, "y": y, "buildings": [[id, latitude, longitude, organizations], ...]}`
+- `bin`: one little-endian record per building, an int64 ID, float32
+  latitude and longitude and a uint16 organization count, 18 bytes each.
+
+Rendered tiles are cached under the shared data version, see
+`app.db.versioning`, so any change to the directory, from any process,
+makes every cached tile stale at once.
+"""
+import asyncio
+import logging
+import struct
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
+import orjson
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.cache import MemoryCache
+from app.core.config import settings
+from app.db.models import Building, Organization
+from app.db.versioning import data_version
+from app.services.filters import tile_filter
+
+logger = logging.getLogger(__name__)
+
+TILE_MEDIA_TYPES = {"json": "application/json", "bin": "application/octet-stream"}
+# Wide enough for any ID the database can hold
+POINT = struct.Struct("<qffH")
+
+Tile = Tuple[int, int, int]
+
+tile_cache = MemoryCache(settings.TILE_CACHE_MAX_BYTES)
+
+
+def parse_tile(tile: str) -> Tile:
+    """Parse a `z/x/y` tile address."""
+    zoom, x, y = (int(part) for part in tile.split("/"))
+    return zoom, x, y
+
+
+async def fetch_tile_points(db: AsyncSession, zoom: int, x: int, y: int) -> List[Tuple[int, float, float, int]]:
+    """
+    Fetch the buildings inside a tile with their number of organizations.
+
+    Returns:
+        List[Tuple[int, float, float, int]]: The ID, latitude, longitude and organization count of every building, by ID.
+    """
+    result = await db.execute(
+        select(Building.id, Building.latitude, Building.longitude, func.count(Organization.id))
+        .outerjoin(Organization, Organization.building_id == Building.id)
+        .where(tile_filter(zoom, x, y))
+        .group_by(Building.id, Building.latitude, Building.longitude)
+        .order_by(Building.id)
+    )
+    return [tuple(row) for row in result]
+
+
+def encode_tile(zoom: int, x: int, y: int, points: Sequence[Tuple[int, float, float, int]], encoding: str) -> bytes:
+    """Encode the points of a tile in `encoding`, see the module documentation."""
+    if encoding == "bin":
+        # Counts beyond the uint16 range are clamped, the map only needs their order of magnitude
+        return b"".join(POINT.pack(point[0], point[1], point[2], min(point[3], 0xFFFF)) for point in points)
+    return orjson.dumps({"z": zoom, "x": x, "y": y, "buildings": points})
+
+
+def tile_key(version: int, zoom: int, x: int, y: int, encoding: str) -> str:
+    return f"v{version}:{zoom}/{x}/{y}.{encoding}"
+
+
+async def render_tiles(
+    open_session: Callable[[], Awaitable[AsyncSession]],
+    tiles: Iterable[Tile],
+    encodings: Sequence[str],
+    refresh: bool = False,
+) -> Dict[Tile, Dict[str, bytes]]:
+    """
+    Render tiles in every encoding of `encodings` and cache them.
+
+    Tiles are read with a single session opened on the first cache miss, so
+    tiles already cached cost no database access. With `refresh`, every tile
+    is rendered again, which restarts its time to live in the cache.
+
+    Returns:
+        Dict[Tile, Dict[str, bytes]]: The encoded tiles, by tile and encoding.
+    """
+    # Read before the query, a change committed meanwhile then only costs an extra render
+    version = data_version.value
+    rendered: Dict[Tile, Dict[str, bytes]] = {}
+    missing: List[Tile] = []
+    for tile in tiles:
+        if refresh:
+            missing.append(tile)
+            continue
+        cached = {encoding: await tile_cache.get(tile_key(version, *tile, encoding)) for encoding in encodings}
+        if all(body is not None for body in cached.values()):
+            rendered[tile] = cached
+        else:
+            missing.append(tile)
+
+    if missing:
+        async with await open_session() as db:
+            for tile in missing:
+                points = await fetch_tile_points(db, *tile)
+                rendered[tile] = {encoding: encode_tile(*tile, points, encoding) for encoding in encodings}
+                for encoding, body in rendered[tile].items():
+                    await tile_cache.set(tile_key(version, *tile, encoding), body, settings.TILE_CACHE_TTL)
+    return rendered
+
+
+async def keep_tiles_warm(
+    open_session: Callable[[], Awaitable[AsyncSession]], tiles: Sequence[Tile], interval: float
+) -> None:
+    """
+    Render `tiles` in every encoding, then again after each data change and
+    before they expire from the cache, until cancelled.
+    """
+    rendered_version = None
+    rendered_at = float("-inf")
+    while True:
+        # Half the time to live leaves plenty of checks to render them again in time
+        expiring = time.monotonic() - rendered_at >= settings.TILE_CACHE_TTL / 2
+        if data_version.value != rendered_version or expiring:
+            version = data_version.value
+            try:
+                await render_tiles(open_session, tiles, tuple(TILE_MEDIA_TYPES), refresh=expiring)
+                rendered_version = version
+                rendered_at = time.monotonic()
+            except Exception:
+                logger.exception("Failed to render the hot tiles")
+        await asyncio.sleep(interval)
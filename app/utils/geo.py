@@ -0,0 +1,199 @@
+from math import asin, atan, cos, degrees, floor, log, pi, radians, sin, sinh, sqrt, tan
+from typing import List, Optional, Tuple
+from app.utils.math import EARTH_RADIUS_KM
+
+# Size of a spatial grid cell in degrees. Changing it requires re-bucketing
+# every row of `buildings.grid_cell` (see the add_building_grid_cell migration).
+GRID_CELL_SIZE = 0.1
+GRID_ROWS = int(round(180 / GRID_CELL_SIZE))
+GRID_COLUMNS = int(round(360 / GRID_CELL_SIZE))
+
+# Above this many grid rows a cell prefilter stops paying off
+MAX_GRID_ROWS = 256
+
+# Tolerance added to bounding boxes so floating point noise never drops a
+# point lying exactly on the circle
+_BBOX_EPSILON = 1e-9
+
+
+def grid_row(latitude: float) -> int:
+    """Return the grid row index for a latitude."""
+    return min(int(floor((latitude + 90) / GRID_CELL_SIZE)), GRID_ROWS - 1)
+
+
+def grid_column(longitude: float) -> int:
+    """Return the grid column index for a longitude, wrapping 180 onto -180."""
+    return int(floor((longitude + 180) / GRID_CELL_SIZE)) % GRID_COLUMNS
+
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """Return the grid cell ID a coordinate falls into."""
+    return grid_row(latitude) * GRID_COLUMNS + grid_column(longitude)
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius: float
+) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Compute the lat/lon bounding box of a circle on the sphere.
+
+    Args:
+        latitude (float): The latitude of the center point.
+        longitude (float): The longitude of the center point.
+        radius (float): The radius in kilometers.
+
+    Returns:
+        Tuple[float, float, List[Tuple[float, float]]]: The minimum latitude, the
+        maximum latitude and the longitude ranges covered by the circle. A circle
+        crossing the antimeridian yields two longitude ranges, and a circle
+        containing a pole covers every longitude.
+    """
+    angular_radius = radius / EARTH_RADIUS_KM
+    lat = radians(latitude)
+    min_lat = lat - angular_radius
+    max_lat = lat + angular_radius
+
+    if min_lat <= -radians(90) or max_lat >= radians(90) or angular_radius >= radians(180):
+        # The circle contains a pole, so every meridian crosses it
+        return (
+            max(degrees(min_lat) - _BBOX_EPSILON, -90.0),
+            min(degrees(max_lat) + _BBOX_EPSILON, 90.0),
+            [(-180.0, 180.0)],
+        )
+
+    ratio = sin(angular_radius) / cos(lat)
+    if ratio >= 1:
+        return degrees(min_lat) - _BBOX_EPSILON, degrees(max_lat) + _BBOX_EPSILON, [(-180.0, 180.0)]
+
+    delta_lon = degrees(asin(ratio)) + _BBOX_EPSILON
+    west = longitude - delta_lon
+    east = longitude + delta_lon
+    if west < -180:
+        lon_ranges = [(west + 360, 180.0), (-180.0, east)]
+    elif east > 180:
+        lon_ranges = [(west, 180.0), (-180.0, east - 360)]
+    else:
+        lon_ranges = [(west, east)]
+
+    return degrees(min_lat) - _BBOX_EPSILON, degrees(max_lat) + _BBOX_EPSILON, lon_ranges
+
+
+def candidate_grid_ranges(
+    latitude: float, longitude: float, radius: float
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Compute the grid cells a circle can touch as inclusive ranges of cell IDs.
+
+    Every point within the circle falls into one of the returned ranges, so
+    filtering on them never drops a match.
+
+    Args:
+        latitude (float): The latitude of the center point.
+        longitude (float): The longitude of the center point.
+        radius (float): The radius in kilometers.
+
+    Returns:
+        Optional[List[Tuple[int, int]]]: Inclusive `(first, last)` cell ID ranges,
+        one or two per grid row, or None if the circle spans too many rows for
+        a cell prefilter to be selective.
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius)
+    first_row, last_row = grid_row(min_lat), grid_row(max_lat)
+    if last_row - first_row + 1 > MAX_GRID_ROWS:
+        return None
+
+    column_ranges = []
+    for west, east in lon_ranges:
+        first_column = grid_column(west)
+        # 180 wraps onto column 0, keep it at the right edge of the grid instead
+        last_column = GRID_COLUMNS - 1 if east >= 180 else grid_column(east)
+        column_ranges.append((first_column, last_column))
+
+    return [
+        (row * GRID_COLUMNS + first_column, row * GRID_COLUMNS + last_column)
+        for row in range(first_row, last_row + 1)
+        for first_column, last_column in column_ranges
+    ]
+
+
+def square_box(
+    latitude: float, longitude: float, half_size: float
+) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Compute a box of `half_size` degrees around a point, clamped at the poles.
+
+    Returns:
+        Tuple[float, float, List[Tuple[float, float]]]: The minimum latitude, the
+        maximum latitude and the longitude ranges of the box, split in two when
+        it crosses the antimeridian.
+    """
+    min_lat = max(latitude - half_size, -90.0)
+    max_lat = min(latitude + half_size, 90.0)
+    if half_size >= 180:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+
+    west = longitude - half_size
+    east = longitude + half_size
+    if west < -180:
+        return min_lat, max_lat, [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return min_lat, max_lat, [(west, 180.0), (-180.0, east - 360)]
+    return min_lat, max_lat, [(west, east)]
+
+
+def min_distance_outside_square_box(latitude: float, longitude: float, half_size: float) -> float:
+    """
+    Lower bound in kilometers of the distance to any point outside `square_box`.
+
+    A point outside the box either differs in latitude by more than
+    `half_size`, or lies within the latitude band but differs in longitude by
+    more than `half_size`.
+    """
+    if half_size >= 180:
+        return float("inf")
+
+    # The great-circle distance is never shorter than the latitude difference
+    latitude_bound = radians(half_size) * EARTH_RADIUS_KM
+
+    # hav(d) >= cos(lat1) * cos(lat2) * hav(dlon), and cos(lat2) is smallest at
+    # the band edge closest to a pole
+    band_edge = min(max(abs(latitude - half_size), abs(latitude + half_size)), 90.0)
+    hav_bound = cos(radians(latitude)) * cos(radians(band_edge)) * sin(radians(half_size) / 2) ** 2
+    longitude_bound = 2 * asin(sqrt(min(max(hav_bound, 0.0), 1.0))) * EARTH_RADIUS_KM
+
+    return min(latitude_bound, longitude_bound)
+
+
+def cluster_cell_span(zoom: int, cells_per_tile: int) -> int:
+    """
+    Return the side of the map clusters at a zoom level, in grid cells.
+
+    A web map tile at `zoom` spans 360 / 2**zoom degrees of longitude and is
+    split into `cells_per_tile` clusters per side. Clusters are whole blocks
+    of grid cells, so they never get finer than `GRID_CELL_SIZE`.
+    """
+    return max(1, round(360 / 2 ** zoom / cells_per_tile / GRID_CELL_SIZE))
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Return the area of a Web Mercator map tile, as used by slippy maps.
+
+    Returns:
+        Tuple[float, float, float, float]: The minimum latitude, maximum
+        latitude, minimum longitude and maximum longitude of the tile.
+    """
+    tiles = 2 ** zoom
+
+    def latitude(row: float) -> float:
+        return degrees(atan(sinh(pi * (1 - 2 * row / tiles))))
+
+    return latitude(y + 1), latitude(y), x / tiles * 360 - 180, (x + 1) / tiles * 360 - 180
+
+
+def tile_at(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    """Return the `(x, y)` of the Web Mercator tile containing a point at a zoom level."""
+    tiles = 2 ** zoom
+    x = int(floor((longitude + 180) / 360 * tiles))
+    y = int(floor((1 - log(tan(radians(latitude)) + 1 / cos(radians(latitude))) / pi) / 2 * tiles))
+    return min(max(x, 0), tiles - 1), min(max(y, 0), tiles - 1)
@@ -1,4 +1,13 @@
 from math import radians, cos, sin, asin, sqrt
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional, fall back to pure Python
+    np = None
+
+# Mean radius of Earth in kilometers
+EARTH_RADIUS_KM = 6371
 
 def haversine(lat1, lon1, lat2, lon2):
     """Calculate haversine distance between two points in kilometers."""
@@ -7,6 +16,53 @@ def haversine(lat1, lon1, lat2, lon2):
     dlon = lon2 - lon1
     a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
     c = 2 * asin(sqrt(a))
-    # Radius of Earth in kilometers
-    radius_of_earth = 6371  
-    return c * radius_of_earth
\ No newline at end of file
+    return c * EARTH_RADIUS_KM
+
+def haversine_many(lat: float, lon: float, latitudes: Sequence[float], longitudes: Sequence[float]):
+    """
+    Calculate haversine distances in kilometers from one point to many points.
+
+    Uses a single vectorized NumPy pass when NumPy is installed and a pure
+    Python loop otherwise.
+
+    Args:
+        lat (float): The latitude of the origin point.
+        lon (float): The longitude of the origin point.
+        latitudes (Sequence[float]): The latitudes of the target points.
+        longitudes (Sequence[float]): The longitudes of the target points.
+
+    Returns:
+        The distances as a NumPy array, or as a list without NumPy.
+    """
+    if np is None:
+        return _haversine_many_python(lat, lon, latitudes, longitudes)
+
+    lat1, lon1 = radians(lat), radians(lon)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    # Clip guards against rounding pushing `a` slightly above 1 for antipodes
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def within_radius(lat: float, lon: float, latitudes: Sequence[float], longitudes: Sequence[float], radius: float):
+    """
+    Build a mask of the points lying within `radius` kilometers of a point.
+
+    Returns:
+        A boolean NumPy array, or a list of booleans without NumPy.
+    """
+    distances = haversine_many(lat, lon, latitudes, longitudes)
+    if np is None:
+        return [distance <= radius for distance in distances]
+    return distances <= radius
+
+def _haversine_many_python(lat, lon, latitudes, longitudes):
+    """Pure Python fallback for `haversine_many`."""
+    lat1, lon1 = radians(lat), radians(lon)
+    cos_lat1 = cos(lat1)
+    distances = []
+    for lat2, lon2 in zip(latitudes, longitudes):
+        lat2, lon2 = radians(lat2), radians(lon2)
+        a = sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+        distances.append(2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0))))
+    return distances
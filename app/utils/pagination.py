@@ -0,0 +1,59 @@
+import base64
+import json
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Encode a `(sort key, id)` tuple into an opaque URL-safe cursor."""
+    payload = json.dumps(list(key), separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Tuple[type, ...]) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor.
+        types (Tuple[type, ...]): The expected type of each key component.
+
+    Returns:
+        Tuple[Any, ...]: The decoded key.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or doesn't match `types`.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+    if (
+        not isinstance(key, list)
+        or len(key) != len(types)
+        # bool is an int subclass, but never a valid key component
+        or any(isinstance(value, bool) or not isinstance(value, type_) for value, type_ in zip(key, types))
+    ):
+        raise InvalidCursorError("Invalid cursor")
+    return tuple(key)
+
+
+def paginate(rows: List[T], limit: int, key: Callable[[T], Sequence[Any]]) -> Tuple[List[T], Optional[str]]:
+    """
+    Trim rows fetched with `limit + 1` to a page and build the next cursor.
+
+    Returns:
+        Tuple[List[T], Optional[str]]: The page and the cursor of the next page,
+        or None if this is the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
@@ -0,0 +1,130 @@
+"""
+Deterministic synthetic directory data, in the input format of app.db.importer.
+
+Buildings are scattered around a list of cities, weighted by population,
+activities form a tree of the requested depth and fan-out, and every
+organization gets a building, a few phone numbers and a few activities.
+The same arguments and seed always produce the same files.
+
+Usage:
+    python -m benchmarks.datagen OUTPUT_DIR [--buildings 10000] [--organizations 30000] \\
+        [--activity-depth 3] [--activity-fanout 4] [--seed 0]
+"""
+import argparse
+import csv
+import math
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# name, latitude, longitude, relative weight, spread in km
+CITIES = [
+    ("Москва", 55.7558, 37.6173, 12.6, 25.0),
+    ("Санкт-Петербург", 59.9343, 30.3351, 5.4, 18.0),
+    ("Новосибирск", 55.0302, 82.9204, 1.6, 12.0),
+    ("Екатеринбург", 56.8389, 60.6057, 1.5, 12.0),
+    ("Казань", 55.7963, 49.1088, 1.3, 10.0),
+    ("Нижний Новгород", 56.3269, 44.0059, 1.2, 10.0),
+    ("Самара", 53.1959, 50.1002, 1.1, 10.0),
+    ("Владивосток", 43.1155, 131.8855, 0.6, 8.0),
+]
+STREETS = ["Ленина", "Мира", "Советская", "Гагарина", "Пушкина", "Садовая", "Лесная", "Невский пр."]
+ORGANIZATION_KINDS = ["ООО", "ЗАО", "ИП", "АО"]
+ORGANIZATION_WORDS = ["Рога", "Копыта", "Молоко", "АвтоМир", "Гастроном", "ТехСнаб", "Север", "Восток", "Плюс", "Сервис"]
+KM_PER_DEGREE = 111.32
+
+def generate_buildings(rng: random.Random, count: int) -> List[Dict[str, object]]:
+    weights = [city[3] for city in CITIES]
+    buildings = []
+    for building_id in range(1, count + 1):
+        city, latitude, longitude, _, spread = rng.choices(CITIES, weights)[0]
+        # Normal scatter around the center, in km converted to degrees
+        latitude = max(-90.0, min(90.0, latitude + rng.gauss(0, spread) / KM_PER_DEGREE))
+        longitude_scale = KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+        longitude = (longitude + rng.gauss(0, spread) / longitude_scale + 180) % 360 - 180
+        buildings.append({
+            "id": building_id,
+            "address": f"г. {city}, ул. {rng.choice(STREETS)} {rng.randint(1, 200)}",
+            "latitude": round(latitude, 6),
+            "longitude": round(longitude, 6),
+        })
+    return buildings
+
+def generate_activities(depth: int, fanout: int) -> List[Dict[str, object]]:
+    """Build `fanout` root activities, each with `fanout` children per level down to `depth` levels."""
+    activities = []
+    frontier: List[Tuple[Optional[int], str]] = [(None, "")]
+    for level in range(1, depth + 1):
+        next_frontier = []
+        for parent_id, prefix in frontier:
+            for index in range(1, fanout + 1):
+                activity_id = len(activities) + 1
+                label = f"{prefix}{index}" if not prefix else f"{prefix}.{index}"
+                activities.append({"id": activity_id, "name": f"Деятельность {label}", "parent_id": parent_id})
+                next_frontier.append((activity_id, label))
+        frontier = next_frontier
+    return activities
+
+def generate_organizations(
+    rng: random.Random, count: int, building_count: int, activity_count: int
+) -> List[Dict[str, object]]:
+    organizations = []
+    for organization_id in range(1, count + 1):
+        words = " ".join(rng.sample(ORGANIZATION_WORDS, 2))
+        phones = [
+            f"{rng.randint(1, 9)}-{rng.randint(100, 999)}-{rng.randint(100, 999)}-{rng.randint(10, 99)}"
+            for _ in range(rng.randint(1, 3))
+        ]
+        activity_ids = rng.sample(range(1, activity_count + 1), min(rng.randint(1, 3), activity_count))
+        organizations.append({
+            "id": organization_id,
+            "name": f"{rng.choice(ORGANIZATION_KINDS)} '{words}' №{organization_id}",
+            "building_id": rng.randint(1, building_count),
+            "phone_numbers": ";".join(phones),
+            "activity_ids": ";".join(str(activity_id) for activity_id in activity_ids),
+        })
+    return organizations
+
+def write_csv(path: Path, rows: List[Dict[str, object]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def generate(
+    output_dir: Path,
+    buildings: int,
+    organizations: int,
+    activity_depth: int = 3,
+    activity_fanout: int = 4,
+    seed: int = 0,
+) -> Tuple[Path, Path, Path]:
+    """
+    Write buildings.csv, activities.csv and organizations.csv to `output_dir`.
+
+    Returns:
+        Tuple[Path, Path, Path]: The paths of the three files, in import order.
+    """
+    rng = random.Random(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = tuple(output_dir / f"{name}.csv" for name in ("buildings", "activities", "organizations"))
+
+    activities = generate_activities(activity_depth, activity_fanout)
+    write_csv(paths[0], generate_buildings(rng, buildings))
+    write_csv(paths[1], [{**activity, "parent_id": activity["parent_id"] or ""} for activity in activities])
+    write_csv(paths[2], generate_organizations(rng, organizations, buildings, len(activities)))
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--buildings", type=int, default=10_000)
+    parser.add_argument("--organizations", type=int, default=30_000)
+    parser.add_argument("--activity-depth", type=int, default=3)
+    parser.add_argument("--activity-fanout", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in generate(
+        args.output_dir, args.buildings, args.organizations, args.activity_depth, args.activity_fanout, args.seed
+    ):
+        print(path)
@@ -0,0 +1,56 @@
+"""
+Micro-benchmark of the scalar, pure Python batch and NumPy batch haversine.
+
+Usage:
+    python -m benchmarks.haversine_benchmark [--sizes 10000 100000 1000000]
+"""
+import argparse
+import random
+import time
+from app.utils import math as geo_math
+from app.utils.math import haversine, within_radius
+
+CENTER = (55.7558, 37.6176)
+RADIUS_KM = 50.0
+
+def best_of(func, repeat):
+    """Return the fastest of `repeat` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def run(sizes, repeat):
+    rng = random.Random(0)
+    numpy = geo_math.np
+    print(f"{'points':>10} {'scalar':>10} {'python':>10} {'numpy':>10} {'speedup':>8}")
+    for size in sizes:
+        latitudes = [rng.uniform(55.0, 56.5) for _ in range(size)]
+        longitudes = [rng.uniform(36.5, 38.5) for _ in range(size)]
+
+        scalar = best_of(lambda: [
+            haversine(*CENTER, lat, lon) <= RADIUS_KM for lat, lon in zip(latitudes, longitudes)
+        ], repeat)
+
+        geo_math.np = None
+        python = best_of(lambda: within_radius(*CENTER, latitudes, longitudes, RADIUS_KM), repeat)
+        geo_math.np = numpy
+
+        if numpy is None:
+            print(f"{size:>10} {scalar:>10.4f} {python:>10.4f} {'n/a':>10} {'n/a':>8}")
+            continue
+
+        # Contiguous float64 arrays, as the service would pass them
+        lat_array = numpy.asarray(latitudes, dtype=numpy.float64)
+        lon_array = numpy.asarray(longitudes, dtype=numpy.float64)
+        vectorized = best_of(lambda: within_radius(*CENTER, lat_array, lon_array, RADIUS_KM), repeat)
+        print(f"{size:>10} {scalar:>10.4f} {python:>10.4f} {vectorized:>10.4f} {scalar / vectorized:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
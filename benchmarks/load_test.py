@@ -0,0 +1,234 @@
+"""
+End-to-end HTTP load test of every GET route of the API against SQLite.
+
+Generates a synthetic dataset with benchmarks.datagen, imports it into a
+SQLite file with app.db.importer, then sends `--requests` requests with
+randomized parameters to each route through the ASGI app, `--concurrency`
+at a time. Reports throughput and latency percentiles per route, and
+writes them as JSON with `--output` so runs can be diffed.
+
+The response cache is disabled unless `--with-cache` is given, so the
+numbers reflect the work behind each route rather than cache hits.
+
+Usage:
+    python -m benchmarks.load_test [--buildings 10000] [--organizations 30000] \\
+        [--requests 200] [--concurrency 8] [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.database import create_db_engine, get_db, get_read_db, get_read_session_factory
+from app.db.importer import Importer
+from app.db.models import Base
+from app.main import app
+from app.middleware.cache import ResponseCacheMiddleware
+from app.utils.geo import tile_at
+from benchmarks.datagen import CITIES, ORGANIZATION_WORDS, generate
+
+def build_scenarios(args: argparse.Namespace, activity_count: int) -> Dict[str, Callable[[random.Random], str]]:
+    """Map every route template to a function producing a request URL for it."""
+
+    def near_city(rng):
+        _, latitude, longitude, _, _ = rng.choice(CITIES)
+        return latitude + rng.uniform(-0.1, 0.1), longitude + rng.uniform(-0.1, 0.1)
+
+    def circular(rng):
+        latitude, longitude = near_city(rng)
+        return f"/api/organizations/nearby/circular?latitude={latitude}&longitude={longitude}&radius={rng.uniform(1, 5)}"
+
+    def rectangular(rng):
+        latitude, longitude = near_city(rng)
+        return (
+            f"/api/organizations/nearby/rectangular?min_lat={latitude - 0.03}&max_lat={latitude + 0.03}"
+            f"&min_lon={longitude - 0.05}&max_lon={longitude + 0.05}"
+        )
+
+    def clusters(rng):
+        latitude, longitude = near_city(rng)
+        return (
+            f"/api/organizations/nearby/clusters?min_lat={latitude - 1}&max_lat={latitude + 1}"
+            f"&min_lon={longitude - 2}&max_lon={longitude + 2}&zoom={rng.randint(6, 9)}&activities=true"
+        )
+
+    def tile(rng):
+        # A handful of viewports, so most tiles repeat like they do for real users
+        zoom = rng.randint(12, 14)
+        x, y = tile_at(*near_city(random.Random(rng.randint(0, 4))), zoom)
+        return f"/api/tiles/{zoom}/{x}/{y}?format={rng.choice(['json', 'bin'])}"
+
+    def nearest(rng):
+        latitude, longitude = near_city(rng)
+        return f"/api/organizations/nearby/nearest?latitude={latitude}&longitude={longitude}&k=20"
+
+    def batch(rng):
+        ids = ",".join(str(rng.randint(1, args.organizations)) for _ in range(50))
+        return f"/api/organizations?ids={ids}"
+
+    return {
+        "/api/buildings/{building_id}/organizations": lambda rng: f"/api/buildings/{rng.randint(1, args.buildings)}/organizations",
+        "/api/organizations": batch,
+        "/api/organizations/search": lambda rng: f"/api/organizations/search?name={rng.choice(ORGANIZATION_WORDS)}",
+        "/api/organizations/nearby/circular": circular,
+        "/api/organizations/nearby/rectangular": rectangular,
+        "/api/organizations/nearby/clusters": clusters,
+        "/api/organizations/nearby/nearest": nearest,
+        "/api/organizations/{organization_id}": lambda rng: f"/api/organizations/{rng.randint(1, args.organizations)}",
+        "/api/activities/{activity_id}/organizations/search": (
+            lambda rng: f"/api/activities/{rng.randint(1, activity_count)}/organizations/search"
+        ),
+        "/api/cache/stats": lambda rng: "/api/cache/stats",
+        "/api/database/pool/stats": lambda rng: "/api/database/pool/stats",
+        "/api/tiles/{z}/{x}/{y}": tile,
+    }
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def drive(client: httpx.AsyncClient, make_url, requests: int, concurrency: int, seed: int) -> Dict[str, object]:
+    """Send `requests` requests, `concurrency` at a time, and summarize their latencies."""
+    rng = random.Random(seed)
+    urls = [make_url(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def worker():
+        while urls:
+            url = urls.pop()
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "statuses": statuses,
+        "seconds": round(elapsed, 4),
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        sources = generate(
+            directory, args.buildings, args.organizations, args.activity_depth, args.activity_fanout, args.seed
+        )
+        activity_count = sum(args.activity_fanout ** level for level in range(1, args.activity_depth + 1))
+
+        engine = create_db_engine(f"sqlite+aiosqlite:///{directory / 'load_test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        started = time.perf_counter()
+        await Importer(engine, report=lambda line: None).run(*sources)
+        import_seconds = time.perf_counter() - started
+
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        async def open_session():
+            return session_factory()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        app.dependency_overrides[get_read_session_factory] = lambda: open_session
+        if not args.with_cache:
+            # The middleware stack is built on the first request, from these arguments
+            for middleware in app.user_middleware:
+                if middleware.cls is ResponseCacheMiddleware:
+                    middleware.kwargs["cache"] = None
+
+        scenarios = build_scenarios(args, activity_count)
+        routes = [
+            route.path for route in app.routes
+            if isinstance(route, APIRoute) and "GET" in route.methods and route.path.startswith("/api")
+        ]
+        missing = [route for route in routes if route not in scenarios]
+        if missing:
+            raise SystemExit(f"No load scenario for routes: {', '.join(missing)}")
+
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver", headers={"X-API-Key": settings.API_KEY}
+        ) as client:
+            for index, route in enumerate(routes):
+                results[route] = await drive(client, scenarios[route], args.requests, args.concurrency, args.seed + index)
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    return {
+        "config": {
+            "buildings": args.buildings,
+            "organizations": args.organizations,
+            "activity_depth": args.activity_depth,
+            "activity_fanout": args.activity_fanout,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "with_cache": args.with_cache,
+            "core_read_path": settings.CORE_READ_PATH,
+            "fast_serialization": settings.FAST_SERIALIZATION,
+            "python": platform.python_version(),
+        },
+        "import_seconds": round(import_seconds, 3),
+        "endpoints": results,
+    }
+
+def print_report(report: Dict[str, object], baseline: Optional[Dict[str, object]] = None) -> None:
+    """Print the results, with the p95 change relative to `baseline` when given."""
+    print(f"import: {report['import_seconds']}s")
+    print(f"{'route':<52} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p95 vs base':>12}  statuses")
+    for route, stats in report["endpoints"].items():
+        statuses = " ".join(f"{status}:{count}" for status, count in sorted(stats["statuses"].items()))
+        previous = (baseline or {}).get("endpoints", {}).get(route)
+        change = f"{(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.1f}%" if previous else "n/a"
+        print(
+            f"{route:<52} {stats['rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+            f"{change:>12}  {statuses}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, default=10_000)
+    parser.add_argument("--organizations", type=int, default=30_000)
+    parser.add_argument("--activity-depth", type=int, default=3)
+    parser.add_argument("--activity-fanout", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--with-cache", action="store_true")
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="JSON results of a previous run to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report, json.loads(args.baseline.read_text()) if args.baseline else None)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,121 @@
+"""
+Benchmark of the ORM read path against the Core projections.
+
+Seeds a temporary SQLite database, then fetches pages of the rectangular
+area and name search endpoints through the ORM services plus the response
+serializers, and through app.services.projections. Reports the best wall
+time and the peak memory allocated per page.
+
+Usage:
+    python -m benchmarks.read_path_benchmark [--buildings 5000] [--page-sizes 50 500]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db.database import create_db_engine
+from app.db.models import Activity, Base, Building, Organization, organization_activity
+from app.schemas.serializers import building_with_organizations_to_dict, organization_with_building_to_dict
+from app.services import organization_service, projections
+from app.utils.geo import grid_cell
+
+ORGANIZATIONS_PER_BUILDING = 3
+ACTIVITIES_PER_ORGANIZATION = 2
+
+async def seed(engine, buildings, rng):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Activity), [{"id": i, "name": f"Activity {i}"} for i in range(1, 51)])
+
+        building_rows = []
+        for building_id in range(1, buildings + 1):
+            latitude, longitude = rng.uniform(55.0, 56.5), rng.uniform(36.5, 38.5)
+            building_rows.append({
+                "id": building_id,
+                "address": f"Street {building_id}",
+                "latitude": latitude,
+                "longitude": longitude,
+                "grid_cell": grid_cell(latitude, longitude),
+            })
+        await conn.execute(insert(Building), building_rows)
+
+        organization_rows, link_rows = [], []
+        for organization_id in range(1, buildings * ORGANIZATIONS_PER_BUILDING + 1):
+            organization_rows.append({
+                "id": organization_id,
+                "name": f"Organization {organization_id}",
+                "phone_numbers": ["8-800-555-35-35"],
+                "building_id": (organization_id - 1) // ORGANIZATIONS_PER_BUILDING + 1,
+            })
+            link_rows.extend(
+                {"organization_id": organization_id, "activity_id": activity_id}
+                for activity_id in rng.sample(range(1, 51), ACTIVITIES_PER_ORGANIZATION)
+            )
+        await conn.execute(insert(Organization), organization_rows)
+        await conn.execute(insert(organization_activity), link_rows)
+
+async def orm_rectangle(db, limit):
+    buildings, _ = await organization_service.get_buildings_in_rectangular_area(db, 55, 56.5, 36.5, 38.5, limit)
+    return [building_with_organizations_to_dict(building) for building in buildings]
+
+async def core_rectangle(db, limit):
+    buildings, _ = await projections.fetch_buildings_in_rectangular_area(db, 55, 56.5, 36.5, 38.5, limit)
+    return buildings
+
+async def orm_search(db, limit):
+    organizations, _ = await organization_service.search_organizations_by_name(db, "Organization", limit)
+    return [organization_with_building_to_dict(organization) for organization in organizations]
+
+async def core_search(db, limit):
+    organizations, _ = await projections.fetch_organizations_by_name(db, "Organization", limit)
+    return organizations
+
+async def measure(session_factory, read, limit, repeat):
+    """Return the best time in seconds and the peak allocation in bytes of `read`."""
+    timings = []
+    for _ in range(repeat):
+        # A fresh session per page, as every request gets
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await read(db, limit)
+            timings.append(time.perf_counter() - started)
+
+    async with session_factory() as db:
+        tracemalloc.start()
+        await read(db, limit)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(timings), peak
+
+async def run(buildings, page_sizes, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}")
+        await seed(engine, buildings, random.Random(0))
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        print(f"{'endpoint':>10} {'page':>6} {'orm ms':>8} {'core ms':>8} {'speedup':>8} {'orm KiB':>9} {'core KiB':>9}")
+        for name, orm_read, core_read in (("rectangle", orm_rectangle, core_rectangle), ("search", orm_search, core_search)):
+            for limit in page_sizes:
+                async with session_factory() as db:
+                    assert await orm_read(db, limit) == await core_read(db, limit)
+                orm_time, orm_peak = await measure(session_factory, orm_read, limit, repeat)
+                core_time, core_peak = await measure(session_factory, core_read, limit, repeat)
+                print(
+                    f"{name:>10} {limit:>6} {orm_time * 1000:>8.1f} {core_time * 1000:>8.1f} "
+                    f"{orm_time / core_time:>7.1f}x {orm_peak / 1024:>9.0f} {core_peak / 1024:>9.0f}"
+                )
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, default=5000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.buildings, args.page_sizes, args.repeat))
@@ -0,0 +1,87 @@
+"""
+Benchmark of the response_model serialization against the direct projections.
+
+Serializes a page of buildings with their organizations and activities, as
+returned by the nearby endpoints, once through FastAPI's response model
+validation and JSONResponse, and once through app.schemas.serializers and
+ORJSONResponse.
+
+Usage:
+    python -m benchmarks.serialization_benchmark [--sizes 100 500 2000]
+"""
+import argparse
+import asyncio
+import random
+import time
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.db.models import Activity, Building, Organization
+from app.schemas.schemas import BuildingWithOrganizationsResponse, Page
+from app.schemas.serializers import building_with_organizations_to_dict
+
+ORGANIZATIONS_PER_BUILDING = 3
+ACTIVITIES_PER_ORGANIZATION = 2
+
+def best_of(func, repeat):
+    """Return the fastest of `repeat` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def make_buildings(size, rng):
+    """Build transient ORM objects shaped like a loaded page of buildings."""
+    activities = [Activity(id=i, name=f"Activity {i}") for i in range(1, 51)]
+    buildings = []
+    for building_id in range(1, size + 1):
+        building = Building(
+            id=building_id,
+            address=f"Street {building_id}",
+            latitude=rng.uniform(55.0, 56.5),
+            longitude=rng.uniform(36.5, 38.5),
+        )
+        building.organizations = [
+            Organization(
+                id=building_id * ORGANIZATIONS_PER_BUILDING + offset,
+                name=f"Organization {building_id}-{offset}",
+                phone_numbers=["8-800-555-35-35", "2-222-222"],
+                activities=rng.sample(activities, ACTIVITIES_PER_ORGANIZATION),
+            )
+            for offset in range(ORGANIZATIONS_PER_BUILDING)
+        ]
+        buildings.append(building)
+    return buildings
+
+def run(sizes, repeat):
+    rng = random.Random(0)
+    field = create_model_field("Response", Page[BuildingWithOrganizationsResponse], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def with_response_model(buildings):
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content={"items": buildings, "next_cursor": None})
+        )
+        return JSONResponse(content).body
+
+    def with_projections(buildings):
+        items = [building_with_organizations_to_dict(building) for building in buildings]
+        return ORJSONResponse({"items": items, "next_cursor": None}).body
+
+    print(f"{'buildings':>10} {'model':>10} {'fast':>10} {'speedup':>8}")
+    for size in sizes:
+        buildings = make_buildings(size, rng)
+        assert with_response_model(buildings) == with_projections(buildings)
+        model = best_of(lambda: with_response_model(buildings), repeat)
+        fast = best_of(lambda: with_projections(buildings), repeat)
+        print(f"{size:>10} {model:>10.4f} {fast:>10.4f} {model / fast:>7.1f}x")
+    loop.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
@@ -0,0 +1,82 @@
+"""
+Benchmark of the Core projections against the in-memory directory snapshot.
+
+Seeds a temporary SQLite database like `benchmarks.read_path_benchmark`, builds
+a snapshot of it, then runs the hot lookups through app.services.projections
+with and without the snapshot. Reports the build time and memory of the
+snapshot and the best time per lookup of both.
+
+Usage:
+    python -m benchmarks.snapshot_benchmark [--buildings 20000] [--limit 50]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db.database import create_db_engine
+from app.services import projections
+from app.services.directory_snapshot import directory_snapshot
+from benchmarks.read_path_benchmark import seed
+
+def lookups(buildings, limit):
+    return (
+        ("by id", lambda db: projections.fetch_organization_by_id(db, buildings)),
+        ("batch", lambda db: projections.fetch_organizations_by_ids(db, list(range(1, 101)))),
+        ("search", lambda db: projections.fetch_organizations_by_name(db, "Organization 12", limit)),
+        ("circle", lambda db: projections.fetch_buildings_in_circular_area(db, 55.75, 37.61, 2, limit)),
+        ("rectangle", lambda db: projections.fetch_buildings_in_rectangular_area(db, 55.7, 55.8, 37.5, 37.7, limit)),
+    )
+
+async def best_time(session_factory, read, repeat):
+    timings = []
+    for _ in range(repeat):
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await read(db)
+            timings.append(time.perf_counter() - started)
+    return min(timings)
+
+async def run(buildings, limit, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}")
+        await seed(engine, buildings, random.Random(0))
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        reads = lookups(buildings, limit)
+        expected, database_times = {}, {}
+        for name, read in reads:
+            async with session_factory() as db:
+                expected[name] = await read(db)
+            database_times[name] = await best_time(session_factory, read, repeat)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        await directory_snapshot.refresh(session_factory)
+        elapsed = time.perf_counter() - started
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"snapshot of {buildings} buildings built in {elapsed:.2f}s, {size / 2 ** 20:.1f} MiB")
+
+        print(f"{'lookup':>10} {'database ms':>12} {'snapshot us':>12} {'speedup':>9}")
+        for name, read in reads:
+            async with session_factory() as db:
+                assert await read(db) == expected[name]
+            snapshot_time = await best_time(session_factory, read, repeat)
+            print(
+                f"{name:>10} {database_times[name] * 1000:>12.2f} {snapshot_time * 1e6:>12.1f} "
+                f"{database_times[name] / snapshot_time:>8.0f}x"
+            )
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.buildings, args.limit, args.repeat))
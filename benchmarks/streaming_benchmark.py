@@ -0,0 +1,68 @@
+"""
+Benchmark of buffered area responses against NDJSON streaming.
+
+Seeds temporary SQLite databases of growing size, then reads the whole
+seeded area once as a single buffered page encoded with orjson, and once
+through projections.stream_buildings_in_rectangular_area encoded line by
+line. Reports the time to the first byte, the total time and the peak
+memory allocated by each.
+
+Usage:
+    python -m benchmarks.streaming_benchmark [--buildings 2000 20000] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db.database import create_db_engine
+from app.services import projections
+from benchmarks.read_path_benchmark import seed
+
+AREA = (55, 56.5, 36.5, 38.5)
+
+async def buffered(db, buildings, batch_size):
+    items, _ = await projections.fetch_buildings_in_rectangular_area(db, *AREA, buildings)
+    yield orjson.dumps({"items": items, "next_cursor": None})
+
+async def streamed(db, buildings, batch_size):
+    async for batch in projections.stream_buildings_in_rectangular_area(db, *AREA, batch_size):
+        yield b"".join(orjson.dumps(item) + b"\n" for item in batch)
+
+async def measure(session_factory, read, buildings, batch_size):
+    """Return the time to the first chunk and to the last in seconds, and the peak allocation in bytes."""
+    async with session_factory() as db:
+        tracemalloc.start()
+        started = time.perf_counter()
+        first = None
+        async for _ in read(db, buildings, batch_size):
+            if first is None:
+                first = time.perf_counter() - started
+        total = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return first, total, peak
+
+async def run(sizes, batch_size):
+    print(f"{'buildings':>10} {'mode':>9} {'ttfb ms':>9} {'total ms':>9} {'peak KiB':>9}")
+    for buildings in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_db_engine(f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}")
+            await seed(engine, buildings, random.Random(0))
+            session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            for mode, read in (("buffered", buffered), ("streamed", streamed)):
+                first, total, peak = await measure(session_factory, read, buildings, batch_size)
+                print(f"{buildings:>10} {mode:>9} {first * 1000:>9.1f} {total * 1000:>9.1f} {peak / 1024:>9.0f}")
+            await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buildings", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.buildings, args.batch_size))
@@ -4,9 +4,18 @@
 echo "Running Alembic migrations..."
 alembic upgrade head
 
-# Initialize data
-echo "Initializing data..."
-python -m app.db.init_data
+# Initialize data, from the CSV files in $IMPORT_DIR when it is set
+if [ -n "$IMPORT_DIR" ]; then
+    echo "Importing data from $IMPORT_DIR..."
+    python -m app.db.importer \
+        --buildings "$IMPORT_DIR/buildings.csv" \
+        --activities "$IMPORT_DIR/activities.csv" \
+        --organizations "$IMPORT_DIR/organizations.csv" \
+        --checkpoint "$IMPORT_DIR/import-checkpoint.json" || exit 1
+else
+    echo "Initializing data..."
+    python -m app.db.init_data
+fi
 
 # Start the application
 echo "Starting the application..."
@@ -1,13 +1,20 @@
 import pytest
 import pytest_asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
+from app.core.cache import response_cache
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.profiling import profile_engine
 from app.db.models import Base
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db, get_read_session_factory
+from app.db.versioning import data_version
+from app.services.directory_snapshot import directory_snapshot
+from app.services.tile_service import tile_cache
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -16,6 +23,15 @@ engine = create_async_engine(DATABASE_URL)
 TestingSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
+# Count the statements of the test database in /metrics, like the app's engine
+instrument_engine(engine)
+profile_engine(engine, settings.SLOW_QUERY_MS)
+
+pytest_plugins = ["tests.plugins.query_budget"]
+
+# The app's engine isn't the test database, the version follows the commits
+# of the test sessions and the sync of `get_test_session` instead
+settings.DATA_VERSION_POLL_INTERVAL = 0
 
 @pytest_asyncio.fixture(scope="function")  # Create a new session for each test function
 async def get_test_session() -> AsyncGenerator[AsyncSession, None]:
@@ -24,6 +40,14 @@ async def get_test_session() -> AsyncGenerator[AsyncSession, None]:
         await conn.run_sync(Base.metadata.drop_all) 
         await conn.run_sync(Base.metadata.create_all) 
 
+    # Recreating the schema resets the shared version and bypasses the ORM
+    # events that keep caches in sync
+    await data_version.sync(engine)
+    if response_cache is not None:
+        await response_cache.clear()
+    await tile_cache.clear()
+    directory_snapshot.clear()
+
     async with TestingSessionLocal() as session:
         yield session  
 
@@ -35,8 +59,13 @@ async def test_client(get_test_session: AsyncSession) -> AsyncGenerator[TestClie
     async def override_get_db():
         yield get_test_session
 
+    async def open_test_session():
+        return get_test_session
+
     # Override the dependency
     app.dependency_overrides[get_db] = override_get_db 
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_session_factory] = lambda: open_test_session
     
     with TestClient(app) as client:
         yield client
@@ -53,3 +82,17 @@ def api_key_client(test_client):
         "X-API-Key": settings.API_KEY
     }
     return test_client
+
+@pytest.fixture(scope="function")
+def executed_statements() -> List[str]:
+    """
+    Collect the SQL statements sent to the test database during a test.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Activity, Building, Organization, activity_closure
+
+async def closure_rows(session: AsyncSession):
+    result = await session.execute(
+        select(activity_closure.c.ancestor_id, activity_closure.c.descendant_id, activity_closure.c.depth)
+    )
+    return sorted(result.all())
+
+@pytest.mark.asyncio
+async def test_activity_closure_follows_insert_move_and_delete(get_test_session: AsyncSession):
+    """Test that the closure table stays consistent with the activity hierarchy."""
+    # Build food -> meat -> sausages and cars, using both the relationship and the column
+    food = Activity(id=1, name="Food")
+    meat = Activity(id=2, name="Meat", parent=food)
+    sausages = Activity(id=3, name="Sausages", parent_id=2)
+    cars = Activity(id=4, name="Cars")
+
+    async with get_test_session as session:
+        session.add_all([sausages, meat, cars, food])
+        await session.commit()
+        assert await closure_rows(session) == [
+            (1, 1, 0), (1, 2, 1), (1, 3, 2), (2, 2, 0), (2, 3, 1), (3, 3, 0), (4, 4, 0),
+        ]
+
+        # Move the meat subtree under cars
+        meat.parent_id = 4
+        await session.commit()
+        assert await closure_rows(session) == [
+            (1, 1, 0), (2, 2, 0), (2, 3, 1), (3, 3, 0), (4, 2, 1), (4, 3, 2), (4, 4, 0),
+        ]
+
+        # Moving an activity under its own descendant is rejected
+        cars.parent_id = 3
+        with pytest.raises(ValueError):
+            await session.commit()
+        await session.rollback()
+
+        # Delete the leaf
+        await session.delete(await session.get(Activity, 3))
+        await session.commit()
+        assert await closure_rows(session) == [(1, 1, 0), (2, 2, 0), (4, 2, 1), (4, 4, 0)]
+
+@pytest.mark.asyncio
+async def test_search_organizations_by_activity_unlimited_depth(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that the activity search reaches deeper than three levels when depth is omitted."""
+    # Create a six level chain of activities with an organization on the deepest one
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    activities = [Activity(id=1, name="Level 0")] + [
+        Activity(id=index, name=f"Level {index - 1}", parent_id=index - 1) for index in range(2, 7)
+    ]
+    organization = Organization(id=1, name="Deep Org", phone_numbers=[], building_id=1)
+    organization.activities.append(activities[-1])
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building, organization] + activities)
+        await session.commit()
+
+    # Test the endpoint
+    response = api_key_client.get("/api/activities/1/organizations/search")
+    assert response.status_code == 200
+    assert [organization["id"] for organization in response.json()["items"]] == [1]
+
+    response = api_key_client.get("/api/activities/1/organizations/search?depth=4")
+    assert response.status_code == 404
+
+    response = api_key_client.get("/api/activities/1/organizations/search?depth=5")
+    assert response.status_code == 200
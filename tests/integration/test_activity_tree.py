@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Activity, Building, Organization
+from app.services.activity_tree import ActivityTreeSnapshot
+
+def test_activity_tree_snapshot_descendants():
+    """Test that the snapshot resolves subtrees level by level."""
+    snapshot = ActivityTreeSnapshot(0, [(1, None), (2, 1), (3, 2), (4, 1), (5, None)])
+    assert sorted(snapshot.descendant_ids(1)) == [1, 2, 3, 4]
+    assert sorted(snapshot.descendant_ids(1, 1)) == [1, 2, 4]
+    assert snapshot.descendant_ids(2, 5) == (2, 3)
+    assert snapshot.descendant_ids(5) == (5,)
+    assert snapshot.descendant_ids(404) == ()
+
+@pytest.mark.asyncio
+async def test_activity_tree_depth_counts_levels(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that depth limits tree levels rather than the number of activities."""
+    # Create a four level chain of activities, each with one organization
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    activities = [Activity(id=1, name="Level 0")] + [
+        Activity(id=index, name=f"Level {index - 1}", parent_id=index - 1) for index in range(2, 5)
+    ]
+    # Several siblings on the first level, more than the requested depth
+    activities += [Activity(id=index, name=f"Sibling {index}", parent_id=1) for index in range(5, 9)]
+    organizations = []
+    for activity in activities:
+        organization = Organization(
+            id=activity.id, name=f"Org {activity.id}", phone_numbers=[], building_id=1
+        )
+        organization.activities.append(activity)
+        organizations.append(organization)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building] + activities + organizations)
+        await session.commit()
+
+    # Test the endpoint
+    def organization_ids(depth):
+        response = api_key_client.get(f"/api/activities/1/organizations/search?depth={depth}")
+        assert response.status_code == 200
+        return sorted(organization["id"] for organization in response.json()["items"])
+
+    assert organization_ids(1) == [1, 2, 5, 6, 7, 8]
+    assert organization_ids(2) == [1, 2, 3, 5, 6, 7, 8]
+    assert organization_ids(3) == [1, 2, 3, 4, 5, 6, 7, 8]
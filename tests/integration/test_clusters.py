@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Activity, Building, Organization
+from app.utils.geo import cluster_cell_span
+
+CLUSTERS = "api/organizations/nearby/clusters?min_lat=55.0&max_lat=56.0&min_lon=37.0&max_lon=38.0"
+
+def test_cluster_cell_span():
+    """Test that clusters halve with every zoom level until they reach a single grid cell."""
+    assert cluster_cell_span(4, 8) == 28
+    assert cluster_cell_span(5, 8) == 14
+    assert cluster_cell_span(12, 8) == 1
+
+@pytest.mark.asyncio
+async def test_clusters(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that organizations are counted per cell with their centroid and root activity breakdown."""
+    food = Activity(id=1, name="Food")
+    meat = Activity(id=2, name="Meat", parent=food)
+    cars = Activity(id=3, name="Cars")
+    async with get_test_session as session:
+        session.add_all([food, meat, cars])
+        session.add_all([
+            # Two buildings in the same 0.1 degree cell
+            Building(id=1, address="Building 1", latitude=55.71, longitude=37.61),
+            Building(id=2, address="Building 2", latitude=55.73, longitude=37.65),
+            # Another cell
+            Building(id=3, address="Building 3", latitude=55.61, longitude=37.11),
+            # Outside of the area
+            Building(id=4, address="Building 4", latitude=10.0, longitude=10.0),
+        ])
+        session.add_all([
+            Organization(id=1, name="Org 1", phone_numbers=[], building_id=1, activities=[food, meat]),
+            Organization(id=2, name="Org 2", phone_numbers=[], building_id=1, activities=[cars]),
+            Organization(id=3, name="Org 3", phone_numbers=[], building_id=2, activities=[meat, cars]),
+            Organization(id=4, name="Org 4", phone_numbers=[], building_id=3, activities=[]),
+            Organization(id=5, name="Org 5", phone_numbers=[], building_id=4, activities=[food]),
+        ])
+        await session.commit()
+
+    response = api_key_client.get(f"{CLUSTERS}&zoom=12")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["cell_size"] == 0.1
+    assert [cluster["organizations"] for cluster in payload["clusters"]] == [1, 3]
+    assert [cluster["buildings"] for cluster in payload["clusters"]] == [1, 2]
+    assert payload["clusters"][0]["activities"] is None
+
+    # Weighted by organizations: two in building 1, one in building 2
+    assert payload["clusters"][1]["latitude"] == pytest.approx((55.71 * 2 + 55.73) / 3)
+    assert payload["clusters"][1]["longitude"] == pytest.approx((37.61 * 2 + 37.65) / 3)
+
+    response = api_key_client.get(f"{CLUSTERS}&zoom=12&activities=true")
+    assert [cluster["activities"] for cluster in response.json()["clusters"]] == [
+        [],
+        # Organizations 1 and 3 under Food, each counted once, and 2 and 3 under Cars
+        [{"id": 1, "count": 2}, {"id": 3, "count": 2}],
+    ]
+
+    # A single cluster at a low zoom level
+    response = api_key_client.get(f"{CLUSTERS}&zoom=4")
+    assert response.json()["cell_size"] == 2.8
+    assert [cluster["organizations"] for cluster in response.json()["clusters"]] == [4]
+
+@pytest.mark.asyncio
+async def test_clusters_too_many_cells(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that a large area at a high zoom level is rejected instead of shipping every building."""
+    response = api_key_client.get("api/organizations/nearby/clusters?min_lat=40&max_lat=60&min_lon=20&max_lon=60&zoom=14")
+    assert response.status_code == 422
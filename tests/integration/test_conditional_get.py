@@ -0,0 +1,87 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Building, Organization
+from app.db.versioning import data_version
+
+@pytest.mark.asyncio
+async def test_conditional_get(api_key_client: TestClient, get_test_session: AsyncSession, executed_statements):
+    """Test that a matching If-None-Match is answered with 304 until the data changes."""
+    # Create test data
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    organization = Organization(id=1, name="Test Organization", phone_numbers=["123-456"], building_id=1)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building, organization])
+        await session.commit()
+
+    response = api_key_client.get("/api/organizations/1")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == settings.HTTP_CACHE_CONTROL
+    etag = response.headers["etag"]
+
+    # The 304 is sent before the response cache and the database are reached
+    executed_statements.clear()
+    response = api_key_client.get("/api/organizations/1", headers={"If-None-Match": f'W/"other", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert "x-cache" not in response.headers
+    assert executed_statements == []
+
+    # Another resource has another ETag
+    response = api_key_client.get("/api/buildings/1/organizations", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    # A committed change makes the old ETag stale
+    async with get_test_session as session:
+        (await session.get(Organization, 1)).name = "Renamed Organization"
+        await session.commit()
+
+    response = api_key_client.get("/api/organizations/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed Organization"
+    assert response.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_conditional_get_skips_errors_and_unauthorized(api_key_client: TestClient):
+    """Test that error responses aren't tagged and unauthorized requests never get a 304."""
+    response = api_key_client.get("/api/organizations/1")
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+    response = api_key_client.get("/api/organizations/1", headers={"X-API-Key": "wrong", "If-None-Match": "*"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_conditional_get_follows_shared_version(
+    api_key_client: TestClient, get_test_session: AsyncSession, monkeypatch
+):
+    """Test that writes made outside this process's sessions and a stale version both prevent 304s."""
+    async with get_test_session as session:
+        session.add_all([
+            Building(id=1, address="Test Address", latitude=0.0, longitude=0.0),
+            Organization(id=1, name="Test Organization", phone_numbers=["123-456"], building_id=1),
+        ])
+        await session.commit()
+    etag = api_key_client.get("/api/organizations/1").headers["etag"]
+
+    # Like another worker or the importer, bypassing the ORM
+    async with get_test_session.bind.begin() as conn:
+        await conn.execute(text("UPDATE organizations SET name = 'Renamed Organization' WHERE id = 1"))
+    version = data_version.value
+    assert await data_version.sync(get_test_session.bind) > version
+
+    response = api_key_client.get("/api/organizations/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed Organization"
+    etag = response.headers["etag"]
+    assert api_key_client.get("/api/organizations/1", headers={"If-None-Match": etag}).status_code == 304
+
+    # Without a recent read of the version, the request is answered in full
+    monkeypatch.setattr(data_version, "_synced_at", float("-inf"))
+    assert api_key_client.get("/api/organizations/1", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,63 @@
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.db.models import Activity, Building, Organization
+
+ENDPOINTS = [
+    "/api/organizations/1",
+    "/api/organizations/404",
+    "/api/organizations?ids=7,1,404,3",
+    "/api/organizations/search?name=Org&limit=3",
+    "/api/organizations/search?name=Org 1",
+    "/api/organizations/nearby/circular?latitude=55.75&longitude=37.61&radius=5&limit=2",
+    "/api/organizations/nearby/rectangular?min_lat=55&max_lat=56&min_lon=37&max_lon=38&limit=2",
+    "/api/organizations/nearby/rectangular?min_lat=10&max_lat=11&min_lon=10&max_lon=11",
+]
+
+@pytest_asyncio.fixture
+async def setup_test_data(get_test_session: AsyncSession):
+    """Create buildings with organizations linked to activities in varying order."""
+    activities = [Activity(id=index, name=f"Activity {index}") for index in range(1, 5)]
+    buildings = [
+        Building(id=index, address=f"Building {index}", latitude=55.75 + index * 0.001, longitude=37.61)
+        for index in range(1, 5)
+    ]
+    organizations = []
+    for organization_id in range(1, 13):
+        organization = Organization(
+            id=organization_id,
+            name=f"Org {organization_id % 5} {organization_id}",
+            phone_numbers=[f"{organization_id}-000", "8-800"],
+            building_id=(organization_id % 3) + 1,
+        )
+        # Link a different number of activities, in a different order, to every organization
+        rotated = activities[organization_id % 4:] + activities[:organization_id % 4]
+        organization.activities.extend(rotated[:organization_id % 3 + 1])
+        organizations.append(organization)
+
+    async with get_test_session as session:
+        session.add_all(activities + buildings + organizations)
+        await session.commit()
+
+async def fetch(client: TestClient, endpoint: str):
+    # Both paths answer the same URL, keep the second one out of the response cache
+    if response_cache is not None:
+        await response_cache.clear()
+    response = client.get(endpoint)
+    return response.status_code, response.json()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+async def test_core_read_path_matches_orm_path(
+    api_key_client: TestClient, setup_test_data, monkeypatch, endpoint
+):
+    """Test that the Core projections answer exactly like the ORM entities."""
+    monkeypatch.setattr(settings, "CORE_READ_PATH", False)
+    expected = await fetch(api_key_client, endpoint)
+    assert expected[0] in (200, 404)
+
+    monkeypatch.setattr(settings, "CORE_READ_PATH", True)
+    assert await fetch(api_key_client, endpoint) == expected
@@ -0,0 +1,178 @@
+import json
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import response_cache
+from app.db.models import Activity, Building, Organization
+from app.db.versioning import data_version
+from app.services.directory_snapshot import directory_snapshot
+
+ENDPOINTS = [
+    "/api/organizations/1",
+    "/api/organizations/404",
+    "/api/organizations?ids=7,1,404,3",
+    "/api/organizations/search?name=Org&limit=3",
+    "/api/organizations/search?name=org 1",
+    "/api/organizations/search?name=g 2",
+    "/api/organizations/search?name=Nothing",
+    "/api/organizations/nearby/circular?latitude=55.75&longitude=37.61&radius=5&limit=2",
+    "/api/organizations/nearby/circular?latitude=55.75&longitude=37.61&radius=0.2",
+    "/api/organizations/nearby/rectangular?min_lat=55&max_lat=56&min_lon=37&max_lon=38&limit=2",
+    "/api/organizations/nearby/rectangular?min_lat=10&max_lat=11&min_lon=10&max_lon=11",
+    "/api/buildings/2/organizations",
+    "/api/buildings/404/organizations",
+    "/api/activities/1/organizations/search?limit=3",
+    "/api/activities/1/organizations/search?depth=1",
+    "/api/activities/4/organizations/search",
+]
+
+@pytest_asyncio.fixture
+async def directory(get_test_session: AsyncSession):
+    """Create an activity tree and buildings with organizations linked to activities in varying order."""
+    activities = [
+        Activity(id=1, name="Activity 1"),
+        Activity(id=2, name="Activity 2", parent_id=1),
+        Activity(id=3, name="Activity 3", parent_id=2),
+        Activity(id=4, name="Activity 4"),
+    ]
+    buildings = [
+        Building(id=index, address=f"Building {index}", latitude=55.75 + index * 0.001, longitude=37.61)
+        for index in range(1, 5)
+    ]
+    organizations = []
+    for organization_id in range(1, 13):
+        organization = Organization(
+            id=organization_id,
+            name=f"Org {organization_id % 5} {organization_id}",
+            phone_numbers=[f"{organization_id}-000", "8-800"],
+            building_id=(organization_id % 3) + 1,
+        )
+        rotated = activities[organization_id % 4:] + activities[:organization_id % 4]
+        organization.activities.extend(rotated[:organization_id % 3 + 1])
+        organizations.append(organization)
+
+    async with get_test_session as session:
+        session.add_all(activities + buildings + organizations)
+        await session.commit()
+
+async def fetch(client: TestClient, endpoint: str):
+    # Both reads answer the same URL, keep the second one out of the response cache
+    if response_cache is not None:
+        await response_cache.clear()
+    response = client.get(endpoint)
+    return response.status_code, response.json()
+
+async def fetch_pages(client: TestClient, endpoint: str):
+    """Follow the cursors of a paged endpoint, return every page."""
+    pages = [await fetch(client, endpoint)]
+    while pages[-1][0] == 200 and pages[-1][1].get("next_cursor"):
+        pages.append(await fetch(client, f"{endpoint}&cursor={pages[-1][1]['next_cursor']}"))
+    return pages
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+async def test_snapshot_matches_database(
+    api_key_client: TestClient, get_test_session: AsyncSession, directory, endpoint
+):
+    """Test that the snapshot answers exactly like the database, cursors included."""
+    expected = await fetch_pages(api_key_client, endpoint)
+    assert expected[0][0] in (200, 404)
+
+    await directory_snapshot.refresh(lambda: get_test_session)
+    assert directory_snapshot.current() is not None
+    assert await fetch_pages(api_key_client, endpoint) == expected
+
+@pytest.mark.asyncio
+@pytest.mark.query_budget(0)
+async def test_snapshot_reads_without_statements(
+    api_key_client: TestClient, get_test_session: AsyncSession, directory
+):
+    """Test that a fresh snapshot answers without touching the database."""
+    await directory_snapshot.refresh(lambda: get_test_session)
+    for endpoint in ENDPOINTS:
+        await fetch(api_key_client, endpoint)
+
+@pytest.mark.asyncio
+async def test_snapshot_streams_rectangular_area(
+    api_key_client: TestClient, get_test_session: AsyncSession, directory, monkeypatch
+):
+    """Test that the NDJSON stream is served from the snapshot in batches, like from the database."""
+    endpoint = "/api/organizations/nearby/rectangular?min_lat=55&max_lat=56&min_lon=37&max_lon=38&stream=true"
+    expected = api_key_client.get(endpoint).text
+
+    await directory_snapshot.refresh(lambda: get_test_session)
+    if response_cache is not None:
+        await response_cache.clear()
+    response = api_key_client.get(endpoint)
+    assert response.text == expected
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_not_served(
+    api_key_client: TestClient, get_test_session: AsyncSession, directory
+):
+    """Test that a committed change sends reads back to the database until the snapshot is rebuilt."""
+    await directory_snapshot.refresh(lambda: get_test_session)
+    stale = directory_snapshot.snapshot
+
+    async with get_test_session as session:
+        organization = await session.get(Organization, 1)
+        organization.name = "Renamed"
+        await session.commit()
+
+    assert directory_snapshot.current() is None
+    assert api_key_client.get("/api/organizations/1").json()["name"] == "Renamed"
+    # Readers holding the old snapshot keep a consistent view
+    assert stale.organization(1)["name"] == "Org 1 1"
+
+    await directory_snapshot.refresh(lambda: get_test_session)
+    assert directory_snapshot.current() is not stale
+    assert directory_snapshot.current().organization(1)["name"] == "Renamed"
+
+@pytest.mark.asyncio
+async def test_snapshot_is_stamped_with_the_version_of_its_data(get_test_session: AsyncSession, directory):
+    """Test that the snapshot takes the version from the database with its rows, not this process's view of it."""
+    # Written outside this process's sessions, so its view of the version is behind
+    async with get_test_session.bind.begin() as conn:
+        await conn.execute(text("UPDATE organizations SET name = 'Renamed' WHERE id = 1"))
+
+    snapshot = await directory_snapshot.refresh(lambda: get_test_session)
+    assert snapshot.version > data_version.value
+    assert directory_snapshot.current() is None
+
+    assert await data_version.sync(get_test_session.bind) == snapshot.version
+    assert directory_snapshot.current() is snapshot
+    assert snapshot.organization(1)["name"] == "Renamed"
+
+@pytest.mark.asyncio
+async def test_name_search_cursors_cross_read_paths(
+    api_key_client: TestClient, get_test_session: AsyncSession
+):
+    """Test that the database and the snapshot order names alike, so cursors carry over between them."""
+    names = ["apple", "Zebra", "Ärzte", "éclair", "Zebra", "apple pie", "Apple"]
+    async with get_test_session as session:
+        session.add(Building(id=1, address="Building 1", latitude=55.75, longitude=37.61))
+        session.add_all(
+            Organization(id=index, name=f"Shop {name}", phone_numbers=[], building_id=1)
+            for index, name in enumerate(names, start=1)
+        )
+        await session.commit()
+    endpoint = "/api/organizations/search?name=Shop&limit=2"
+    expected = [item["id"] for _, page in await fetch_pages(api_key_client, endpoint) for item in page["items"]]
+    assert len(expected) == len(names)
+
+    # Alternate the read path from one page to the next
+    ids, cursor = [], None
+    for page_number in range(len(names)):
+        if page_number % 2:
+            await directory_snapshot.refresh(lambda: get_test_session)
+        else:
+            directory_snapshot.clear()
+        _, page = await fetch(api_key_client, endpoint + (f"&cursor={cursor}" if cursor else ""))
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == expected
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import Organization, Building 
 
 @pytest.mark.asyncio
+@pytest.mark.query_budget(2)
 async def test_get_organization_by_id(api_key_client: TestClient, get_test_session: AsyncSession):
     """Test retrieving an organization by ID."""
     # Create test data
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Activity, Building, Organization
+
+@pytest.mark.asyncio
+@pytest.mark.query_budget(2)
+async def test_get_organizations_batch(api_key_client: TestClient, get_test_session: AsyncSession, executed_statements):
+    """Test fetching several organizations at once, in the requested order."""
+    # Create test data
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    activity = Activity(id=1, name="Food")
+    organizations = [
+        Organization(id=index, name=f"Organization {index}", phone_numbers=[], building_id=1, activities=[activity])
+        for index in range(1, 6)
+    ]
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building, activity, *organizations])
+        await session.commit()
+
+    # Test the endpoint
+    executed_statements.clear()
+    response = api_key_client.get("/api/organizations?ids=4,99,2,4,5")
+    assert response.status_code == 200
+    body = response.json()
+    assert [organization["id"] for organization in body["items"]] == [4, 2, 5]
+    assert body["items"][0] == {
+        "id": 4,
+        "name": "Organization 4",
+        "phone_numbers": [],
+        "building": {"id": 1, "address": "Test Address", "latitude": 0.0, "longitude": 0.0},
+        "activities": [{"id": 1, "name": "Food"}],
+    }
+    assert body["missing"] == [99]
+    # Organizations with their buildings, then their activities
+    assert len(executed_statements) == 2
+
+@pytest.mark.asyncio
+async def test_get_organizations_batch_validation(api_key_client: TestClient, monkeypatch):
+    """Test that malformed and oversized ID lists are rejected."""
+    for ids in ("", "1,,2", "1,a", "-1", "1" * 11, "2147483648", "1," * 5000 + "1"):
+        assert api_key_client.get(f"/api/organizations?ids={ids}").status_code == 422
+    assert api_key_client.get("/api/organizations?ids=2147483647").json()["missing"] == [2147483647]
+
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 3)
+    assert api_key_client.get("/api/organizations?ids=1,2,3,3").status_code == 200
+    assert api_key_client.get("/api/organizations?ids=1,2,3,4").status_code == 422
@@ -0,0 +1,119 @@
+import json
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db.database import create_db_engine
+from app.db.importer import Checkpoint, DataImportError, Importer
+from app.db.models import Activity, Base, Building, Organization, activity_closure, data_version_table, organization_activity
+from app.services.organization_service import search_organizations_by_name
+from app.utils.geo import grid_cell
+
+BUILDINGS_CSV = """id,address,latitude,longitude
+1,"Moscow, Lenina 1",55.7558,37.6173
+2,"Saint Petersburg, Nevsky 10",59.9343,30.3351
+3,"Kazan, Baumana 17",55.7963,49.1088
+"""
+
+# Children come before their parents
+ACTIVITIES = [
+    {"id": 3, "name": "Milk", "parent_id": 2},
+    {"id": 2, "name": "Dairy", "parent_id": 1},
+    {"id": 1, "name": "Food", "parent_id": None},
+    {"id": 4, "name": "Cars"},
+]
+
+ORGANIZATIONS_CSV = """id,name,building_id,phone_numbers,activity_ids
+1,Horns and Hooves,1,2-222-222;3-333-333,3
+2,Milk and Co,2,8-800-555-35-35,1;2
+3,Auto World,1,,4
+4,Grocery,3,7-777-777,
+5,Cheese House,3,1-111-111,3;3
+"""
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'import.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+@pytest.fixture
+def sources(tmp_path):
+    buildings = tmp_path / "buildings.csv"
+    buildings.write_text(BUILDINGS_CSV)
+    activities = tmp_path / "activities.jsonl"
+    activities.write_text("\n".join(json.dumps(activity) for activity in ACTIVITIES) + "\n")
+    organizations = tmp_path / "organizations.csv"
+    organizations.write_text(ORGANIZATIONS_CSV)
+    return buildings, activities, organizations
+
+async def count(engine, table):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(table))).scalar()
+
+@pytest.mark.asyncio
+async def test_import(engine, sources):
+    """Test importing every file, with parents after children and derived columns filled in."""
+    stats = await Importer(engine, chunk_size=2, report=lambda line: None).run(*sources)
+    assert [(stage.stage, stage.rows) for stage in stats] == [("buildings", 3), ("activities", 4), ("organizations", 5)]
+
+    async with engine.connect() as conn:
+        buildings = (await conn.execute(select(Building.id, Building.latitude, Building.longitude, Building.grid_cell))).all()
+        assert all(row.grid_cell == grid_cell(row.latitude, row.longitude) for row in buildings)
+
+        closure = set((await conn.execute(select(activity_closure))).all())
+        assert closure == {
+            (1, 1, 0), (2, 2, 0), (3, 3, 0), (4, 4, 0),
+            (1, 2, 1), (2, 3, 1), (1, 3, 2),
+        }
+
+        links = set((await conn.execute(select(organization_activity))).all())
+        assert links == {(1, 3), (2, 1), (2, 2), (3, 4), (5, 3)}
+        phones = dict((await conn.execute(select(Organization.id, Organization.phone_numbers))).all())
+        assert phones[1] == ["2-222-222", "3-333-333"]
+        assert phones[3] == []
+
+        # The triggers bumped the shared version the API servers poll
+        assert (await conn.execute(select(data_version_table.c.value))).scalar() > 0
+
+    # The name search index was filled by the inserts
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        organizations, _ = await search_organizations_by_name(session, "milk", 10)
+        assert [organization.id for organization in organizations] == [2]
+
+@pytest.mark.asyncio
+async def test_import_resumes_after_failure(engine, sources, tmp_path):
+    """Test that a failed import resumes from its checkpoint once the faulty record is fixed."""
+    buildings, activities, organizations = sources
+    organizations.write_text(ORGANIZATIONS_CSV.replace("4,Grocery,3,", "4,Grocery,99,"))
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    with pytest.raises(DataImportError, match="organizations.csv:4: unknown building 99"):
+        await Importer(engine, 2, Checkpoint(checkpoint_path), report=lambda line: None).run(
+            buildings, activities, organizations
+        )
+    # The first chunk of organizations was committed, the failing one rolled back
+    assert await count(engine, Organization.__table__) == 2
+
+    organizations.write_text(ORGANIZATIONS_CSV)
+    stats = await Importer(engine, 2, Checkpoint(checkpoint_path), report=lambda line: None).run(
+        buildings, activities, organizations
+    )
+    # Completed stages are skipped and the organizations resume after the committed chunk
+    assert [(stage.stage, stage.rows) for stage in stats] == [("buildings", 0), ("activities", 0), ("organizations", 3)]
+    assert await count(engine, Organization.__table__) == 5
+    assert await count(engine, organization_activity) == 5
+
+@pytest.mark.asyncio
+async def test_import_rejects_unknown_parents(engine, tmp_path):
+    """Test that activities whose parent never shows up are reported."""
+    activities = tmp_path / "activities.jsonl"
+    activities.write_text(json.dumps({"id": 1, "name": "Orphan", "parent_id": 7}) + "\n")
+
+    with pytest.raises(DataImportError, match="records 1 reference unknown parents 7"):
+        await Importer(engine, report=lambda line: None).run(activities=activities)
+    assert await count(engine, Activity.__table__) == 0
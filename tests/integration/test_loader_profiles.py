@@ -0,0 +1,67 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Activity, Building, Organization, activity_closure, organization_activity
+
+ENDPOINTS = [
+    "/api/buildings/1/organizations",
+    "/api/organizations/1",
+    "/api/organizations/search?name=Org",
+    "/api/organizations/nearby/circular?latitude=55.75&longitude=37.61&radius=5",
+    "/api/organizations/nearby/rectangular?min_lat=55&max_lat=56&min_lon=37&max_lon=38",
+    "/api/organizations/nearby/nearest?latitude=55.75&longitude=37.61&k=2",
+    "/api/activities/1/organizations/search",
+]
+
+async def seed(session: AsyncSession, organizations_per_building: int):
+    """Create two buildings, each with organizations linked to three activities."""
+    activities = [Activity(id=1, name="Root")] + [
+        Activity(id=index, name=f"Activity {index}", parent_id=1) for index in range(2, 4)
+    ]
+    buildings = [
+        Building(id=index, address=f"Building {index}", latitude=55.75 + index * 0.001, longitude=37.61)
+        for index in range(1, 3)
+    ]
+    organizations = []
+    for building in buildings:
+        for _ in range(organizations_per_building):
+            organization_id = len(organizations) + 1
+            organization = Organization(
+                id=organization_id, name=f"Org {organization_id}", phone_numbers=[], building_id=building.id
+            )
+            organization.activities.extend(activities)
+            organizations.append(organization)
+
+    async with session:
+        session.add_all(activities + buildings + organizations)
+        await session.commit()
+
+async def count_queries(client: TestClient, executed_statements):
+    counts = {}
+    for endpoint in ENDPOINTS:
+        executed_statements.clear()
+        response = client.get(endpoint)
+        assert response.status_code == 200, endpoint
+        counts[endpoint] = len(executed_statements)
+    return counts
+
+@pytest.mark.asyncio
+async def test_query_count_is_constant_in_organizations_per_building(
+    api_key_client: TestClient, get_test_session: AsyncSession, executed_statements
+):
+    """Test that no endpoint issues more queries as buildings get denser."""
+    await seed(get_test_session, organizations_per_building=1)
+    sparse = await count_queries(api_key_client, executed_statements)
+
+    # Start over with ten times more organizations per building
+    for table in (organization_activity, activity_closure, Organization.__table__, Activity.__table__, Building.__table__):
+        await get_test_session.execute(table.delete())
+    await get_test_session.commit()
+    get_test_session.expunge_all()
+
+    await seed(get_test_session, organizations_per_building=10)
+    dense = await count_queries(api_key_client, executed_statements)
+
+    assert dense == sparse
+    # Batched loading keeps every endpoint to a handful of statements
+    assert max(dense.values()) <= 4
@@ -0,0 +1,61 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metrics import metrics
+from app.db.models import Building, Organization
+
+def sample(text: str, name: str, labels: str = "") -> float:
+    """Return the value of the sample `name` with `labels` of this worker from a scrape."""
+    worker = f'worker="{os.getpid()}"'
+    series = f"{name}{{{labels},{worker}}}" if labels else f"{name}{{{worker}}}"
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+@pytest.mark.asyncio
+async def test_metrics(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that requests are reported per route template and status, with their database statements."""
+    async with get_test_session as session:
+        session.add_all([
+            Building(id=1, address="Test Address", latitude=0.0, longitude=0.0),
+            Organization(id=1, name="Test Organization", phone_numbers=["123-456"], building_id=1),
+        ])
+        await session.commit()
+
+    route = 'method="GET",route="/api/organizations/{organization_id}"'
+    before = api_key_client.get("/metrics").text
+
+    response = api_key_client.get("/api/organizations/1")
+    assert response.status_code == 200
+    assert api_key_client.get("/api/organizations/2").status_code == 404
+    # Answered from the response cache, without reaching the router
+    assert api_key_client.get("/api/organizations/1").headers["x-cache"] == "HIT"
+    # Answered with 304 by the conditional GET middleware
+    response = api_key_client.get("/api/organizations/1", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    api_key_client.get("/api/unknown/path")
+
+    response = api_key_client.get("/metrics", headers={"X-API-Key": ""})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+
+    def delta(name, labels):
+        return sample(after, name, labels) - sample(before, name, labels)
+
+    assert delta("http_requests_total", f'{route},status="200"') == 2
+    assert delta("http_requests_total", f'{route},status="404"') == 1
+    assert delta("http_requests_total", f'{route},status="304"') == 1
+    assert delta("http_requests_total", 'method="GET",route="unmatched",status="404"') == 1
+    assert delta("http_request_duration_seconds_count", f'{route},status="200"') == 2
+    # Only the two requests that reached the database ran statements
+    assert delta("http_request_db_queries_count", route) == 4
+    assert delta("http_request_db_queries_sum", route) >= 2
+    assert delta("http_request_db_duration_seconds_sum", route) > 0
+    # The scrape itself is in flight while it renders
+    assert sample(after, "http_requests_in_flight") == 1
+    assert f'db_pool_size{{database="primary",worker="{os.getpid()}"}}' in after
+    assert f'response_cache_hits_total{{backend="memory",worker="{os.getpid()}"}}' in after
+    assert metrics.in_flight == 0
@@ -0,0 +1,71 @@
+import random
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Building, Organization
+from app.utils.math import haversine
+
+@pytest.mark.asyncio
+async def test_get_nearest_organizations(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test fetching the organizations closest to a point."""
+    # Create test data scattered around Moscow and far away
+    rng = random.Random(1)
+    buildings = [
+        Building(
+            id=index,
+            address=f"Building {index}",
+            latitude=55.75 + rng.uniform(-2, 2) * (index % 3 + 1),
+            longitude=37.61 + rng.uniform(-2, 2) * (index % 4 + 1),
+        )
+        for index in range(1, 61)
+    ]
+    organizations = [
+        Organization(id=index, name=f"Org {index}", phone_numbers=[], building_id=(index % 60) + 1)
+        for index in range(1, 91)
+    ]
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all(buildings + organizations)
+        await session.commit()
+
+    # Test the endpoint against a brute force ranking
+    response = api_key_client.get("api/organizations/nearby/nearest?latitude=55.75&longitude=37.61&k=20")
+    assert response.status_code == 200
+    coordinates = {building.id: (building.latitude, building.longitude) for building in buildings}
+    expected = sorted(
+        (haversine(55.75, 37.61, *coordinates[organization.building_id]), organization.id)
+        for organization in organizations
+    )[:20]
+    response_json = response.json()
+    assert [organization["id"] for organization in response_json] == [org_id for _, org_id in expected]
+    assert [organization["distance"] for organization in response_json] == pytest.approx(
+        [distance for distance, _ in expected]
+    )
+    assert response_json[0]["building"]["id"] == (response_json[0]["id"] % 60) + 1
+
+@pytest.mark.asyncio
+async def test_get_nearest_organizations_fewer_than_k(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test fetching more nearest organizations than exist, across the antimeridian."""
+    # Create test data
+    building1 = Building(id=1, address="Building 1", latitude=0.0, longitude=-179.9)
+    building2 = Building(id=2, address="Building 2", latitude=-60.0, longitude=10.0)
+    organization1 = Organization(id=1, name="Org 1", phone_numbers=["111-111"], building_id=1)
+    organization2 = Organization(id=2, name="Org 2", phone_numbers=["222-222"], building_id=2)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building1, building2, organization1, organization2])
+        await session.commit()
+
+    # Test the endpoint
+    response = api_key_client.get("api/organizations/nearby/nearest?latitude=0&longitude=179.9&k=5")
+    assert response.status_code == 200
+    assert [organization["id"] for organization in response.json()] == [1, 2]
+    assert response.json()[0]["distance"] == pytest.approx(haversine(0, 179.9, 0, -179.9))
+
+@pytest.mark.asyncio
+async def test_get_nearest_organizations_invalid_k(api_key_client: TestClient):
+    """Test fetching nearest organizations with an invalid k."""
+    response = api_key_client.get("api/organizations/nearby/nearest?latitude=0&longitude=0&k=0")
+    assert response.status_code == 422
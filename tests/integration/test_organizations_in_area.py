@@ -20,7 +20,7 @@ async def test_get_buildings_in_circular_area(api_key_client: TestClient, get_te
     # Test the endpoint
     response = api_key_client.get("api/organizations/nearby/circular?latitude=55.7558&longitude=37.6176&radius=1")
     assert response.status_code == 200
-    assert len(response.json()) == 2  # Both buildings are within the radius
+    assert len(response.json()["items"]) == 2  # Both buildings are within the radius
 
 @pytest.mark.asyncio
 async def test_get_buildings_in_circular_area_no_results(api_key_client: TestClient, get_test_session: AsyncSession):
@@ -42,7 +42,7 @@ async def test_get_buildings_in_circular_area_no_results(api_key_client: TestCli
 
     response = api_key_client.get("api/organizations/nearby/circular?latitude=55.7558&longitude=38.6176&radius=80")
     assert response.status_code == 200
-    assert len(response.json()) == 1  # Both buildings are within the radius
+    assert len(response.json()["items"]) == 1  # Both buildings are within the radius
 
 @pytest.mark.asyncio
 async def test_get_buildings_in_rectangular_area(api_key_client: TestClient, get_test_session: AsyncSession):
@@ -63,4 +63,40 @@ async def test_get_buildings_in_rectangular_area(api_key_client: TestClient, get
         "api/organizations/nearby/rectangular?min_lat=55.75&max_lat=55.77&min_lon=37.61&max_lon=37.63"
     )
     assert response.status_code == 200
-    assert len(response.json()) == 2  # Both buildings are within the bounding box
\ No newline at end of file
+    assert len(response.json()["items"]) == 2  # Both buildings are within the bounding box
+
+@pytest.mark.asyncio
+async def test_get_buildings_in_circular_area_across_antimeridian(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test searching for buildings within a circular area crossing the antimeridian."""
+    # Create test data on both sides of the antimeridian
+    building1 = Building(id=1, address="Building 1", latitude=0.0, longitude=179.99)
+    building2 = Building(id=2, address="Building 2", latitude=0.0, longitude=-179.99)
+    building3 = Building(id=3, address="Building 3", latitude=0.0, longitude=179.0)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building1, building2, building3])
+        await session.commit()
+
+    # Test the endpoint
+    response = api_key_client.get("api/organizations/nearby/circular?latitude=0&longitude=180&radius=5")
+    assert response.status_code == 200
+    assert sorted(building["id"] for building in response.json()["items"]) == [1, 2]
+
+@pytest.mark.asyncio
+async def test_get_buildings_in_circular_area_around_pole(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test searching for buildings within a circular area containing the north pole."""
+    # Create test data around the pole at opposite longitudes
+    building1 = Building(id=1, address="Building 1", latitude=89.99, longitude=0.0)
+    building2 = Building(id=2, address="Building 2", latitude=89.99, longitude=180.0)
+    building3 = Building(id=3, address="Building 3", latitude=89.0, longitude=90.0)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building1, building2, building3])
+        await session.commit()
+
+    # Test the endpoint
+    response = api_key_client.get("api/organizations/nearby/circular?latitude=89.99&longitude=90&radius=5")
+    assert response.status_code == 200
+    assert sorted(building["id"] for building in response.json()["items"]) == [1, 2]
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import Building, Organization
 
 @pytest.mark.asyncio
+@pytest.mark.query_budget(3)
 async def test_list_organizations_in_building(api_key_client: TestClient, get_test_session: AsyncSession):
     """Test listing all organizations in a building."""
     # Create test data
@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Building, Organization
+
+def fetch_all_pages(client: TestClient, url: str, limit: int):
+    """Follow `next_cursor` until the last page and return every page."""
+    pages = []
+    cursor = None
+    while True:
+        page_url = f"{url}&limit={limit}" + (f"&cursor={cursor}" if cursor is not None else "")
+        response = client.get(page_url)
+        assert response.status_code == 200
+        pages.append(response.json()["items"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return pages
+
+@pytest.mark.asyncio
+async def test_search_organizations_pagination(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test walking the name search page by page, with duplicate names."""
+    # Create test data, several organizations share the same name
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    names = ["ООО Бета", "ООО Альфа", "ООО Бета", "ООО Гамма", "ООО Альфа", "ООО Бета", "ЗАО Дельта"]
+    organizations = [
+        Organization(id=index, name=name, phone_numbers=[], building_id=1)
+        for index, name in enumerate(names, start=1)
+    ]
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building] + organizations)
+        await session.commit()
+
+    # Test the endpoint
+    pages = fetch_all_pages(api_key_client, "/api/organizations/search?name=ООО", limit=2)
+    assert [len(page) for page in pages] == [2, 2, 2]
+    ordered = [(organization["name"], organization["id"]) for page in pages for organization in page]
+    assert ordered == sorted((name, index) for index, name in enumerate(names, start=1) if "ООО" in name)
+
+@pytest.mark.asyncio
+async def test_nearby_pagination(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test walking the circular and rectangular searches page by page."""
+    # Create test data, every other building is outside the circle
+    buildings = [
+        Building(id=index, address=f"Building {index}", latitude=55.75 + (index % 2) * 0.5, longitude=37.61)
+        for index in range(1, 21)
+    ]
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all(buildings)
+        await session.commit()
+
+    # Test the endpoints
+    pages = fetch_all_pages(
+        api_key_client, "/api/organizations/nearby/circular?latitude=55.75&longitude=37.61&radius=10", limit=3
+    )
+    assert [building["id"] for page in pages for building in page] == list(range(2, 21, 2))
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+
+    pages = fetch_all_pages(
+        api_key_client, "/api/organizations/nearby/rectangular?min_lat=55&max_lat=57&min_lon=37&max_lon=38", limit=7
+    )
+    assert [building["id"] for page in pages for building in page] == list(range(1, 21))
+
+@pytest.mark.asyncio
+async def test_pagination_invalid_cursor(api_key_client: TestClient):
+    """Test that a malformed cursor is rejected."""
+    response = api_key_client.get("/api/organizations/search?name=Test&cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+    response = api_key_client.get("/api/organizations/search?name=Test&limit=0")
+    assert response.status_code == 422
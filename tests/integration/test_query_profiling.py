@@ -0,0 +1,86 @@
+import logging
+import pytest
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.profiling import profile_engine, statement_shape
+from app.db.database import create_db_engine
+from app.db.models import Activity, Building, Organization
+from app.main import app
+from app.middleware.profiling import QueryProfilingMiddleware
+
+def test_statement_shape():
+    """Test that expanded IN lists and whitespace do not split statement shapes."""
+    assert statement_shape("SELECT * FROM t\n  WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM t WHERE id IN ($1, $2)") == "SELECT * FROM t WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM t WHERE id = ?") == "SELECT * FROM t WHERE id = ?"
+
+@pytest.mark.asyncio
+async def test_profiling_headers(test_client: TestClient, get_test_session: AsyncSession):
+    """Test that responses report the statements their request executed."""
+    async with get_test_session as session:
+        session.add_all([
+            Building(id=1, address="Test Address", latitude=0.0, longitude=0.0),
+            Organization(id=1, name="Test Organization", phone_numbers=["123-456"], building_id=1),
+        ])
+        await session.commit()
+
+    # The dependency overrides installed by test_client apply to the wrapped app too
+    client = TestClient(QueryProfilingMiddleware(app), headers={"X-API-Key": settings.API_KEY})
+    response = client.get("/api/organizations/1")
+    assert response.status_code == 200
+    assert response.headers["x-db-query-count"] == "2"
+    assert float(response.headers["x-db-time-ms"]) > 0
+
+    # Served from the response cache, without statements
+    response = client.get("/api/organizations/1")
+    assert response.headers["x-cache"] == "HIT"
+    assert response.headers["x-db-query-count"] == "0"
+
+@pytest.mark.asyncio
+async def test_n_plus_one_warning(get_test_session: AsyncSession, caplog):
+    """Test that loading a relationship per row within a request is reported as a likely N+1."""
+    async with get_test_session as session:
+        session.add(Building(id=1, address="Test Address", latitude=0.0, longitude=0.0))
+        session.add_all(
+            Organization(id=index, name=f"Organization {index}", phone_numbers=[], building_id=1,
+                         activities=[Activity(id=index, name=f"Activity {index}")])
+            for index in range(1, 5)
+        )
+        await session.commit()
+
+    async def lazy_loading_app(scope, receive, send):
+        organizations = (await get_test_session.scalars(select(Organization))).all()
+        for organization in organizations:
+            await get_test_session.refresh(organization, ["activities"])
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    client = TestClient(QueryProfilingMiddleware(lazy_loading_app, n_plus_one_threshold=3))
+    with caplog.at_level(logging.WARNING, logger="app.middleware.profiling"):
+        response = client.get("/organizations")
+
+    # One list, then a reload of the row and a load of its activities per organization
+    assert response.headers["x-db-query-count"] == "9"
+    warnings = [record.getMessage() for record in caplog.records if "Likely N+1" in record.getMessage()]
+    assert len(warnings) == 2
+    assert all(warning.startswith("Likely N+1 in GET /organizations: 4 executions of SELECT") for warning in warnings)
+    assert any("organization_activity.organization_id" in warning for warning in warnings)
+
+@pytest.mark.asyncio
+async def test_slow_statement_log(tmp_path, caplog):
+    """Test that statements over the threshold are logged with their parameters and query plan."""
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}")
+    profile_engine(engine, slow_query_ms=0)
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        with caplog.at_level(logging.WARNING, logger="app.core.profiling"):
+            await conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 42})
+    await engine.dispose()
+
+    message = caplog.records[-1].getMessage()
+    assert message.startswith("Slow statement")
+    assert "SELECT name FROM items WHERE id = ?" in message
+    assert "Parameters: (42,)" in message
+    assert "Plan:\nSEARCH items USING INTEGER PRIMARY KEY" in message
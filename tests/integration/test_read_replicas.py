@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db.database import create_db_engine
+from app.db.replicas import ReplicaRouter
+from app.db.versioning import data_version
+
+async def create_database(url, name):
+    """Create a SQLite file database whose `marker` table names it."""
+    engine = create_db_engine(url)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE marker (name TEXT)"))
+        await conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    return engine
+
+async def served_by(router):
+    async with await router.open_session() as session:
+        return (await session.execute(text("SELECT name FROM marker"))).scalar()
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    """Return a primary and two replicas standing in for a replicated database."""
+    primary, *replicas = [
+        await create_database(f"sqlite+aiosqlite:///{tmp_path / name}.db", name)
+        for name in ("primary", "replica1", "replica2")
+    ]
+    yield primary, replicas
+    for engine in (primary, *replicas):
+        await engine.dispose()
+
+def make_router(primary, replicas, **kwargs):
+    session_factory = sessionmaker(bind=primary, class_=AsyncSession, expire_on_commit=False)
+    return ReplicaRouter(primary, replicas, session_factory, **kwargs)
+
+@pytest.mark.asyncio
+async def test_round_robin(engines):
+    """Test that reads alternate between the replicas."""
+    router = make_router(*engines)
+    assert [await served_by(router) for _ in range(4)] == ["replica1", "replica2", "replica1", "replica2"]
+
+@pytest.mark.asyncio
+async def test_least_connections(engines):
+    """Test that reads go to the replica with the fewest connections in use."""
+    router = make_router(*engines, strategy="least_connections")
+    async with await router.open_session() as busy:
+        assert (await busy.execute(text("SELECT name FROM marker"))).scalar() == "replica1"
+        assert [await served_by(router) for _ in range(3)] == ["replica2"] * 3
+
+@pytest.mark.asyncio
+async def test_failover(engines, tmp_path):
+    """Test that unreachable replicas are skipped and reads fall back to the primary."""
+    primary, replicas = engines
+    broken = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    router = make_router(primary, [broken, replicas[0]])
+    assert [await served_by(router) for _ in range(3)] == ["replica1"] * 3
+    assert not router.is_healthy(broken)
+
+    router = make_router(primary, [broken], retry_after=0)
+    assert await served_by(router) == "primary"
+    await broken.dispose()
+
+@pytest.mark.asyncio
+async def test_read_your_writes(engines):
+    """Test that reads go to the primary for a while after a committed change."""
+    router = make_router(*engines, read_your_writes_window=0.1)
+    assert await served_by(router) == "replica1"
+
+    data_version.observe(data_version.value + 1)
+    assert [await served_by(router) for _ in range(2)] == ["primary"] * 2
+
+    await asyncio.sleep(0.1)
+    assert await served_by(router) == "replica2"
+
+def test_unknown_strategy(engines):
+    with pytest.raises(ValueError):
+        make_router(*engines, strategy="random")
@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Building, Organization
+from app.db.versioning import data_version
+
+@pytest.mark.asyncio
+async def test_response_cache_hit_and_invalidation(
+    api_key_client: TestClient, get_test_session: AsyncSession, executed_statements
+):
+    """Test that repeated GETs are served from the cache until the data changes."""
+    # Create test data
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    organization = Organization(id=1, name="Test Organization", phone_numbers=["123-456"], building_id=1)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building, organization])
+        await session.commit()
+
+    # The first request misses, the second is answered without touching the database
+    response = api_key_client.get("/api/organizations/search?name=Test&limit=10")
+    assert response.headers["x-cache"] == "MISS"
+    executed_statements.clear()
+    cached = api_key_client.get("/api/organizations/search?limit=10&name=Test")
+    assert cached.headers["x-cache"] == "HIT"
+    assert cached.json() == response.json()
+    assert executed_statements == []
+
+    # A committed change invalidates the cached response
+    async with get_test_session as session:
+        (await session.get(Organization, 1)).name = "Test Organization Renamed"
+        await session.commit()
+
+    response = api_key_client.get("/api/organizations/search?name=Test&limit=10")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["items"][0]["name"] == "Test Organization Renamed"
+
+@pytest.mark.asyncio
+async def test_response_cache_follows_shared_version(
+    api_key_client: TestClient, get_test_session: AsyncSession, monkeypatch
+):
+    """Test that writes made outside this process's sessions invalidate the cache once the version is read."""
+    async with get_test_session as session:
+        session.add_all([
+            Building(id=1, address="Test Address", latitude=0.0, longitude=0.0),
+            Organization(id=1, name="Test Organization", phone_numbers=["123-456"], building_id=1),
+        ])
+        await session.commit()
+    api_key_client.get("/api/organizations/1")
+
+    # Like another worker or the importer, bypassing the ORM
+    async with get_test_session.bind.begin() as conn:
+        await conn.execute(text("UPDATE organizations SET name = 'Renamed Organization' WHERE id = 1"))
+    await data_version.sync(get_test_session.bind)
+
+    response = api_key_client.get("/api/organizations/1")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["name"] == "Renamed Organization"
+    assert api_key_client.get("/api/organizations/1").headers["x-cache"] == "HIT"
+
+    # Without a recent read of the version, the cache is bypassed
+    monkeypatch.setattr(data_version, "_synced_at", float("-inf"))
+    response = api_key_client.get("/api/organizations/1")
+    assert response.status_code == 200
+    assert "x-cache" not in response.headers
+
+@pytest.mark.asyncio
+async def test_response_cache_skips_errors_and_unauthorized(api_key_client: TestClient):
+    """Test that error responses and requests without a valid API key bypass the cache."""
+    for _ in range(2):
+        response = api_key_client.get("/api/organizations/1")
+        assert response.status_code == 404
+        assert response.headers["x-cache"] == "MISS"
+
+    response = api_key_client.get("/api/organizations/1", headers={"X-API-Key": "wrong"})
+    assert response.status_code == 403
+    assert "x-cache" not in response.headers
+
+@pytest.mark.asyncio
+async def test_cache_stats(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that the cache counters are exposed."""
+    # Create test data
+    async with get_test_session as session:
+        session.add(Building(id=1, address="Test Address", latitude=0.0, longitude=0.0))
+        await session.commit()
+
+    before = api_key_client.get("/api/cache/stats").json()
+    api_key_client.get("/api/buildings/1/organizations")
+    api_key_client.get("/api/buildings/1/organizations")
+    after = api_key_client.get("/api/cache/stats").json()
+
+    assert after["backend"] == settings.RESPONSE_CACHE_BACKEND
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
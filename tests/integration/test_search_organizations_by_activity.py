@@ -1,5 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.db.models import Activity, Organization
 from tests.fixtures.setup_test_ativity_data import setup_test_data
 
 @pytest.mark.asyncio
@@ -13,7 +16,7 @@ async def test_search_organizations_by_activity_valid(
     response = api_key_client.get(f"/api/activities/{activity_id}/organizations/search?depth=3")
     
     assert response.status_code == 200
-    response_json = response.json()
+    response_json = response.json()["items"]
 
     # Check that both organizations are in the response
     assert any(org['id'] == data["organization1_id"] for org in response_json)
@@ -58,4 +61,30 @@ async def test_search_organizations_by_activity_invalid_depth(
     activity_id = data["activity_food_id"]  # Use the food activity ID
     response = api_key_client.get(f"/api/activities/{activity_id}/organizations/search?depth=0")
     
-    assert response.status_code == 422  # Unprocessable Entity due to depth validation
\ No newline at end of file
+    assert response.status_code == 422  # Unprocessable Entity due to depth validation
+
+@pytest.mark.asyncio
+async def test_search_organizations_by_activity_single_distinct_query(
+    api_key_client: TestClient, setup_test_data, get_test_session: AsyncSession, executed_statements
+):
+    """Test that an organization matching several activities is returned once, in one query."""
+    data = setup_test_data
+
+    # Give the meat shop a second activity inside the food subtree
+    async with get_test_session as session:
+        organization = await session.get(
+            Organization, data["organization1_id"], options=[selectinload(Organization.activities)]
+        )
+        organization.activities.append(await session.get(Activity, data["activity_dairy_id"]))
+        await session.commit()
+
+    executed_statements.clear()
+    response = api_key_client.get(f"/api/activities/{data['activity_food_id']}/organizations/search")
+    assert response.status_code == 200
+    assert len(executed_statements) == 1
+
+    response_json = response.json()["items"]
+    assert [org["id"] for org in response_json] == [data["organization1_id"], data["organization2_id"]]
+    assert sorted(activity["id"] for activity in response_json[0]["activities"]) == [
+        data["activity_meat_id"], data["activity_dairy_id"]
+    ]
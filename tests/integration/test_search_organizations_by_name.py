@@ -25,8 +25,8 @@ async def test_search_organizations_by_name(api_key_client: TestClient, get_test
     # Test the endpoint with a valid search
     response = api_key_client.get("/api/organizations/search?name=Test")
     assert response.status_code == 200
-    assert len(response.json()) == 1
-    assert response.json()[0] == {
+    assert len(response.json()["items"]) == 1
+    assert response.json()["items"][0] == {
         "id": 1,
         "name": "Test Organization",
         "phone_numbers": ["123-456"],
@@ -42,4 +42,36 @@ async def test_search_organizations_by_name(api_key_client: TestClient, get_test
     # Test the endpoint with a search that returns no results
     response = api_key_client.get("/api/organizations/search?name=Nonexistent")
     assert response.status_code == 200
-    assert response.json() == []
\ No newline at end of file
+    assert response.json() == {"items": [], "next_cursor": None}
+
+@pytest.mark.asyncio
+async def test_search_organizations_by_name_substring(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that the name search matches substrings case-insensitively and follows updates."""
+    # Create test data
+    building = Building(id=1, address="Test Address", latitude=0.0, longitude=0.0)
+    organization1 = Organization(id=1, name="ООО 'Рога и Копыта'", phone_numbers=[], building_id=1)
+    organization2 = Organization(id=2, name="ИП 'Гастроном'", phone_numbers=[], building_id=1)
+
+    # Add data to the database
+    async with get_test_session as session:
+        session.add_all([building, organization1, organization2])
+        await session.commit()
+
+    # Substrings in the middle of the name, in any case, short or long
+    for query in ["копыт", "РОГА И", "га"]:
+        response = api_key_client.get(f"/api/organizations/search?name={query}")
+        assert response.status_code == 200
+        assert 1 in [organization["id"] for organization in response.json()["items"]], query
+
+    # Renamed and deleted organizations are no longer found under their old name
+    async with get_test_session as session:
+        (await session.get(Organization, 1)).name = "ООО 'Молоко'"
+        await session.delete(await session.get(Organization, 2))
+        await session.commit()
+
+    response = api_key_client.get("/api/organizations/search?name=копыт")
+    assert response.json()["items"] == []
+    response = api_key_client.get("/api/organizations/search?name=гастроном")
+    assert response.json()["items"] == []
+    response = api_key_client.get("/api/organizations/search?name=молоко")
+    assert [organization["id"] for organization in response.json()["items"]] == [1]
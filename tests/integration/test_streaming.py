@@ -0,0 +1,83 @@
+import json
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.database import get_read_db
+from app.db.models import Activity, Building, Organization
+from app.main import app
+
+RECTANGLE = "api/organizations/nearby/rectangular?min_lat=55.0&max_lat=56.0&min_lon=37.0&max_lon=38.0"
+
+@pytest_asyncio.fixture
+async def buildings_in_area(get_test_session: AsyncSession):
+    async with get_test_session as session:
+        activity = Activity(id=1, name="Food")
+        session.add(activity)
+        for index in range(1, 8):
+            session.add(Building(id=index, address=f"Building {index}", latitude=55.5, longitude=37.0 + index / 10))
+            session.add(Organization(
+                id=index, name=f"Org {index}", phone_numbers=[f"{index}-111"], building_id=index, activities=[activity]
+            ))
+        # Outside of the rectangle
+        session.add(Building(id=8, address="Building 8", latitude=10.0, longitude=10.0))
+        await session.commit()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query, headers", [
+    ("&stream=true", {}),
+    ("", {"Accept": "application/x-ndjson"}),
+])
+async def test_stream_buildings_in_rectangular_area(
+    api_key_client: TestClient, buildings_in_area, monkeypatch, query, headers
+):
+    """Test that streaming returns every building of the area, one per line, like the pages do."""
+    # Several round trips for the seven buildings
+    monkeypatch.setattr(settings, "STREAM_BATCH_SIZE", 3)
+
+    response = api_key_client.get(f"{RECTANGLE}&limit=2{query}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 7
+    streamed = [json.loads(line) for line in lines]
+
+    paged = []
+    cursor = None
+    while True:
+        page = api_key_client.get(f"{RECTANGLE}&limit=2" + (f"&cursor={cursor}" if cursor else "")).json()
+        paged += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert streamed == paged
+    assert streamed[0]["organizations"][0]["activities"] == [{"id": 1, "name": "Food"}]
+
+@pytest.mark.asyncio
+async def test_stream_is_not_served_from_the_page_cache(api_key_client: TestClient, buildings_in_area):
+    """Test that a cached page is not returned to a client asking for NDJSON on the same URL."""
+    assert api_key_client.get(RECTANGLE).headers["content-type"] == "application/json"
+    response = api_key_client.get(RECTANGLE, headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(response.text.splitlines()) == 7
+
+@pytest.mark.asyncio
+async def test_stream_no_results(api_key_client: TestClient, buildings_in_area):
+    """Test that streaming an empty area answers 404 like the paginated form."""
+    response = api_key_client.get(
+        "api/organizations/nearby/rectangular?min_lat=0&max_lat=1&min_lon=0&max_lon=1&stream=true"
+    )
+    assert response.status_code == 404
+    assert response.json() == {"detail": "No buildings found in the specified area"}
+
+@pytest.mark.asyncio
+async def test_rectangular_area_opens_one_session(api_key_client: TestClient, buildings_in_area, monkeypatch):
+    """Test that the streamed and paged forms only open the session they read from, not the request's one."""
+    async def unused_session():
+        raise AssertionError("get_read_db should not be resolved")
+        yield
+
+    monkeypatch.setitem(app.dependency_overrides, get_read_db, unused_session)
+    assert len(api_key_client.get(f"{RECTANGLE}&stream=true").text.splitlines()) == 7
+    assert len(api_key_client.get(RECTANGLE).json()["items"]) == 7
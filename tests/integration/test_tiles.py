@@ -0,0 +1,109 @@
+import asyncio
+from contextlib import suppress
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Building, Organization
+from app.db.versioning import data_version
+from app.services.tile_service import POINT, keep_tiles_warm, render_tiles, tile_cache, tile_key
+from app.utils.geo import tile_at
+
+ZOOM = 12
+X, Y = tile_at(55.7558, 37.6176, ZOOM)
+TILE = f"api/tiles/{ZOOM}/{X}/{Y}"
+
+@pytest.mark.asyncio
+async def test_get_tile(api_key_client: TestClient, get_test_session: AsyncSession, executed_statements):
+    """Test that a tile lists its buildings and is served from the tile cache until the data changes."""
+    async with get_test_session as session:
+        session.add_all([
+            Building(id=1, address="Building 1", latitude=55.7558, longitude=37.6176),
+            Building(id=2, address="Building 2", latitude=55.7500, longitude=37.6500),
+            # In the neighbouring tile
+            Building(id=3, address="Building 3", latitude=55.7558, longitude=37.7500),
+            Organization(id=1, name="Org 1", phone_numbers=[], building_id=1),
+            Organization(id=2, name="Org 2", phone_numbers=[], building_id=1),
+        ])
+        await session.commit()
+
+    response = api_key_client.get(TILE)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "z": ZOOM, "x": X, "y": Y,
+        "buildings": [[1, 55.7558, 37.6176, 2], [2, 55.75, 37.65, 0]],
+    }
+
+    response = api_key_client.get(f"{TILE}?format=bin")
+    assert response.headers["content-type"] == "application/octet-stream"
+    points = list(POINT.iter_unpack(response.content))
+    assert [(point[0], point[3]) for point in points] == [(1, 2), (2, 0)]
+    assert points[0][1] == pytest.approx(55.7558, abs=1e-5)
+
+    # Repeated loads come from the tile cache
+    executed_statements.clear()
+    assert api_key_client.get(TILE).json()["buildings"][0] == [1, 55.7558, 37.6176, 2]
+    assert executed_statements == []
+
+    # A committed change renders the tile again
+    async with get_test_session as session:
+        session.add(Organization(id=3, name="Org 3", phone_numbers=[], building_id=2))
+        await session.commit()
+    assert api_key_client.get(TILE).json()["buildings"][1] == [2, 55.75, 37.65, 1]
+
+@pytest.mark.asyncio
+async def test_prerendered_tiles(api_key_client: TestClient, get_test_session: AsyncSession, executed_statements):
+    """Test that pre-rendered tiles are served without reaching the database."""
+    async with get_test_session as session:
+        session.add(Building(id=1, address="Building 1", latitude=55.7558, longitude=37.6176))
+        await session.commit()
+
+    async def open_session():
+        return get_test_session
+
+    await render_tiles(open_session, [(ZOOM, X, Y)], ["json", "bin"])
+    executed_statements.clear()
+    assert api_key_client.get(TILE).json()["buildings"] == [[1, 55.7558, 37.6176, 0]]
+    assert len(api_key_client.get(f"{TILE}?format=bin").content) == POINT.size
+    assert executed_statements == []
+
+@pytest.mark.asyncio
+async def test_hot_tiles_outlive_cache_ttl(get_test_session: AsyncSession, monkeypatch):
+    """Test that hot tiles are rendered again before they expire from the cache."""
+    monkeypatch.setattr(settings, "TILE_CACHE_TTL", 0.2)
+    async with get_test_session as session:
+        session.add(Building(id=1, address="Building 1", latitude=55.7558, longitude=37.6176))
+        await session.commit()
+
+    async def open_session():
+        return get_test_session
+
+    task = asyncio.create_task(keep_tiles_warm(open_session, [(ZOOM, X, Y)], interval=0.02))
+    try:
+        # Several times the time to live
+        for _ in range(10):
+            await asyncio.sleep(0.06)
+            assert await tile_cache.get(tile_key(data_version.value, ZOOM, X, Y, "bin")) is not None
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+@pytest.mark.asyncio
+async def test_binary_tile_large_ids(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that IDs beyond 32 bits fit the binary encoding."""
+    async with get_test_session as session:
+        session.add(Building(id=2 ** 40, address="Building", latitude=55.7558, longitude=37.6176))
+        await session.commit()
+
+    response = api_key_client.get(f"{TILE}?format=bin")
+    assert response.status_code == 200
+    assert [point[0] for point in POINT.iter_unpack(response.content)] == [2 ** 40]
+
+@pytest.mark.asyncio
+async def test_tile_validation(api_key_client: TestClient, get_test_session: AsyncSession):
+    """Test that low zoom levels and tiles outside of the map are rejected."""
+    assert api_key_client.get("api/tiles/3/1/1").status_code == 422
+    assert api_key_client.get(f"api/tiles/{ZOOM}/{2 ** ZOOM}/0").status_code == 404
+    assert api_key_client.get(f"{TILE}?format=png").status_code == 422
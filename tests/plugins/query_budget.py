@@ -0,0 +1,56 @@
+"""
+Pytest plugin failing tests whose requests run more statements than declared:
+
+    @pytest.mark.query_budget(2)
+    async def test_get_organization_by_id(api_key_client, ...):
+        ...
+
+Every request the test sends to the app must execute at most that many
+statements. Statements are attributed to requests through the context set
+by the metrics middleware, so the data a test seeds itself is not counted.
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.metrics import QueryStats, current_query_stats
+from app.core.profiling import statement_shape
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(max_queries): fail if a request of the test executes more than max_queries statements"
+    )
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    if not settings.METRICS_ENABLED:
+        pytest.fail("query_budget needs METRICS_ENABLED to attribute statements to requests", pytrace=False)
+
+    budget = marker.args[0]
+    # Statements per request, keyed by the id of its stats kept alive alongside
+    requests: Dict[int, Tuple[QueryStats, List[str]]] = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is not None:
+            requests.setdefault(id(stats), (stats, []))[1].append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        result = yield
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    statements = max((statements for _, statements in requests.values()), key=len, default=[])
+    if len(statements) > budget:
+        shapes = Counter(statement_shape(statement) for statement in statements)
+        listing = "\n".join(f"  {count} x {shape}" for shape, count in shapes.most_common())
+        pytest.fail(
+            f"A request executed {len(statements)} statements, over the budget of {budget}:\n{listing}", pytrace=False
+        )
+    return result
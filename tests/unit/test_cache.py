@@ -0,0 +1,83 @@
+import fnmatch
+import time
+import pytest
+from app.core.cache import MemoryCache, RedisCache
+
+class FakeRedis:
+    """In-memory stand-in for the subset of the redis.asyncio client the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key, value, px=None):
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+
+    async def scan_iter(self, match="*"):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    """Entries beyond the memory budget are evicted least recently used first."""
+    cache = MemoryCache(max_bytes=10)
+    await cache.set("a", b"aaaa", ttl=60)
+    await cache.set("b", b"bbbb", ttl=60)
+    assert await cache.get("a") == b"aaaa"  # "b" is now the least recently used
+
+    await cache.set("c", b"cccc", ttl=60)
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"aaaa"
+    assert await cache.get("c") == b"cccc"
+    assert cache.info() == {
+        "backend": "memory", "hits": 3, "misses": 1, "evictions": 1, "entries": 2, "bytes": 8,
+    }
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_entries(monkeypatch):
+    """Expired entries are dropped on access."""
+    cache = MemoryCache(max_bytes=100)
+    await cache.set("a", b"value", ttl=5)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert await cache.get("a") is None
+    assert cache.stats.evictions == 1
+    assert cache.info()["bytes"] == 0
+
+@pytest.mark.asyncio
+async def test_memory_cache_skips_oversized_values():
+    """Values above the per-item limit are not stored."""
+    cache = MemoryCache(max_bytes=100, max_item_bytes=3)
+    await cache.set("a", b"toolong", ttl=60)
+    assert await cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_redis_cache_round_trip():
+    """The Redis backend stores, expires and clears entries under its prefix."""
+    client = FakeRedis()
+    client.data["other:key"] = (b"untouched", None)
+    cache = RedisCache(client, prefix="test:")
+
+    await cache.set("a", b"value", ttl=60)
+    assert await cache.get("a") == b"value"
+    assert await cache.get("missing") is None
+    assert cache.info() == {"backend": "redis", "hits": 1, "misses": 1, "evictions": 0}
+
+    await cache.set("b", b"short", ttl=0.001)
+    time.sleep(0.01)
+    assert await cache.get("b") is None
+
+    await cache.clear()
+    assert await cache.get("a") is None
+    assert list(client.data) == ["other:key"]
@@ -0,0 +1,113 @@
+import random
+import pytest
+from app.utils.geo import (
+    GRID_COLUMNS,
+    bounding_box,
+    candidate_grid_ranges,
+    grid_cell,
+    min_distance_outside_square_box,
+    square_box,
+    tile_at,
+    tile_bounds,
+)
+from app.utils.math import haversine
+
+def in_ranges(cell, ranges):
+    return any(first <= cell <= last for first, last in ranges)
+
+@pytest.mark.parametrize("latitude, longitude, radius", [
+    (55.7558, 37.6176, 1),       # Moscow, 1 km
+    (55.7558, 37.6176, 150),
+    (0.0, 179.95, 25),           # Crossing the antimeridian
+    (-10.0, -179.99, 40),
+    (89.9, 10.0, 30),            # Containing the north pole
+    (-89.95, -120.0, 15),        # Containing the south pole
+])
+def test_candidate_grid_ranges_cover_circle(latitude, longitude, radius):
+    """Every point inside the circle must fall into a candidate grid cell."""
+    rng = random.Random(42)
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius)
+    all_longitudes = lon_ranges == [(-180.0, 180.0)]
+    ranges = candidate_grid_ranges(latitude, longitude, radius)
+    assert ranges is not None
+
+    for _ in range(5000):
+        lat = rng.uniform(max(min_lat - 0.5, -90), min(max_lat + 0.5, 90))
+        lon = rng.uniform(-180, 180) if all_longitudes else (
+            (longitude + rng.uniform(-3, 3) + 180) % 360 - 180
+        )
+        if haversine(latitude, longitude, lat, lon) <= radius:
+            assert in_ranges(grid_cell(lat, lon), ranges)
+
+def test_candidate_grid_ranges_are_selective():
+    """A 1 km circle only touches a handful of cells."""
+    ranges = candidate_grid_ranges(55.7558, 37.6176, 1)
+    assert sum(last - first + 1 for first, last in ranges) <= 4
+
+def test_candidate_grid_ranges_wrap_antimeridian():
+    """A circle crossing the antimeridian yields cells on both edges of the grid."""
+    ranges = candidate_grid_ranges(0.0, 179.99, 5)
+    columns = {cell % GRID_COLUMNS for first, last in ranges for cell in (first, last)}
+    assert 0 in columns and GRID_COLUMNS - 1 in columns
+
+def test_candidate_grid_ranges_give_up_on_huge_circles():
+    """Circles spanning most of the globe fall back to a full scan."""
+    assert candidate_grid_ranges(0.0, 0.0, 10000) is None
+
+def test_bounding_box_limits_latitude_and_longitude():
+    """A small circle away from the poles yields a tight box."""
+    min_lat, max_lat, lon_ranges = bounding_box(55.7558, 37.6176, 1)
+    assert 55.74 < min_lat < 55.7558 < max_lat < 55.77
+    [(west, east)] = lon_ranges
+    assert 37.60 < west < 37.6176 < east < 37.64
+
+def test_bounding_box_splits_at_antimeridian():
+    """A circle crossing the antimeridian yields two longitude ranges."""
+    _, _, lon_ranges = bounding_box(0.0, -179.99, 5)
+    assert len(lon_ranges) == 2
+    assert all(-180 <= west <= east <= 180 for west, east in lon_ranges)
+
+def test_bounding_box_covers_all_longitudes_at_pole():
+    """A circle containing a pole covers every longitude."""
+    _, max_lat, lon_ranges = bounding_box(89.99, 90.0, 5)
+    assert max_lat == 90.0
+    assert lon_ranges == [(-180.0, 180.0)]
+
+@pytest.mark.parametrize("latitude, longitude, half_size", [
+    (55.75, 37.61, 0.1),
+    (55.75, 37.61, 3.2),
+    (0.0, 179.9, 0.4),
+    (85.0, 0.0, 6.4),
+    (-30.0, -100.0, 102.4),
+])
+def test_min_distance_outside_square_box_is_a_lower_bound(latitude, longitude, half_size):
+    """No point outside the box is closer than the computed bound."""
+    rng = random.Random(3)
+    min_lat, max_lat, lon_ranges = square_box(latitude, longitude, half_size)
+    bound = min_distance_outside_square_box(latitude, longitude, half_size)
+
+    for _ in range(20000):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        inside = min_lat <= lat <= max_lat and any(west <= lon <= east for west, east in lon_ranges)
+        if not inside:
+            assert haversine(latitude, longitude, lat, lon) >= bound - 1e-9
+
+@pytest.mark.parametrize("latitude, longitude, zoom", [
+    (55.7558, 37.6176, 12),
+    (-33.8688, 151.2093, 15),
+    (0.0, -180.0, 3),
+    (84.9, 179.99, 10),
+])
+def test_tile_at_is_within_tile_bounds(latitude, longitude, zoom):
+    """The tile found for a point must contain it."""
+    x, y = tile_at(latitude, longitude, zoom)
+    min_lat, max_lat, min_lon, max_lon = tile_bounds(zoom, x, y)
+    assert min_lat <= latitude <= max_lat
+    assert min_lon <= longitude <= max_lon
+
+def test_tile_bounds_cover_the_map():
+    """The single tile of zoom 0 covers the whole Web Mercator map."""
+    min_lat, max_lat, min_lon, max_lon = tile_bounds(0, 0, 0)
+    assert (min_lon, max_lon) == (-180.0, 180.0)
+    assert min_lat == pytest.approx(-85.0511, abs=1e-4)
+    assert max_lat == pytest.approx(85.0511, abs=1e-4)
@@ -0,0 +1,33 @@
+import random
+import pytest
+from app.utils import math as geo_math
+from app.utils.math import haversine, haversine_many, within_radius
+
+def random_points(count, seed=7):
+    rng = random.Random(seed)
+    return (
+        [rng.uniform(-90, 90) for _ in range(count)],
+        [rng.uniform(-180, 180) for _ in range(count)],
+    )
+
+def test_haversine_many_matches_scalar():
+    """The batched distances match the scalar haversine."""
+    latitudes, longitudes = random_points(1000)
+    distances = haversine_many(55.7558, 37.6176, latitudes, longitudes)
+    expected = [haversine(55.7558, 37.6176, lat, lon) for lat, lon in zip(latitudes, longitudes)]
+    assert list(distances) == pytest.approx(expected, abs=1e-6)
+
+def test_haversine_many_python_fallback(monkeypatch):
+    """Without NumPy the pure Python path gives the same distances and mask."""
+    latitudes, longitudes = random_points(1000)
+    vectorized = within_radius(0.0, 0.0, latitudes, longitudes, 5000)
+
+    monkeypatch.setattr(geo_math, "np", None)
+    distances = haversine_many(0.0, 0.0, latitudes, longitudes)
+    assert isinstance(distances, list)
+    assert within_radius(0.0, 0.0, latitudes, longitudes, 5000) == list(vectorized)
+
+def test_haversine_many_handles_antipodes_and_empty_input():
+    """Antipodal points and empty inputs don't blow up."""
+    assert list(haversine_many(0.0, 0.0, [0.0], [180.0])) == pytest.approx([geo_math.EARTH_RADIUS_KM * 3.141592653589793])
+    assert len(haversine_many(0.0, 0.0, [], [])) == 0
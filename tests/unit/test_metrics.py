@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.metrics import Histogram, MetricsRegistry, QueryStats, current_query_stats, instrument_engine, label_worker
+
+def test_histogram_buckets():
+    """Test that observations land in the first bucket whose bound they do not exceed and render cumulatively."""
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert list(histogram.render("latency", 'route="/"')) == [
+        'latency_bucket{route="/",le="0.1"} 2',
+        'latency_bucket{route="/",le="1.0"} 3',
+        'latency_bucket{route="/",le="+Inf"} 4',
+        'latency_sum{route="/"} 3.65',
+        'latency_count{route="/"} 4',
+    ]
+
+def test_queries_are_attributed_to_the_current_request():
+    """Test that statements count towards the request in context and the totals."""
+    registry = MetricsRegistry()
+    registry.observe_query(0.5)
+
+    queries = QueryStats()
+    token = current_query_stats.set(queries)
+    try:
+        registry.observe_query(0.25)
+        registry.observe_query(0.25)
+    finally:
+        current_query_stats.reset(token)
+
+    assert (queries.count, queries.seconds) == (2, 0.5)
+    assert (registry.queries_total, registry.query_seconds_total) == (3, 1.0)
+
+    registry.observe_request("GET", "/api/organizations/{organization_id}", 200, 0.01, queries)
+    lines = registry.render()
+    assert 'http_requests_total{method="GET",route="/api/organizations/{organization_id}",status="200"} 1' in lines
+    assert 'http_request_db_queries_sum{method="GET",route="/api/organizations/{organization_id}"} 2' in lines
+
+@pytest.mark.asyncio
+async def test_engine_instrumented_twice_counts_each_statement_once():
+    """Test that a statement whose start another listener already consumed is skipped, not a KeyError."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    registry = MetricsRegistry()
+    instrument_engine(engine, registry)
+    instrument_engine(engine, registry)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+
+    assert registry.queries_total == 1
+
+def test_label_worker():
+    """Test that every sample gets the worker label, with or without labels of its own, and comments are kept."""
+    lines = [
+        "# TYPE db_queries_total counter",
+        "db_queries_total 3",
+        'http_requests_total{method="GET",route="/api/organizations/{organization_id}",status="200"} 1',
+    ]
+    assert label_worker(lines, "7") == [
+        "# TYPE db_queries_total counter",
+        'db_queries_total{worker="7"} 3',
+        'http_requests_total{method="GET",route="/api/organizations/{organization_id}",status="200",worker="7"} 1',
+    ]
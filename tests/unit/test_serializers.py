@@ -0,0 +1,57 @@
+from app.db.models import Activity, Building, Organization
+from app.schemas.schemas import (
+    ActivityBase,
+    BuildingBase,
+    BuildingWithOrganizationsResponse,
+    OrganizationBase,
+    OrganizationWithBuilding,
+    OrganizationWithDistance,
+)
+from app.schemas.serializers import (
+    activity_to_dict,
+    building_to_dict,
+    building_with_organizations_to_dict,
+    organization_to_dict,
+    organization_with_building_to_dict,
+    organization_with_distance_to_dict,
+)
+
+def make_building():
+    building = Building(id=1, address="Test Address", latitude=55.75, longitude=-37.5)
+    activity = Activity(id=2, name="Food", parent_id=None)
+    building.organizations = [
+        Organization(id=3, name="First", phone_numbers=["123-456", "789"], activities=[activity]),
+        Organization(id=4, name="Second", phone_numbers=[], activities=[]),
+    ]
+    return building
+
+def test_projections_match_schemas():
+    """Every projection dumps exactly what its response model does."""
+    building = make_building()
+    organization = building.organizations[0]
+
+    assert activity_to_dict(organization.activities[0]) == ActivityBase.model_validate(organization.activities[0]).model_dump()
+    assert building_to_dict(building) == BuildingBase.model_validate(building).model_dump()
+    assert organization_to_dict(organization) == OrganizationBase.model_validate(organization).model_dump()
+    assert (
+        organization_with_building_to_dict(organization)
+        == OrganizationWithBuilding.model_validate(organization).model_dump()
+    )
+    assert (
+        organization_with_distance_to_dict(organization, 1.5)
+        == OrganizationWithDistance.model_validate(
+            {**OrganizationWithBuilding.model_validate(organization).model_dump(), "distance": 1.5}
+        ).model_dump()
+    )
+    assert (
+        building_with_organizations_to_dict(building)
+        == BuildingWithOrganizationsResponse.model_validate(building).model_dump()
+    )
+
+def test_projections_cover_schema_fields():
+    """A field added to a response model must be added to its projection too."""
+    building = make_building()
+    organization = building.organizations[0]
+
+    assert set(organization_with_building_to_dict(organization)) == set(OrganizationWithBuilding.model_fields)
+    assert set(building_with_organizations_to_dict(building)) == set(BuildingWithOrganizationsResponse.model_fields)